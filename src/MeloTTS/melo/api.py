@@ -16,6 +16,9 @@ from .models import SynthesizerTrn
 from .split_utils import split_sentence
 from .mel_processing import spectrogram_torch, spectrogram_torch_conv
 from .download_utils import load_or_download_config, load_or_download_model
+from .audio_cache import checkpoint_hash
+from .compile_utils import compile_inference_modules
+from .onnx_utils import export_onnx, OnnxSynthesizerTrn
 
 class TTS(nn.Module):
     def __init__(self, 
@@ -57,19 +60,68 @@ class TTS(nn.Module):
     
         # load state_dict
         checkpoint_dict = load_or_download_model(language, device, use_hf=use_hf, ckpt_path=ckpt_path)
+        if checkpoint_dict.get('inference_only'):
+            # written by save_inference_checkpoint, the weights are already folded
+            self.optimize_for_inference()
         self.model.load_state_dict(checkpoint_dict['model'], strict=True)
         
         language = language.split('_')[0]
         self.language = 'ZH_MIX_EN' if language == 'ZH' else language # we support a ZH_MIX_EN model
+        # a FeatureCache to reuse the frontend output of repeated sentences, off by default
+        self.feature_cache = None
+        # an AudioCache for the waveforms of seeded tts_to_file calls, off by default
+        self.audio_cache = None
+
+    def optimize_for_inference(self):
+        """Folds the weight norms into plain weights and drops the posterior encoder.
+
+        Weight norm recomputes every weight from weight_g and weight_v on each
+        forward pass, and enc_q is only used in training. Outputs change by
+        float rounding only.
+        """
+        self.model.remove_weight_norm()
+        self.model.enc_q = None
+        # the weights are stored differently now, audio cache keys follow them
+        self.model.__dict__.pop('_checkpoint_hash', None)
+        return self
+
+    def save_inference_checkpoint(self, ckpt_path):
+        """Saves the optimized weights alone, a checkpoint TTS(ckpt_path=...) loads directly."""
+        self.optimize_for_inference()
+        torch.save({'model': self.model.state_dict(), 'inference_only': True}, ckpt_path)
+
+    def compile_for_inference(self, cache_dir=None, mode=None):
+        """Runs the encoder, duration predictors, flow and decoder compiled, see compile_inference_modules.
+
+        The first sentences are slow while they compile. `mode` is a
+        torch.compile mode, e.g. 'max-autotune'.
+        """
+        compile_inference_modules(self.model, cache_dir=cache_dir, mode=mode)
+        return self
+
+    def export_onnx(self, output_dir, opset_version=17):
+        """Writes the optimized model as the ONNX graphs that load_onnx runs."""
+        self.optimize_for_inference()
+        export_onnx(self.model, output_dir, opset_version=opset_version)
+
+    def load_onnx(self, onnx_dir, sess_options=None, providers=None, num_threads=None):
+        """Runs the model with ONNX Runtime from then on, the text frontend and BERT stay in torch.
+
+        tts_to_file, tts_batch and tts_iter work as before, but tts_iter
+        yields whole sentences.
+        """
+        self.model = OnnxSynthesizerTrn(onnx_dir, sess_options=sess_options, providers=providers, num_threads=num_threads)
+        return self
 
     @staticmethod
     def audio_numpy_concat(segment_data_list, sr, speed=1.):
+        silence = np.zeros(int((sr * 0.05) / speed), dtype=np.float32)
         audio_segments = []
         for segment_data in segment_data_list:
-            audio_segments += segment_data.reshape(-1).tolist()
-            audio_segments += [0] * int((sr * 0.05) / speed)
-        audio_segments = np.array(audio_segments).astype(np.float32)
-        return audio_segments
+            audio_segments += [segment_data.reshape(-1), silence]
+        if not audio_segments:
+            return silence[:0]
+        return np.concatenate(audio_segments).astype(np.float32)
 
     @staticmethod
     def split_sentences_into_pieces(text, language, quiet=False):
@@ -80,24 +132,16 @@ class TTS(nn.Module):
             print(" > ===========================")
         return texts
 
-    def tts_to_file(self, text, speaker_id, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False,):
+    def tts_iter(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, chunk_size=32, context=None, quiet=False):
+        """Like tts_to_file, but yields audio as soon as each decoder window of a sentence is ready."""
         language = self.language
         texts = self.split_sentences_into_pieces(text, language, quiet)
-        audio_list = []
-        if pbar:
-            tx = pbar(texts)
-        else:
-            if position:
-                tx = tqdm(texts, position=position)
-            elif quiet:
-                tx = texts
-            else:
-                tx = tqdm(texts)
-        for t in tx:
+        silence = np.zeros(int((self.hps.data.sampling_rate * 0.05) / speed), dtype=np.float32)
+        for t in texts:
             if language in ['EN', 'ZH_MIX_EN']:
                 t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
             device = self.device
-            bert, ja_bert, phones, tones, lang_ids = utils.get_text_for_tts_infer(t, language, self.hps, device, self.symbol_to_id)
+            bert, ja_bert, phones, tones, lang_ids = utils.get_text_for_tts_infer(t, language, self.hps, device, self.symbol_to_id, cache=self.feature_cache)
             with torch.no_grad():
                 x_tst = phones.to(device).unsqueeze(0)
                 tones = tones.to(device).unsqueeze(0)
@@ -105,9 +149,8 @@ class TTS(nn.Module):
                 bert = bert.to(device).unsqueeze(0)
                 ja_bert = ja_bert.to(device).unsqueeze(0)
                 x_tst_lengths = torch.LongTensor([phones.size(0)]).to(device)
-                del phones
                 speakers = torch.LongTensor([speaker_id]).to(device)
-                audio = self.model.infer(
+                for o in self.model.infer_stream(
                         x_tst,
                         x_tst_lengths,
                         speakers,
@@ -119,13 +162,134 @@ class TTS(nn.Module):
                         noise_scale=noise_scale,
                         noise_scale_w=noise_scale_w,
                         length_scale=1. / speed,
-                    )[0][0, 0].data.cpu().float().numpy()
-                del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers
-                # 
-            audio_list.append(audio)
+                        chunk_size=chunk_size,
+                        context=context,
+                    ):
+                    yield o[0, 0].data.cpu().float().numpy()
+            yield silence
+
+    def tts_to_file(self, text, speaker_id, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False, seed=None, batch_size=1):
+        """With a seed the output is reproducible, and cached when self.audio_cache is set.
+
+        With a batch_size above 1, for long documents, sentences of similar
+        phone counts go through the model together, up to batch_size at a
+        time, and the audio is put back in reading order. Seeded sentences
+        are still synthesized one by one.
+        """
+        language = self.language
+        cache_key = None
+        if seed is not None and self.audio_cache is not None:
+            cache_key = self.audio_cache.key(
+                text=text, speaker_id=speaker_id, sdp_ratio=sdp_ratio, noise_scale=noise_scale,
+                noise_scale_w=noise_scale_w, speed=speed, language=language, seed=seed,
+                checkpoint=checkpoint_hash(self.model),
+            )
+            audio = self.audio_cache.get(cache_key)
+            if audio is not None:
+                return self.write_audio(audio, output_path, format)
+        texts = self.split_sentences_into_pieces(text, language, quiet)
+        if language in ['EN', 'ZH_MIX_EN']:
+            texts = [re.sub(r'([a-z])([A-Z])', r'\1 \2', t) for t in texts]
+        # BERT runs over all sentences together instead of once per sentence
+        text_inputs = utils.get_texts_for_tts_infer(texts, language, self.hps, self.device, self.symbol_to_id, cache=self.feature_cache)
+        order = list(range(len(text_inputs)))
+        if seed is None and batch_size > 1:
+            # sentences of similar length share a batch, so little of it is padding
+            order.sort(key=lambda i: text_inputs[i][2].size(0))
+        else:
+            # every sentence is seeded on its own, so its noise does not depend on what came before
+            batch_size = 1
+        batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+        audio_list = [None] * len(text_inputs)
+        if pbar:
+            tx = pbar(batches)
+        else:
+            if position:
+                tx = tqdm(batches, position=position)
+            elif quiet:
+                tx = batches
+            else:
+                tx = tqdm(batches)
+        for batch in tx:
+            generator = None if seed is None else torch.Generator().manual_seed(seed)
+            audios = self.infer_batch(
+                [text_inputs[i] for i in batch], [speaker_id] * len(batch),
+                sdp_ratio, noise_scale, noise_scale_w, speed, generator=generator,
+            )
+            for i, audio in zip(batch, audios):
+                audio_list[i] = audio
         torch.cuda.empty_cache()
         audio = self.audio_numpy_concat(audio_list, sr=self.hps.data.sampling_rate, speed=speed)
+        if cache_key is not None:
+            self.audio_cache.put(cache_key, audio)
+        return self.write_audio(audio, output_path, format)
+
+    def infer_batch(self, text_inputs, speaker_ids, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, generator=None):
+        """One forward pass over the get_text_for_tts_infer outputs of several sentences.
+
+        Inputs are zero padded to the longest one and the padding is masked
+        out, so a sentence only depends on the others through the noise drawn
+        for the batch. Returns one waveform per sentence, trimmed to its own
+        y_mask length times the hop length.
+        """
+        device = self.device
+        x_lengths = torch.LongTensor([phones.size(0) for _, _, phones, _, _ in text_inputs])
+        max_len = int(x_lengths.max())
+
+        def pad(tensors):
+            batch = tensors[0].new_zeros(len(tensors), *tensors[0].shape[:-1], max_len)
+            for i, tensor in enumerate(tensors):
+                batch[i, ..., :tensor.size(-1)] = tensor
+            return batch.to(device)
+
+        bert, ja_bert, phones, tones, lang_ids = (pad(tensors) for tensors in zip(*text_inputs))
+        with torch.no_grad():
+            o, _, y_mask, _ = self.model.infer(
+                    phones,
+                    x_lengths.to(device),
+                    torch.LongTensor(speaker_ids).to(device),
+                    tones,
+                    lang_ids,
+                    bert,
+                    ja_bert,
+                    sdp_ratio=sdp_ratio,
+                    noise_scale=noise_scale,
+                    noise_scale_w=noise_scale_w,
+                    length_scale=1. / speed,
+                    generator=generator,
+                )
+        audio_lengths = (y_mask.sum([1, 2]).long() * self.hps.data.hop_length).tolist()
+        o = o[:, 0].data.cpu().float().numpy()
+        return [o[i, :n] for i, n in enumerate(audio_lengths)]
+
+    def tts_batch(self, texts, speaker_ids, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, batch_size=None):
+        """Synthesizes every text as one utterance and returns a waveform per text.
+
+        Unlike tts_to_file, texts are not split into sentences. Up to
+        `batch_size` of them, all by default, go through the model in one
+        forward pass. `speaker_ids` is a list with one id per text or a
+        single id for all of them.
+        """
+        if not texts:
+            return []
+        if isinstance(speaker_ids, int):
+            speaker_ids = [speaker_ids] * len(texts)
+        assert len(speaker_ids) == len(texts), 'one speaker id per text'
+        language = self.language
+        if language in ['EN', 'ZH_MIX_EN']:
+            texts = [re.sub(r'([a-z])([A-Z])', r'\1 \2', t) for t in texts]
+        text_inputs = utils.get_texts_for_tts_infer(texts, language, self.hps, self.device, self.symbol_to_id, cache=self.feature_cache)
+        batch_size = batch_size or len(texts)
+        audios = []
+        for start in range(0, len(texts), batch_size):
+            audios += self.infer_batch(
+                text_inputs[start:start + batch_size], speaker_ids[start:start + batch_size],
+                sdp_ratio, noise_scale, noise_scale_w, speed,
+            )
+        torch.cuda.empty_cache()
+        return audios
 
+    def write_audio(self, audio, output_path=None, format=None):
         if output_path is None:
             return audio
         else:
@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+
+def checkpoint_hash(module):
+    """sha256 of a module's weights, computed once and remembered on the module."""
+    cached = getattr(module, '_checkpoint_hash', None)
+    if cached is None:
+        h = hashlib.sha256()
+        for name, tensor in module.state_dict().items():
+            h.update(name.encode('utf-8'))
+            h.update(tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+        cached = h.hexdigest()[:16]
+        module._checkpoint_hash = cached
+    return cached
+
+
+class AudioCache:
+    """Final waveforms of seeded syntheses, keyed by every parameter that shapes them.
+
+    Only seeded requests are cached: without a seed the noise in
+    SynthesizerTrn.infer makes every synthesis different. Waveforms are kept
+    in an in-memory LRU of at most `memory_mb` and, with a `cache_dir`, as
+    .npy files in an on-disk LRU of at most `disk_mb`. Disk hits are
+    memory-mapped, so they can be streamed out without reading the whole
+    file. A file's modification time serves as its last use, so the disk LRU
+    order survives restarts. A miss still looks for the file, which other
+    processes sharing `cache_dir` may have written since.
+    """
+
+    def __init__(self, memory_mb=64, cache_dir=None, disk_mb=1024):
+        self.memory_bytes = int(memory_mb * 1024 * 1024)
+        self.disk_bytes = int(disk_mb * 1024 * 1024)
+        self.cache_dir = cache_dir
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+        # running totals of the sizes in _memory and _disk
+        self._memory_nbytes = 0
+        self._disk_nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            files = []
+            for root, _, names in os.walk(cache_dir):
+                for name in names:
+                    if name.endswith('.npy'):
+                        stat = os.stat(os.path.join(root, name))
+                        files.append((stat.st_mtime, name[:-len('.npy')], stat.st_size))
+            for _, key, size in sorted(files):
+                self._disk[key] = size
+                self._disk_nbytes += size
+
+    @staticmethod
+    def key(**params):
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.npy')
+
+    def get(self, key):
+        """The cached float32 waveform, or None. Callers must not modify it."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return audio
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                audio = np.load(path, mmap_mode='r')
+                os.utime(path)
+            except FileNotFoundError:
+                # never written, or evicted by another process sharing the directory
+                audio = None
+        with self._lock:
+            if audio is None:
+                self._disk_discard(key)
+                self.misses += 1
+                return None
+            # possibly written by another process
+            self._disk_record(key, os.path.getsize(path))
+            self.disk_hits += 1
+        self._remember(key, np.array(audio))
+        return audio
+
+    def _disk_record(self, key, size):
+        self._disk_discard(key)
+        self._disk[key] = size
+        self._disk_nbytes += size
+
+    def _disk_discard(self, key):
+        self._disk_nbytes -= self._disk.pop(key, 0)
+
+    def put(self, key, audio):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        self._remember(key, audio)
+        if self.cache_dir is None or audio.nbytes > self.disk_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, audio)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_record(key, os.path.getsize(path))
+            evicted = []
+            while self._disk_nbytes > self.disk_bytes:
+                old, size = self._disk.popitem(last=False)
+                self._disk_nbytes -= size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key, audio):
+        if audio.nbytes > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_nbytes -= previous.nbytes
+            self._memory[key] = audio
+            self._memory_nbytes += audio.nbytes
+            while self._memory_nbytes > self.memory_bytes:
+                self._memory_nbytes -= self._memory.popitem(last=False)[1].nbytes
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'memory_mb': self._memory_nbytes / (1024 * 1024),
+                'disk_mb': self._disk_nbytes / (1024 * 1024),
+                'entries': len(self._memory),
+                'disk_entries': len(self._disk),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
@@ -9,6 +9,7 @@ from mel_processing import spectrogram_torch, mel_spectrogram_torch
 from utils import load_filepaths_and_text
 from utils import load_wav_to_torch_librosa as load_wav_to_torch
 from text import cleaned_text_to_sequence, get_bert
+from feature_store import FeatureStore
 import numpy as np
 
 """Multi speaker version"""
@@ -32,6 +33,9 @@ class TextAudioSpeakerLoader(torch.utils.data.Dataset):
         self.spk_map = hparams.spk2id
         self.hparams = hparams
         self.disable_bert = getattr(hparams, "disable_bert", False)
+        # BERT features written by preprocess_text.py --feature-store, if any
+        feature_store = getattr(hparams, "feature_store", None)
+        self.feature_store = FeatureStore(feature_store) if feature_store else None
 
         self.use_mel_spec_posterior = getattr(
             hparams, "use_mel_posterior_encoder", False
@@ -158,7 +162,10 @@ class TextAudioSpeakerLoader(torch.utils.data.Dataset):
             word2ph[0] += 1
         bert_path = wav_path.replace(".wav", ".bert.pt")
         try:
-            bert = torch.load(bert_path)
+            if self.feature_store is not None and wav_path in self.feature_store:
+                bert = self.feature_store.get(wav_path)
+            else:
+                bert = torch.load(bert_path)
             assert bert.shape[-1] == len(phone)
         except Exception as e:
             print(e, wav_path, bert_path, bert.shape, len(phone))
@@ -0,0 +1,173 @@
+import os
+import json
+import struct
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+# magic, number of phones, bert rows (0 when bert is disabled)
+_HEADER = struct.Struct('<4sII')
+_MAGIC = b'MFC1'
+
+
+def model_id_for(hps, language):
+    """Identifies everything besides the text that decides the frontend output."""
+    config = {
+        'language': language,
+        'symbols': list(hps.symbols),
+        'add_blank': hps.data.add_blank,
+        'disable_bert': getattr(hps.data, 'disable_bert', False),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class FeatureCache:
+    """Phones, tones, language ids and BERT features of sentences seen before.
+
+    Entries are keyed by a hash of (language, normalized text, model id), so
+    texts that normalize alike share one. The `capacity` most recently used
+    entries are kept in memory. With a `cache_dir`, every entry is also
+    written there as one raw file and read back through `np.memmap`, so
+    worker processes pointed at the same directory share the entries and the
+    OS page cache instead of each recomputing them. Files are written to a
+    temporary name and renamed, so readers never see a partial entry. The
+    files form an LRU of at most `disk_mb`, with a file's modification time as
+    its last use, like the disk tier of AudioCache.
+    """
+
+    def __init__(self, capacity=256, cache_dir=None, disk_mb=1024):
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.disk_bytes = int(disk_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._disk = OrderedDict()
+        # running total of the sizes in _disk
+        self._disk_nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            files = []
+            for root, _, names in os.walk(cache_dir):
+                for name in names:
+                    if name.endswith('.feat'):
+                        stat = os.stat(os.path.join(root, name))
+                        files.append((stat.st_mtime, name[:-len('.feat')], stat.st_size))
+            for _, key, size in sorted(files):
+                self._disk[key] = size
+                self._disk_nbytes += size
+
+    @staticmethod
+    def key(language, text, model_id):
+        """`text` is the normalized text, see get_texts_for_tts_infer."""
+        return hashlib.sha256(f'{language}\0{model_id}\0{text}'.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.feat')
+
+    def get(self, key):
+        """Returns (bert, phone, tone, language) or None. bert is None when disabled."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._read(key) if self.cache_dir is not None else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self.cache_dir is not None:
+            self._write(key, entry)
+
+    def _remember(self, key, entry):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            data = np.memmap(path, dtype=np.uint8, mode='r')
+            os.utime(path)
+        except FileNotFoundError:
+            # never written, or evicted by another process sharing the directory
+            with self._lock:
+                self._disk_discard(key)
+            return None
+        with self._lock:
+            # possibly written by another process
+            self._disk_record(key, data.size)
+        magic, n_phones, bert_rows = _HEADER.unpack(data[:_HEADER.size].tobytes())
+        assert magic == _MAGIC, f'{path} is not a feature cache entry'
+        ids_end = _HEADER.size + 3 * n_phones * 4
+        ids = np.frombuffer(data, dtype='<i4', count=3 * n_phones, offset=_HEADER.size).reshape(3, n_phones)
+        phone, tone, language = (row.tolist() for row in ids)
+        bert = None
+        if bert_rows:
+            bert = np.frombuffer(data, dtype='<f4', count=bert_rows * n_phones, offset=ids_end)
+            bert = torch.from_numpy(bert.reshape(bert_rows, n_phones).copy())
+        return bert, phone, tone, language
+
+    def _disk_record(self, key, size):
+        self._disk_discard(key)
+        self._disk[key] = size
+        self._disk_nbytes += size
+
+    def _disk_discard(self, key):
+        self._disk_nbytes -= self._disk.pop(key, 0)
+
+    def _write(self, key, entry):
+        bert, phone, tone, language = entry
+        bert_rows = 0 if bert is None else bert.shape[0]
+        if _HEADER.size + 4 * len(phone) * (3 + bert_rows) > self.disk_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(phone), bert_rows))
+            f.write(np.asarray([phone, tone, language], dtype='<i4').tobytes())
+            if bert is not None:
+                f.write(bert.detach().cpu().float().numpy().astype('<f4').tobytes())
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_record(key, os.path.getsize(path))
+            evicted = []
+            while self._disk_nbytes > self.disk_bytes:
+                old, size = self._disk.popitem(last=False)
+                self._disk_nbytes -= size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+
+    def metrics(self):
+        return {
+            'capacity': self.capacity,
+            'resident': len(self._entries),
+            'disk_mb': self._disk_nbytes / (1024 * 1024),
+            'disk_entries': len(self._disk),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+        }
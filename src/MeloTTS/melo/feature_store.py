@@ -0,0 +1,90 @@
+import os
+import json
+import tempfile
+
+import numpy as np
+import torch
+
+_INDEX = 'index.json'
+
+
+class FeatureStoreWriter:
+    """Writes BERT features of a corpus into a few large shards plus one index.
+
+    Features are appended as raw float32 [rows, phones] arrays to
+    shard-NNNNN.bin files of about `shard_mb` each. The index maps every key,
+    e.g. the wav path of an utterance, to its shard, offset and shape, and is
+    written by close(), so a store without an index is incomplete.
+    """
+
+    def __init__(self, root, shard_mb=1024):
+        self.root = root
+        self.shard_bytes = int(shard_mb * 1024 * 1024)
+        self.entries = {}
+        self.shards = []
+        self._file = None
+        os.makedirs(root, exist_ok=True)
+
+    def _open_shard(self):
+        if self._file is not None:
+            self._file.close()
+        name = f'shard-{len(self.shards):05d}.bin'
+        self.shards.append(name)
+        self._file = open(os.path.join(self.root, name), 'wb')
+
+    def put(self, key, feature):
+        data = feature.detach().cpu().float().numpy().astype('<f4', copy=False)
+        if self._file is None or self._file.tell() + data.nbytes > self.shard_bytes:
+            self._open_shard()
+        self.entries[key] = [len(self.shards) - 1, self._file.tell(), *data.shape]
+        self._file.write(data.tobytes())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'dtype': 'float32', 'shards': self.shards, 'entries': self.entries}, f)
+        os.replace(tmp_path, os.path.join(self.root, _INDEX))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FeatureStore:
+    """Reads a store written by FeatureStoreWriter.
+
+    Shards are memory-mapped on first use, so data loader workers forked
+    after the store was opened map them on their own and share the pages.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, _INDEX), encoding='utf-8') as f:
+            index = json.load(f)
+        self.shards = index['shards']
+        self.entries = index['entries']
+        self._maps = {}
+
+    def _shard(self, shard):
+        data = self._maps.get(shard)
+        if data is None:
+            data = np.memmap(os.path.join(self.root, self.shards[shard]), dtype='<f4', mode='r')
+            self._maps[shard] = data
+        return data
+
+    def get(self, key):
+        shard, offset, rows, cols = self.entries[key]
+        start = offset // 4
+        data = self._shard(shard)[start:start + rows * cols]
+        return torch.from_numpy(np.array(data).reshape(rows, cols))
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -30,7 +30,14 @@ import os
 )
 @click.option("--speed", "-s", default=1.0, help="Speed, defaults to 1.0", type=float)
 @click.option("--device", "-d", default="auto", help="Device, defaults to auto")
-def main(text, file, output_path, language, speaker, speed, device):
+@click.option(
+    "--batch-size",
+    "-b",
+    default=1,
+    help="Sentences of similar length synthesized together, for long texts. Defaults to 1",
+    type=int,
+)
+def main(text, file, output_path, language, speaker, speed, device, batch_size):
     if file:
         if not os.path.exists(text):
             raise FileNotFoundError(
@@ -58,4 +65,4 @@ def main(text, file, output_path, language, speaker, speed, device):
         spkr = speaker_ids[speaker]
     else:
         spkr = speaker_ids[list(speaker_ids.keys())[0]]
-    model.tts_to_file(text, spkr, output_path, speed=speed)
+    model.tts_to_file(text, spkr, output_path, speed=speed, batch_size=batch_size)
@@ -9,11 +9,17 @@ from MeloTTS.melo import attentions
 
 from torch.nn import Conv1d, ConvTranspose1d, Conv2d
 from torch.nn.utils import weight_norm, remove_weight_norm, spectral_norm
+from torch.nn.utils.weight_norm import WeightNorm
 
 from MeloTTS.melo.commons import init_weights, get_padding
 import melo.monotonic_align as monotonic_align
 
 
+def _conv_context(convs):
+    """Input steps on each side that a stack of same-padded convs looks at."""
+    return sum(c.dilation[0] * (c.kernel_size[0] - 1) // 2 for c in convs)
+
+
 class DurationDiscriminator(nn.Module):  # vits2
     def __init__(
         self, in_channels, filter_channels, kernel_size, p_dropout, gin_channels=0
@@ -203,7 +209,8 @@ class StochasticDurationPredictor(nn.Module):
         if gin_channels != 0:
             self.cond = nn.Conv1d(gin_channels, filter_channels, 1)
 
-    def forward(self, x, x_mask, w=None, g=None, reverse=False, noise_scale=1.0):
+    def forward(self, x, x_mask, w=None, g=None, reverse=False, noise_scale=1.0, generator=None, noise=None):
+        # noise: the [b, 2, t] standard normal noise of reverse, drawn here when None
         x = torch.detach(x)
         x = self.pre(x)
         if g is not None:
@@ -254,10 +261,11 @@ class StochasticDurationPredictor(nn.Module):
         else:
             flows = list(reversed(self.flows))
             flows = flows[:-2] + [flows[-1]]  # remove a useless vflow
-            z = (
-                torch.randn(x.size(0), 2, x.size(2)).to(device=x.device, dtype=x.dtype)
-                * noise_scale
-            )
+            if noise is None:
+                noise = torch.randn(x.size(0), 2, x.size(2), generator=generator).to(
+                    device=x.device, dtype=x.dtype
+                )
+            z = noise * noise_scale
             for flow in flows:
                 z = flow(z, x_mask, g=x, reverse=reverse)
             z0, z1 = torch.split(z, [1, 1], 1)
@@ -456,7 +464,7 @@ class PosteriorEncoder(nn.Module):
         )
         self.proj = nn.Conv1d(hidden_channels, out_channels * 2, 1)
 
-    def forward(self, x, x_lengths, g=None, tau=1.0):
+    def forward(self, x, x_lengths, g=None, tau=1.0, generator=None):
         x_mask = torch.unsqueeze(commons.sequence_mask(x_lengths, x.size(2)), 1).to(
             x.dtype
         )
@@ -464,7 +472,11 @@ class PosteriorEncoder(nn.Module):
         x = self.enc(x, x_mask, g=g)
         stats = self.proj(x) * x_mask
         m, logs = torch.split(stats, self.out_channels, dim=1)
-        z = (m + torch.randn_like(m) * tau * torch.exp(logs)) * x_mask
+        if generator is None:
+            noise = torch.randn_like(m)
+        else:
+            noise = torch.randn(m.size(), generator=generator).to(m)
+        z = (m + noise * tau * torch.exp(logs)) * x_mask
         return z, m, logs, x_mask
 
 
@@ -515,6 +527,7 @@ class Generator(torch.nn.Module):
 
         if gin_channels != 0:
             self.cond = nn.Conv1d(gin_channels, upsample_initial_channel, 1)
+        self.upsample_factor = math.prod(upsample_rates)
 
     def forward(self, x, g=None):
         x = self.conv_pre(x)
@@ -537,6 +550,38 @@ class Generator(torch.nn.Module):
 
         return x
 
+    def context_frames(self):
+        """Input frames on each side of a frame that its output samples depend on."""
+        frames = _conv_context([self.conv_pre])
+        rate = 1
+        for i, up in enumerate(self.ups):
+            # a transposed conv sample sees about kernel / stride inputs
+            frames += math.ceil(up.kernel_size[0] / up.stride[0] / 2) / rate
+            rate *= up.stride[0]
+            resblocks = self.resblocks[i * self.num_kernels:(i + 1) * self.num_kernels]
+            frames += max(_conv_context(m for m in rb.modules() if isinstance(m, Conv1d)) for rb in resblocks) / rate
+        frames += _conv_context([self.conv_post]) / rate
+        return math.ceil(frames)
+
+    def stream(self, x, g=None, chunk_size=32, context=None):
+        """Decode `x` [b, c, t] window by window along time.
+
+        Each window of `chunk_size` frames is decoded together with up to
+        `context` neighbouring frames on both sides, by default the receptive
+        field of context_frames, and the samples that belong to the context
+        are trimmed off again. Audio [b, 1, chunk_size * upsample_factor] is
+        yielded as soon as each window is decoded.
+        """
+        if context is None:
+            context = self.context_frames()
+        hop = self.upsample_factor
+        length = x.size(2)
+        for start in range(0, length, chunk_size):
+            end = min(start + chunk_size, length)
+            lo, hi = max(start - context, 0), min(end + context, length)
+            o = self.forward(x[:, :, lo:hi], g=g)
+            yield o[:, :, (start - lo) * hop : (end - lo) * hop]
+
     def remove_weight_norm(self):
         print("Removing weight norm...")
         for layer in self.ups:
@@ -964,7 +1009,7 @@ class SynthesizerTrn(nn.Module):
             (x, logw, logw_),
         )
 
-    def infer(
+    def infer_latent(
         self,
         x,
         x_lengths,
@@ -976,11 +1021,12 @@ class SynthesizerTrn(nn.Module):
         noise_scale=0.667,
         length_scale=1,
         noise_scale_w=0.8,
-        max_len=None,
         sdp_ratio=0,
         y=None,
         g=None,
+        generator=None,
     ):
+        # generator: a cpu torch.Generator that makes the noise reproducible, global RNG when None
         # x, m_p, logs_p, x_mask = self.enc_p(x, x_lengths, tone, language, bert)
         # g = self.gst(y)
         if g is None:
@@ -995,9 +1041,9 @@ class SynthesizerTrn(nn.Module):
         x, m_p, logs_p, x_mask = self.enc_p(
             x, x_lengths, tone, language, bert, ja_bert, g=g_p
         )
-        logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * (
-            sdp_ratio
-        ) + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
+        logw = self.sdp(
+            x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w, generator=generator
+        ) * (sdp_ratio) + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
         w = torch.exp(logw) * x_mask * length_scale
 
         w_ceil = torch.ceil(w)
@@ -1015,17 +1061,105 @@ class SynthesizerTrn(nn.Module):
             1, 2
         )  # [b, t', t], [b, t, d] -> [b, d, t']
 
-        z_p = m_p + torch.randn_like(m_p) * torch.exp(logs_p) * noise_scale
+        if generator is None:
+            noise = torch.randn_like(m_p)
+        else:
+            noise = torch.randn(m_p.size(), generator=generator).to(m_p)
+        z_p = m_p + noise * torch.exp(logs_p) * noise_scale
         z = self.flow(z_p, y_mask, g=g, reverse=True)
+        return z, g, attn, y_mask, (z, z_p, m_p, logs_p)
+
+    def infer(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        max_len=None,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        generator=None,
+    ):
+        z, g, attn, y_mask, latents = self.infer_latent(
+            x,
+            x_lengths,
+            sid,
+            tone,
+            language,
+            bert,
+            ja_bert,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            noise_scale_w=noise_scale_w,
+            sdp_ratio=sdp_ratio,
+            y=y,
+            g=g,
+            generator=generator,
+        )
         o = self.dec((z * y_mask)[:, :, :max_len], g=g)
         # print('max/min of o:', o.max(), o.min())
-        return o, attn, y_mask, (z, z_p, m_p, logs_p)
+        return o, attn, y_mask, latents
+
+    def infer_stream(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        max_len=None,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        chunk_size=32,
+        context=None,
+        generator=None,
+    ):
+        # same as infer, but the decoder yields audio window by window (see Generator.stream)
+        z, g, attn, y_mask, latents = self.infer_latent(
+            x,
+            x_lengths,
+            sid,
+            tone,
+            language,
+            bert,
+            ja_bert,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            noise_scale_w=noise_scale_w,
+            sdp_ratio=sdp_ratio,
+            y=y,
+            g=g,
+            generator=generator,
+        )
+        yield from self.dec.stream(
+            (z * y_mask)[:, :, :max_len], g=g, chunk_size=chunk_size, context=context
+        )
 
-    def voice_conversion(self, y, y_lengths, sid_src, sid_tgt, tau=1.0):
+    def voice_conversion(self, y, y_lengths, sid_src, sid_tgt, tau=1.0, generator=None):
         g_src = sid_src
         g_tgt = sid_tgt
-        z, m_q, logs_q, y_mask = self.enc_q(y, y_lengths, g=g_src, tau=tau)
+        z, m_q, logs_q, y_mask = self.enc_q(y, y_lengths, g=g_src, tau=tau, generator=generator)
         z_p = self.flow(z, y_mask, g=g_src)
         z_hat = self.flow(z_p, y_mask, g=g_tgt, reverse=True)
         o_hat = self.dec(z_hat * y_mask, g=g_tgt)
         return o_hat, y_mask, (z, z_p, z_hat)
+
+    def remove_weight_norm(self):
+        """Folds every weight norm of the model, not only the decoder's, into a plain weight."""
+        for module in self.modules():
+            for hook in list(module._forward_pre_hooks.values()):
+                if isinstance(hook, WeightNorm):
+                    remove_weight_norm(module, hook.name)
@@ -0,0 +1,193 @@
+import os
+import hashlib
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+# the graphs export_onnx writes, in the order inference runs them
+GRAPHS = ('enc_p', 'dp', 'flow_dec')
+
+
+class _TextEncoder(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x, x_lengths, sid, tone, language, bert, ja_bert):
+        m = self.model
+        g = m.emb_g(sid).unsqueeze(-1)
+        x, m_p, logs_p, x_mask = m.enc_p(x, x_lengths, tone, language, bert, ja_bert, g=None if m.use_vc else g)
+        return x, m_p, logs_p, x_mask, g
+
+
+class _DurationPredictor(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x, x_mask, g, noise, sdp_ratio):
+        # noise comes already scaled by noise_scale_w
+        m = self.model
+        return m.sdp(x, x_mask, g=g, reverse=True, noise=noise) * sdp_ratio + m.dp(x, x_mask, g=g) * (1 - sdp_ratio)
+
+
+class _FlowDecoder(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, z_p, y_mask, g):
+        m = self.model
+        z = m.flow(z_p, y_mask, g=g, reverse=True)
+        return m.dec(z * y_mask, g=g)
+
+
+def export_onnx(model, output_dir, opset_version=17):
+    """Writes a SynthesizerTrn as the ONNX graphs of GRAPHS to `output_dir`.
+
+    enc_p takes the phones, tones, languages, BERT features and speaker ids
+    and returns the encoder output and the speaker embedding g. dp returns
+    the log durations, mixing both duration predictors by sdp_ratio. flow_dec
+    turns the length regulated prior into audio. Batch and length axes are
+    dynamic. The noise of both random steps is a graph input, so the runtime
+    can seed it.
+    """
+    assert model.n_speakers > 0, 'models conditioned on a reference encoder are not supported'
+    os.makedirs(output_dir, exist_ok=True)
+    model.eval()
+    device = next(model.parameters()).device
+    # example lengths for tracing, every length axis is dynamic in the graphs
+    t_x, t_y = 32, 96
+    x = torch.randint(1, model.n_vocab, (1, t_x), device=device)
+    x_lengths = torch.LongTensor([t_x]).to(device)
+    sid = torch.LongTensor([0]).to(device)
+    tone = torch.zeros_like(x)
+    language = torch.zeros_like(x)
+    bert = torch.randn(1, model.enc_p.bert_proj.in_channels, t_x, device=device)
+    ja_bert = torch.randn(1, model.enc_p.ja_bert_proj.in_channels, t_x, device=device)
+    phones = {0: 'batch', 1: 'phones'}
+    features = {0: 'batch', 2: 'phones'}
+    frames = {0: 'batch', 2: 'frames'}
+
+    with torch.no_grad():
+        encoder = _TextEncoder(model)
+        args = (x, x_lengths, sid, tone, language, bert, ja_bert)
+        torch.onnx.export(
+            encoder, args, os.path.join(output_dir, 'enc_p.onnx'), opset_version=opset_version,
+            input_names=['x', 'x_lengths', 'sid', 'tone', 'language', 'bert', 'ja_bert'],
+            output_names=['h', 'm_p', 'logs_p', 'x_mask', 'g'],
+            dynamic_axes={
+                'x': phones, 'x_lengths': {0: 'batch'}, 'sid': {0: 'batch'}, 'tone': phones,
+                'language': phones, 'bert': features, 'ja_bert': features, 'h': features,
+                'm_p': features, 'logs_p': features, 'x_mask': features, 'g': {0: 'batch'},
+            },
+        )
+        h, m_p, _, x_mask, g = encoder(*args)
+
+        noise = torch.randn(1, 2, t_x, device=device)
+        sdp_ratio = torch.tensor(0.2, device=device)
+        torch.onnx.export(
+            _DurationPredictor(model), (h, x_mask, g, noise, sdp_ratio), os.path.join(output_dir, 'dp.onnx'),
+            opset_version=opset_version,
+            input_names=['h', 'x_mask', 'g', 'noise', 'sdp_ratio'],
+            output_names=['logw'],
+            dynamic_axes={'h': features, 'x_mask': features, 'g': {0: 'batch'}, 'noise': features, 'logw': features},
+        )
+
+        z_p = torch.randn(1, m_p.size(1), t_y, device=device)
+        y_mask = torch.ones(1, 1, t_y, device=device)
+        torch.onnx.export(
+            _FlowDecoder(model), (z_p, y_mask, g), os.path.join(output_dir, 'flow_dec.onnx'),
+            opset_version=opset_version,
+            input_names=['z_p', 'y_mask', 'g'],
+            output_names=['o'],
+            dynamic_axes={'z_p': frames, 'y_mask': frames, 'g': {0: 'batch'}, 'o': {0: 'batch', 2: 'samples'}},
+        )
+
+
+def generate_path(duration, mask):
+    """commons.generate_path in NumPy, duration [b, 1, t_x] and mask [b, 1, t_y, t_x]."""
+    cum_duration = np.cumsum(duration, -1)
+    t_y = mask.shape[2]
+    # [b, 1, t_y, t_x]: frame y lies before the end of phone x
+    path = (np.arange(t_y)[:, None] < cum_duration[:, :, None, :]).astype(mask.dtype)
+    path[..., 1:] -= path[..., :-1].copy()
+    return path * mask
+
+
+class OnnxSynthesizerTrn(nn.Module):
+    """SynthesizerTrn.infer run by ONNX Runtime on the graphs of export_onnx.
+
+    It takes and returns torch tensors like SynthesizerTrn, so TTS.load_onnx
+    swaps it in for the torch model. Length regulation runs in NumPy between
+    the graphs. The noise is drawn with torch in the same order as
+    SynthesizerTrn.infer, so a seeded synthesis matches the eager one on cpu
+    up to float rounding. `num_threads` sets the intra-op threads of every
+    session.
+    """
+
+    def __init__(self, onnx_dir, sess_options=None, providers=None, num_threads=None):
+        super().__init__()
+        import onnxruntime
+
+        if num_threads is not None:
+            sess_options = sess_options or onnxruntime.SessionOptions()
+            sess_options.intra_op_num_threads = num_threads
+        h = hashlib.sha256()
+        self.sessions = {}
+        # the weights live in the sessions, model pools count them from here
+        self.graph_nbytes = 0
+        for name in GRAPHS:
+            with open(os.path.join(onnx_dir, f'{name}.onnx'), 'rb') as f:
+                graph = f.read()
+            h.update(graph)
+            self.graph_nbytes += len(graph)
+            self.sessions[name] = onnxruntime.InferenceSession(
+                graph, sess_options=sess_options, providers=providers or ['CPUExecutionProvider'])
+        # what audio_cache.checkpoint_hash returns, there are no torch weights to hash
+        self._checkpoint_hash = h.hexdigest()[:16]
+
+    def _run(self, name, **inputs):
+        session = self.sessions[name]
+        # the exporter drops inputs a graph does not use
+        feeds = {i.name: inputs[i.name] for i in session.get_inputs()}
+        feeds = {k: v.detach().cpu().numpy() if isinstance(v, torch.Tensor) else v for k, v in feeds.items()}
+        return session.run(None, feeds)
+
+    def infer(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        sdp_ratio=0,
+        generator=None,
+    ):
+        h, m_p, logs_p, x_mask, g = self._run(
+            'enc_p', x=x, x_lengths=x_lengths, sid=sid, tone=tone, language=language, bert=bert, ja_bert=ja_bert)
+        noise_w = torch.randn(h.shape[0], 2, h.shape[2], generator=generator) * noise_scale_w
+        logw, = self._run('dp', h=h, x_mask=x_mask, g=g, noise=noise_w, sdp_ratio=np.array(sdp_ratio, dtype=np.float32))
+
+        w_ceil = np.ceil(np.exp(logw) * x_mask * length_scale)
+        y_lengths = np.maximum(w_ceil.sum((1, 2)), 1).astype(np.int64)
+        y_mask = (np.arange(y_lengths.max()) < y_lengths[:, None])[:, None].astype(x_mask.dtype)
+        attn = generate_path(w_ceil, x_mask[:, :, None] * y_mask[..., None])
+        m_p = np.matmul(attn[:, 0], m_p.transpose(0, 2, 1)).transpose(0, 2, 1)
+        logs_p = np.matmul(attn[:, 0], logs_p.transpose(0, 2, 1)).transpose(0, 2, 1)
+
+        noise = torch.randn(m_p.shape, generator=generator).numpy()
+        z_p = m_p + noise * np.exp(logs_p) * noise_scale
+        o, = self._run('flow_dec', z_p=z_p, y_mask=y_mask, g=g)
+        # the latents of SynthesizerTrn.infer stay inside the graphs
+        return torch.from_numpy(o), torch.from_numpy(attn), torch.from_numpy(y_mask), None
+
+    def infer_stream(self, *args, chunk_size=32, context=None, **kwargs):
+        # flow and decoder are one graph, a sentence's audio comes in one piece
+        yield self.infer(*args, **kwargs)[0]
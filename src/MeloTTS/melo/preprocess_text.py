@@ -1,14 +1,80 @@
 import json
+import time
 from collections import defaultdict
 from random import shuffle
 from typing import Optional
 
 from tqdm import tqdm
 import click
-from text.cleaner import clean_text_bert
+from text.cleaner import clean_text_bert, clean_texts_bert
 import os
 import torch
 from text.symbols import symbols, num_languages, num_tones
+from feature_store import FeatureStoreWriter
+
+
+def check_symbols(phones, language, new_symbols):
+    for ph in phones:
+        if ph not in symbols and ph not in new_symbols:
+            new_symbols.append(ph)
+            print('update!, now symbols:')
+            print(new_symbols)
+            with open(f'{language}_symbol.txt', 'w') as f:
+                f.write(f'{new_symbols}')
+
+
+def cleaned_line(utt, spk, language, norm_text, phones, tones, word2ph):
+    assert len(phones) == len(tones)
+    assert len(phones) == sum(word2ph)
+    return "{}|{}|{}|{}|{}|{}|{}\n".format(
+        utt,
+        spk,
+        language,
+        norm_text,
+        " ".join(phones),
+        " ".join([str(i) for i in tones]),
+        " ".join([str(i) for i in word2ph]),
+    )
+
+
+def clean_batched(lines, store_path, device, batch_size, num_workers):
+    """Cleans all lines at once, with BERT features written to a feature store.
+
+    g2p runs in a process pool and BERT on length-bucketed batches. Returns
+    the cleaned lines in input order.
+    """
+    rows = []
+    for line in lines:
+        row = line.strip().split("|")
+        if len(row) != 4:
+            print("err!", line, "expected utt|spk|language|text")
+            continue
+        rows.append(row)
+    new_symbols = []
+    cleaned = {}
+    start = time.perf_counter()
+    results = clean_texts_bert(
+        [text for _, _, _, text in rows],
+        [language for _, _, language, _ in rows],
+        device=device,
+        batch_size=batch_size,
+        num_workers=num_workers,
+    )
+    with FeatureStoreWriter(store_path) as store:
+        for i, result in tqdm(results, total=len(rows)):
+            utt, spk, language, text = rows[i]
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                norm_text, phones, tones, word2ph, bert = result
+                check_symbols(phones, language, new_symbols)
+                cleaned[i] = cleaned_line(utt, spk, language, norm_text, phones, tones, word2ph)
+                store.put(utt, bert)
+            except Exception as error:
+                print("err!", "|".join(rows[i]), error)
+    elapsed = time.perf_counter() - start
+    print(f"cleaned {len(cleaned)}/{len(rows)} utterances in {elapsed:.1f}s, {len(cleaned) / max(elapsed, 1e-9):.1f} utts/s")
+    return [cleaned[i] for i in sorted(cleaned)]
 
 @click.command()
 @click.option(
@@ -27,6 +93,14 @@ from text.symbols import symbols, num_languages, num_tones
 @click.option("--val-per-spk", default=4)
 @click.option("--max-val-total", default=8)
 @click.option("--clean/--no-clean", default=True)
+@click.option(
+    "--feature-store",
+    default=None,
+    help="Directory for a sharded store of the BERT features instead of one .bert.pt per utterance",
+)
+@click.option("--batch-size", default=32, help="Utterances per BERT batch with --feature-store")
+@click.option("--num-workers", default=None, type=int, help="g2p processes with --feature-store, all cores by default")
+@click.option("--device", default="cuda:0")
 def main(
     metadata: str,
     cleaned_path: Optional[str],
@@ -36,6 +110,10 @@ def main(
     val_per_spk: int,
     max_val_total: int,
     clean: bool,
+    feature_store: Optional[str],
+    batch_size: int,
+    num_workers: Optional[int],
+    device: str,
 ):
     if train_path is None:
         train_path = os.path.join(os.path.dirname(metadata), 'train.list')
@@ -46,34 +124,20 @@ def main(
     if cleaned_path is None:
         cleaned_path = metadata + ".cleaned"
 
-    if clean:
+    if clean and feature_store is not None:
+        lines = open(metadata, encoding="utf-8").readlines()
+        with open(cleaned_path, "w", encoding="utf-8") as out_file:
+            out_file.writelines(clean_batched(lines, feature_store, device, batch_size, num_workers))
+        metadata = cleaned_path
+    elif clean:
         out_file = open(cleaned_path, "w", encoding="utf-8")
         new_symbols = []
         for line in tqdm(open(metadata, encoding="utf-8").readlines()):
             try:
                 utt, spk, language, text = line.strip().split("|")
-                norm_text, phones, tones, word2ph, bert = clean_text_bert(text, language, device='cuda:0')
-                for ph in phones:
-                    if ph not in symbols and ph not in new_symbols:
-                        new_symbols.append(ph)
-                        print('update!, now symbols:')
-                        print(new_symbols)
-                        with open(f'{language}_symbol.txt', 'w') as f:
-                            f.write(f'{new_symbols}')
-
-                assert len(phones) == len(tones)
-                assert len(phones) == sum(word2ph)
-                out_file.write(
-                    "{}|{}|{}|{}|{}|{}|{}\n".format(
-                        utt,
-                        spk,
-                        language,
-                        norm_text,
-                        " ".join(phones),
-                        " ".join([str(i) for i in tones]),
-                        " ".join([str(i) for i in word2ph]),
-                    )
-                )
+                norm_text, phones, tones, word2ph, bert = clean_text_bert(text, language, device=device)
+                check_symbols(phones, language, new_symbols)
+                out_file.write(cleaned_line(utt, spk, language, norm_text, phones, tones, word2ph))
                 bert_path = utt.replace(".wav", ".bert.pt")
                 os.makedirs(os.path.dirname(bert_path), exist_ok=True)
                 torch.save(bert.cpu(), bert_path)
@@ -123,6 +187,9 @@ def main(
     config["data"]["training_files"] = train_path
     config["data"]["validation_files"] = val_path
     config["data"]["n_speakers"] = len(spk_id_map)
+    if feature_store is not None:
+        # read by TextAudioSpeakerLoader in place of the .bert.pt files
+        config["data"]["feature_store"] = feature_store
     config["num_languages"] = num_languages
     config["num_tones"] = num_tones
     config["symbols"] = symbols
@@ -2,10 +2,28 @@ import re
 import os
 import glob
 import numpy as np
-import soundfile as sf
-import torchaudio
 import re
 
+from .text.normalizer import Normalizer, append_after, collapse_whitespace
+
+# , . ? ! are followed by one space and whitespace runs become one space
+_chunk_normalizer = Normalizer(append_after(',.?!', ' '), collapse_whitespace)
+_empty_chunk_re = re.compile(r'^[\s\.,;:!?]*$')
+
+latin_normalizer = Normalizer(
+    {'。！？；': '.', '，': ',', '‘’': "'", '<>()[]"“”«»': None},
+    append_after(',.?!', ' '),
+    collapse_whitespace,
+)
+zh_normalizer = Normalizer(
+    {'。！？；': '.', '，': ','},
+    # 将文本中的换行符、空格和制表符替换为空格
+    [(r'[\n\t ]+', ' ')],
+    # 在标点符号后添加一个空格
+    append_after(',.!?;', ' $#!'),
+)
+
+
 def split_sentence(text, min_len=10, language_str='EN'):
     if language_str in ['EN', 'FR', 'ES', 'SP']:
         sentences = split_sentences_latin(text, min_len=min_len)
@@ -15,21 +33,12 @@ def split_sentence(text, min_len=10, language_str='EN'):
 
 
 def split_sentences_latin(text, min_len=10):
-    text = re.sub('[。！？；]', '.', text)
-    text = re.sub('[，]', ',', text)
-    text = re.sub('[“”]', '"', text)
-    text = re.sub('[‘’]', "'", text)
-    text = re.sub(r"[\<\>\(\)\[\]\"\«\»]+", "", text)
-    return [item.strip() for item in txtsplit(text, 256, 512) if item.strip()]
+    text = latin_normalizer(text)
+    return [item.strip() for item in _split_chunks(text, 256, 512) if item.strip()]
 
 
 def split_sentences_zh(text, min_len=10):
-    text = re.sub('[。！？；]', '.', text)
-    text = re.sub('[，]', ',', text)
-    # 将文本中的换行符、空格和制表符替换为空格
-    text = re.sub('[\n\t ]+', ' ', text)
-    # 在标点符号后添加一个空格
-    text = re.sub('([,.!?;])', r'\1 $#!', text)
+    text = zh_normalizer(text)
     # 分隔句子并去除前后空格
     # sentences = [s.strip() for s in re.split('(。|！|？|；)', text)]
     sentences = [s.strip() for s in text.split('$#!')]
@@ -104,12 +113,10 @@ def merge_short_sentences_zh(sens):
 
 def txtsplit(text, desired_length=100, max_length=200):
     """Split text it into chunks of a desired length trying to keep sentences intact."""
-    text = re.sub(r'\n\n+', '\n', text)
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[""]', '"', text)
-    text = re.sub(r'([,.?!])', r'\1 ', text)
-    text = re.sub(r'\s+', ' ', text)
-    
+    return _split_chunks(_chunk_normalizer(text), desired_length, max_length)
+
+
+def _split_chunks(text, desired_length, max_length):
     rv = []
     in_quote = False
     current = ""
@@ -158,7 +165,7 @@ def txtsplit(text, desired_length=100, max_length=200):
             split_pos.append(pos)
     rv.append(current)
     rv = [s.strip() for s in rv]
-    rv = [s for s in rv if len(s) > 0 and not re.match(r'^[\s\.,;:!?]*$', s)]
+    rv = [s for s in rv if len(s) > 0 and not _empty_chunk_re.match(s)]
     return rv
 
 
@@ -0,0 +1,33 @@
+import torch
+
+
+def batched_hidden_states(model, tokenizer, texts, device):
+    """Third-to-last hidden layer of every text, from one padded forward pass.
+
+    Padding is masked out by the attention mask, so each item gets the same
+    features it would get on its own. Returns one [tokens, hidden] tensor per
+    text, on the cpu.
+    """
+    with torch.no_grad():
+        inputs = tokenizer(texts, return_tensors="pt", padding=True)
+        for i in inputs:
+            inputs[i] = inputs[i].to(device)
+        res = model(**inputs, output_hidden_states=True)
+        res = torch.cat(res["hidden_states"][-3:-2], -1).cpu()
+    lengths = inputs["attention_mask"].sum(-1).tolist()
+    return [res[i, :n] for i, n in enumerate(lengths)]
+
+
+def phone_level_features(res, word2ph, out=None):
+    """Repeats each token's features word2ph[i] times, as [hidden, phones].
+
+    One gather replaces a repeat and a cat per token. `out`, if given, is a
+    [phones, hidden] tensor the features are written into, e.g. a slice of a
+    preallocated batch; the result is then a transposed view of it.
+    """
+    repeats = torch.as_tensor(word2ph, dtype=torch.long, device=res.device)
+    index = torch.repeat_interleave(torch.arange(len(repeats), device=res.device), repeats)
+    if out is None:
+        return res.index_select(0, index).T
+    torch.index_select(res, 0, index, out=out)
+    return out.T
@@ -1,5 +1,8 @@
 import os
 import re
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 import cn2an
 from pypinyin import lazy_pinyin, Style
@@ -13,6 +16,7 @@ pinyin_to_symbol_map = {
     for line in open(os.path.join(current_file_path, "opencpop-strict.txt")).readlines()
 }
 
+import jieba
 import jieba.posseg as psg
 
 
@@ -65,10 +69,54 @@ def replace_punctuation(text):
     return replaced_text
 
 
+# worker processes that the sentences of long texts are spread over, see set_num_workers
+_pool = None
+_num_workers = 0
+_min_sentences = 8
+
+
+def _init_worker():
+    # load the jieba dictionary once per worker rather than on its first sentence
+    jieba.initialize()
+
+
+def set_num_workers(num_workers, min_sentences=8):
+    """Runs g2p of texts with at least `min_sentences` sentences in `num_workers` processes.
+
+    0 turns the pool off. Workers are spawned rather than forked, so the pool
+    is safe to use from a process that holds CUDA or threads.
+    """
+    global _pool, _num_workers, _min_sentences
+    old_pool = _pool
+    _pool = None
+    if num_workers > 0:
+        _pool = ProcessPoolExecutor(
+            num_workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+        )
+    _num_workers = num_workers
+    _min_sentences = min_sentences
+    if old_pool is not None:
+        old_pool.shutdown(wait=False)
+
+
+def map_sentences(func, sentences):
+    """func(sentences) for a g2p function, split over the worker pool when there is one."""
+    pool = _pool
+    if pool is None or len(sentences) < _min_sentences:
+        return func(sentences)
+    size = -(-len(sentences) // _num_workers)
+    phones, tones, word2ph = [], [], []
+    for p, t, w in pool.map(func, [sentences[i:i + size] for i in range(0, len(sentences), size)]):
+        phones += p
+        tones += t
+        word2ph += w
+    return phones, tones, word2ph
+
+
 def g2p(text):
     pattern = r"(?<=[{0}])\s*".format("".join(punctuation))
     sentences = [i for i in re.split(pattern, text) if i.strip() != ""]
-    phones, tones, word2ph = _g2p(sentences)
+    phones, tones, word2ph = map_sentences(_g2p, sentences)
     assert sum(word2ph) == len(phones)
     assert len(word2ph) == len(text)  # Sometimes it will crash,you can add a try-catch.
     phones = ["_"] + phones + ["_"]
@@ -90,6 +138,19 @@ def _get_initials_finals(word):
     return initials, finals
 
 
+@functools.lru_cache(maxsize=65536)
+def _word_pinyin(word, pos):
+    """Initials and tone-sandhi finals of a segmented word, which depend on nothing else."""
+    initials, finals = _get_initials_finals(word)
+    return tuple(initials), tuple(tone_modifier.modified_tone(word, pos, finals))
+
+
+@functools.lru_cache(maxsize=4096)
+def _segment(seg):
+    """jieba words and POS tags of a sentence, merged for tone sandhi."""
+    return tuple(tuple(pair) for pair in tone_modifier.pre_merge_for_modify(psg.lcut(seg)))
+
+
 def _g2p(segments):
     phones_list = []
     tones_list = []
@@ -97,22 +158,17 @@ def _g2p(segments):
     for seg in segments:
         # Replace all English words in the sentence
         seg = re.sub("[a-zA-Z]+", "", seg)
-        seg_cut = psg.lcut(seg)
         initials = []
         finals = []
-        seg_cut = tone_modifier.pre_merge_for_modify(seg_cut)
-        for word, pos in seg_cut:
+        for word, pos in _segment(seg):
             if pos == "eng":
                 import pdb; pdb.set_trace()
                 continue
-            sub_initials, sub_finals = _get_initials_finals(word)
-            sub_finals = tone_modifier.modified_tone(word, pos, sub_finals)
-            initials.append(sub_initials)
-            finals.append(sub_finals)
+            sub_initials, sub_finals = _word_pinyin(word, pos)
+            initials += sub_initials
+            finals += sub_finals
 
             # assert len(sub_initials) == len(sub_finals) == len(word)
-        initials = sum(initials, [])
-        finals = sum(finals, [])
         #
         for c, v in zip(initials, finals):
             raw_pinyin = c + v
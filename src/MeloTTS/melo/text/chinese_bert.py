@@ -1,7 +1,10 @@
 import torch
 import sys
+import threading
 from transformers import AutoTokenizer, AutoModelForMaskedLM
 
+from .bert_utils import batched_hidden_states, phone_level_features
+
 
 # model_id = 'hfl/chinese-roberta-wwm-ext-large'
 local_path = "./bert/chinese-roberta-wwm-ext-large"
@@ -9,16 +12,14 @@ local_path = "./bert/chinese-roberta-wwm-ext-large"
 
 tokenizers = {}
 models = {}
+_model_lock = threading.Lock()
 
 def get_bert_feature(text, word2ph, device=None, model_id='hfl/chinese-roberta-wwm-ext-large'):
-    if model_id not in models:
-        models[model_id] = AutoModelForMaskedLM.from_pretrained(
-            model_id
-        ).to(device)
-        tokenizers[model_id] = AutoTokenizer.from_pretrained(model_id)
-    model = models[model_id]
-    tokenizer = tokenizers[model_id]
+    return get_bert_features([text], [word2ph], device=device, model_id=model_id)[0]
 
+
+def get_bert_features(texts, word2phs, device=None, model_id='hfl/chinese-roberta-wwm-ext-large'):
+    """get_bert_feature for several texts with a single forward pass."""
     if (
         sys.platform == "darwin"
         and torch.backends.mps.is_available()
@@ -28,22 +29,21 @@ def get_bert_feature(text, word2ph, device=None, model_id='hfl/chinese-roberta-w
     if not device:
         device = "cuda"
 
-    with torch.no_grad():
-        inputs = tokenizer(text, return_tensors="pt")
-        for i in inputs:
-            inputs[i] = inputs[i].to(device)
-        res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
-    # import pdb; pdb.set_trace()
-    # assert len(word2ph) == len(text) + 2
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
+    # the device is settled before loading so that the model and its inputs agree
+    with _model_lock:
+        if model_id not in models:
+            models[model_id] = AutoModelForMaskedLM.from_pretrained(
+                model_id
+            ).to(device)
+            tokenizers[model_id] = AutoTokenizer.from_pretrained(model_id)
+    model = models[model_id]
+    tokenizer = tokenizers[model_id]
 
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
-    return phone_level_feature.T
+    features = []
+    for res, word2ph in zip(batched_hidden_states(model, tokenizer, texts, device), word2phs):
+        # assert len(word2ph) == len(text) + 2
+        features.append(phone_level_features(res, word2ph))
+    return features
 
 
 if __name__ == "__main__":
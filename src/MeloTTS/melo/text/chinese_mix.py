@@ -8,7 +8,7 @@ from pypinyin import lazy_pinyin, Style
 from .symbols import language_tone_start_map
 from .tone_sandhi import ToneSandhi
 from .english import g2p as g2p_en
-from transformers import AutoTokenizer
+from .loader import from_pretrained_tokenizer
 
 punctuation = ["!", "?", "…", ",", ".", "'", "-"]
 current_file_path = os.path.dirname(__file__)
@@ -75,7 +75,7 @@ def g2p(text, impl='v2'):
         _func = _g2p_v2
     else:
         raise NotImplementedError()
-    phones, tones, word2ph = _func(sentences)
+    phones, tones, word2ph = map_sentences(_func, sentences)
     assert sum(word2ph) == len(phones)
     # assert len(word2ph) == len(text)  # Sometimes it will crash,you can add a try-catch.
     phones = ["_"] + phones + ["_"]
@@ -97,7 +97,7 @@ def _get_initials_finals(word):
     return initials, finals
 
 model_id = 'bert-base-multilingual-uncased'
-tokenizer = AutoTokenizer.from_pretrained(model_id)
+tokenizer = from_pretrained_tokenizer(model_id)
 def _g2p(segments):
     phones_list = []
     tones_list = []
@@ -105,27 +105,22 @@ def _g2p(segments):
     for seg in segments:
         # Replace all English words in the sentence
         # seg = re.sub("[a-zA-Z]+", "", seg)
-        seg_cut = psg.lcut(seg)
         initials = []
         finals = []
-        seg_cut = tone_modifier.pre_merge_for_modify(seg_cut)
-        for word, pos in seg_cut:
+        for word, pos in _segment(seg):
             if pos == "eng":
-                initials.append(['EN_WORD'])
-                finals.append([word])
+                initials += ['EN_WORD']
+                finals += [word]
             else:
-                sub_initials, sub_finals = _get_initials_finals(word)
-                sub_finals = tone_modifier.modified_tone(word, pos, sub_finals)
-                initials.append(sub_initials)
-                finals.append(sub_finals)
+                sub_initials, sub_finals = _word_pinyin(word, pos)
+                initials += sub_initials
+                finals += sub_finals
 
             # assert len(sub_initials) == len(sub_finals) == len(word)
-        initials = sum(initials, [])
-        finals = sum(finals, [])
         #
         for c, v in zip(initials, finals):
             if c == 'EN_WORD':
-                tokenized_en = tokenizer.tokenize(v)
+                tokenized_en = tokenizer().tokenize(v)
                 phones_en, tones_en, word2ph_en = g2p_en(text=None, pad_start_end=False, tokenized=tokenized_en)
                 # apply offset to tones_en
                 tones_en = [t + language_tone_start_map['EN'] for t in tones_en]
@@ -198,7 +193,12 @@ def get_bert_feature(text, word2ph, device):
     from . import chinese_bert
     return chinese_bert.get_bert_feature(text, word2ph, model_id='bert-base-multilingual-uncased', device=device)
 
-from .chinese import _g2p as _chinese_g2p
+
+def get_bert_features(texts, word2phs, device):
+    from . import chinese_bert
+    return chinese_bert.get_bert_features(texts, word2phs, model_id='bert-base-multilingual-uncased', device=device)
+
+from .chinese import _g2p as _chinese_g2p, _segment, _word_pinyin, map_sentences
 def _g2p_v2(segments):
     spliter = '#$&^!@'
 
@@ -217,7 +217,7 @@ def _g2p_v2(segments):
         for text in texts:
             if re.match('[a-zA-Z\s]+', text):
                 # english
-                tokenized_en = tokenizer.tokenize(text)
+                tokenized_en = tokenizer().tokenize(text)
                 phones_en, tones_en, word2ph_en = g2p_en(text=None, pad_start_end=False, tokenized=tokenized_en)
                 # apply offset to tones_en
                 tones_en = [t + language_tone_start_map['EN'] for t in tones_en]
@@ -1,20 +1,61 @@
-from . import chinese, japanese, english, chinese_mix, korean, french, spanish
-from . import cleaned_text_to_sequence
+from . import cleaned_text_to_sequence, get_bert_module, get_berts
+from .loader import LazyLoader
 import copy
+import importlib
+from concurrent.futures import ProcessPoolExecutor
 
-language_module_map = {"ZH": chinese, "JP": japanese, "EN": english, 'ZH_MIX_EN': chinese_mix, 'KR': korean,
-                    'FR': french, 'SP': spanish, 'ES': spanish}
+# language -> frontend module, imported on first use so that a process only
+# pays for the languages it serves
+language_module_names = {"ZH": "chinese", "JP": "japanese", "EN": "english", 'ZH_MIX_EN': "chinese_mix", 'KR': "korean",
+                    'FR': "french", 'SP': "spanish", 'ES': "spanish"}
+
+# a short sentence per language that warmup() runs through the frontend
+_warmup_texts = {"ZH": "你好，世界。", "JP": "こんにちは、世界。", "EN": "Hello world.", 'ZH_MIX_EN': "你好, hello world.",
+                 'KR': "안녕하세요.", 'FR': "Bonjour le monde.", 'SP': "Hola mundo.", 'ES': "Hola mundo."}
+
+
+def get_language_module(language):
+    return importlib.import_module(f".{language_module_names[language]}", __package__)
+
+
+def warmup(languages, device=None):
+    """Loads the frontends of `languages` now rather than on their first request.
+
+    Builds their g2p models, dictionaries and tokenizers and runs a short
+    sentence through each, which also loads what the frontend libraries load
+    lazily themselves (e.g. the jieba dictionary). With a `device` the BERT
+    models are loaded onto it as well.
+    """
+    for language in languages:
+        modules = [get_language_module(language), get_bert_module(language)]
+        if language == 'ZH_MIX_EN':
+            # english words go through the english frontend
+            modules.append(get_language_module('EN'))
+        for module in modules:
+            for value in list(vars(module).values()):
+                if isinstance(value, LazyLoader):
+                    value()
+        norm_text, phones, tones, word2ph = clean_text(_warmup_texts[language], language)
+        if device is not None:
+            get_berts([norm_text], [word2ph], language, device)
+
+
+def normalize_text(text, language):
+    return get_language_module(language).text_normalize(text)
+
+
+def g2p(norm_text, language):
+    return get_language_module(language).g2p(norm_text)
 
 
 def clean_text(text, language):
-    language_module = language_module_map[language]
-    norm_text = language_module.text_normalize(text)
-    phones, tones, word2ph = language_module.g2p(norm_text)
+    norm_text = normalize_text(text, language)
+    phones, tones, word2ph = g2p(norm_text, language)
     return norm_text, phones, tones, word2ph
 
 
 def clean_text_bert(text, language, device=None):
-    language_module = language_module_map[language]
+    language_module = get_language_module(language)
     norm_text = language_module.text_normalize(text)
     phones, tones, word2ph = language_module.g2p(norm_text)
     
@@ -27,6 +68,71 @@ def clean_text_bert(text, language, device=None):
     return norm_text, phones, tones, word2ph_bak, bert
 
 
+def _clean_item(item):
+    text, language = item
+    try:
+        return clean_text(text, language)
+    except Exception as error:
+        return error
+
+
+def _init_worker(languages):
+    for language in languages:
+        try:
+            warmup([language])
+        except Exception:
+            # the texts of this language report the error themselves
+            pass
+
+
+def clean_texts(texts, languages, num_workers=None, chunksize=64):
+    """clean_text over many texts, phonemized in a pool of `num_workers` processes.
+
+    Returns one (norm_text, phones, tones, word2ph) per text, in order, or the
+    exception its g2p raised. Each worker warms up the frontends it needs once.
+    """
+    items = list(zip(texts, languages))
+    if num_workers == 0:
+        return [_clean_item(item) for item in items]
+    with ProcessPoolExecutor(num_workers, initializer=_init_worker, initargs=(sorted(set(languages)),)) as pool:
+        return list(pool.map(_clean_item, items, chunksize=chunksize))
+
+
+def clean_texts_bert(texts, languages, device=None, batch_size=32, num_workers=None):
+    """clean_text_bert over many texts, with BERT run on batches of similar length.
+
+    Yields (i, (norm_text, phones, tones, word2ph, bert)) for texts[i], or
+    (i, exception) when it failed, in batch order rather than input order, so
+    that only one batch of features is held at a time.
+    """
+    cleaned = clean_texts(texts, languages, num_workers=num_workers)
+    buckets = {}
+    for i, result in enumerate(cleaned):
+        if isinstance(result, Exception):
+            yield i, result
+        else:
+            buckets.setdefault(languages[i], []).append(i)
+    for language, indices in buckets.items():
+        # texts of similar length share a batch, so little of it is padding
+        indices.sort(key=lambda i: len(cleaned[i][0]))
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            word2phs = []
+            for i in batch:
+                # the features are for the phones with blanks interspersed
+                word2ph = [n * 2 for n in cleaned[i][3]]
+                word2ph[0] += 1
+                word2phs.append(word2ph)
+            try:
+                berts = get_berts([cleaned[i][0] for i in batch], word2phs, language, device)
+            except Exception as error:
+                for i in batch:
+                    yield i, error
+                continue
+            for i, bert in zip(batch, berts):
+                yield i, (*cleaned[i], bert)
+
+
 def text_to_sequence(text, language):
     norm_text, phones, tones, word2ph = clean_text(text, language)
     return cleaned_text_to_sequence(phones, tones, language)
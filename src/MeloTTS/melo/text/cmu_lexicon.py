@@ -0,0 +1,253 @@
+import os
+import mmap
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+
+# magic (the last byte is the byte order of the arrays), size and mtime of the
+# source, number of words, number of phones, bytes of the symbol table
+_HEADER = struct.Struct('<4sQqIII')
+_MAGIC = b'CMU' + (b'L' if sys.byteorder == 'little' else b'B')
+_START_LINE = 49
+
+
+def _read_entries(path):
+    """word -> ARPAbet symbols of cmudict.rep, later entries win like in read_dict."""
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        for line_index, line in enumerate(f, 1):
+            if line_index < _START_LINE:
+                continue
+            word, pron = line.strip().split('  ', 1)
+            entries[word] = [phone for syllable in pron.split(' - ') for phone in syllable.split(' ')]
+    return entries
+
+
+def _align(f):
+    f.write(b'\0' * (-f.tell() % 4))
+
+
+def build_lexicon(source, path):
+    """Writes the lexicon of `source` (a cmudict.rep) to `path`."""
+    stat = os.stat(source)
+    entries = _read_entries(source)
+    keys = sorted(word.encode('utf-8') for word in entries)
+    symbols = sorted({phone for pron in entries.values() for phone in pron})
+    assert len(symbols) < 256, 'phone ids are stored as bytes'
+    symbol_ids = {s: i for i, s in enumerate(symbols)}
+
+    key_offsets, pron_offsets, phones = array('I', [0]), array('I', [0]), array('B')
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+        phones.extend(symbol_ids[s] for s in entries[key.decode('utf-8')])
+        pron_offsets.append(len(phones))
+    symbol_table = '\n'.join(symbols).encode('utf-8')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, stat.st_size, stat.st_mtime_ns, len(keys), len(phones), len(symbol_table)))
+        f.write(symbol_table)
+        _align(f)
+        f.write(key_offsets.tobytes())
+        f.write(pron_offsets.tobytes())
+        f.write(phones.tobytes())
+        f.write(b''.join(keys))
+    # mkstemp creates the file readable by its owner only, other users share the lexicon
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+class CMULexicon:
+    """The CMU dictionary as one read-only memory-mapped file.
+
+    Words are sorted byte strings found by binary search. A word's phones are
+    a range of one byte array of symbol ids, so a lookup touches a few pages
+    of the file instead of a dict of lists per word. Processes that map the
+    same file share its pages.
+    """
+
+    def __init__(self, path, refine):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, _, n_words, n_phones, symbols_nbytes = _HEADER.unpack_from(self._mm)
+        assert magic == _MAGIC, f'{path} is not a lexicon for this byte order'
+        offset = _HEADER.size
+        symbols = self._mm[offset:offset + symbols_nbytes].decode('utf-8').split('\n')
+        # (phone, tone) of every symbol, e.g. AH0 -> ('ah', 1)
+        self._refined = [refine(s) for s in symbols]
+        offset += symbols_nbytes + (-symbols_nbytes % 4)
+        view = memoryview(self._mm)
+        self._key_offsets = view[offset:offset + 4 * (n_words + 1)].cast('I')
+        offset += 4 * (n_words + 1)
+        self._pron_offsets = view[offset:offset + 4 * (n_words + 1)].cast('I')
+        offset += 4 * (n_words + 1)
+        self._phones = view[offset:offset + n_phones]
+        self._keys_start = offset + n_phones
+        self._n_words = n_words
+
+    def _key(self, i):
+        start = self._keys_start
+        return self._mm[start + self._key_offsets[i]:start + self._key_offsets[i + 1]]
+
+    def _find(self, word):
+        key = word.encode('utf-8')
+        lo, hi = 0, self._n_words
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_words and self._key(lo) == key:
+            return lo
+        return None
+
+    def lookup(self, word):
+        """(phones, tones) of an upper-case word, or None when it is not listed."""
+        i = self._find(word)
+        if i is None:
+            return None
+        refined = [self._refined[s] for s in self._phones[self._pron_offsets[i]:self._pron_offsets[i + 1]]]
+        return [phone for phone, _ in refined], [tone for _, tone in refined]
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def __len__(self):
+        return self._n_words
+
+
+def _is_current(path, source):
+    try:
+        with open(path, 'rb') as f:
+            magic, size, mtime_ns, *_ = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    if magic != _MAGIC:
+        return False
+    if not os.path.exists(source):
+        return True
+    stat = os.stat(source)
+    return (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+def load_lexicon(source, path, refine):
+    """Maps the lexicon at `path`, first rebuilding it if `source` has changed since."""
+    try:
+        if not _is_current(path, source):
+            build_lexicon(source, path)
+        return CMULexicon(path, refine)
+    except PermissionError:
+        # a read-only install, or a lexicon another user built unreadable,
+        # keep the lexicon in the temp dir instead
+        path = os.path.join(tempfile.gettempdir(), os.path.basename(path))
+        if not _is_current(path, source):
+            build_lexicon(source, path)
+        return CMULexicon(path, refine)
+
+
+class LearnedLexicon:
+    """Pronunciations predicted for words missing from the CMU dictionary.
+
+    Up to `capacity` of them are memoized in an LRU. With a `path`, every new
+    pronunciation is also appended to that file as a cmudict.rep style
+    "WORD  PH PH" line, and the file is indexed by the offset of each word's
+    line. The index covers the whole file, so a word that left the LRU is read
+    back from its line rather than predicted again, and a word the file
+    already holds is never appended twice. Lines other processes append are
+    indexed on a miss, so a deployment runs the g2p model once per word.
+    Appends are single writes, so processes may share the file.
+    """
+
+    def __init__(self, capacity=4096, path=None):
+        self.capacity = capacity
+        self.path = path
+        self._memo = OrderedDict()
+        # word -> offset of its line in the file, the first line of a word wins
+        self._offsets = {}
+        # bytes of the file indexed so far
+        self._indexed = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            self._index_new_lines()
+
+    def _remember(self, word, phones):
+        if self.capacity > 0:
+            self._memo[word] = phones
+            self._memo.move_to_end(word)
+            while len(self._memo) > self.capacity:
+                self._memo.popitem(last=False)
+
+    def _index_new_lines(self):
+        try:
+            if os.path.getsize(self.path) <= self._indexed:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self._indexed)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # a line still being appended is indexed on a later miss
+        data = data[:data.rfind(b'\n') + 1]
+        offset = self._indexed
+        for line in data.splitlines(keepends=True):
+            word, _, pron = line.partition(b'  ')
+            if pron:
+                self._offsets.setdefault(word.decode('utf-8'), offset)
+            offset += len(line)
+        self._indexed = offset
+
+    def _read_line(self, offset):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            line = f.readline().decode('utf-8')
+        return line.rstrip('\n').partition('  ')[2].split(' ')
+
+    def get(self, word):
+        with self._lock:
+            phones = self._memo.get(word)
+            if phones is None and self.path is not None:
+                if word not in self._offsets:
+                    self._index_new_lines()
+                offset = self._offsets.get(word)
+                if offset is not None:
+                    phones = self._read_line(offset)
+                    self._remember(word, phones)
+            if phones is None:
+                self.misses += 1
+            else:
+                self._memo.move_to_end(word)
+                self.hits += 1
+            return phones
+
+    def put(self, word, phones):
+        with self._lock:
+            if self.path is not None:
+                self._index_new_lines()
+                if word in self._offsets:
+                    return
+                line = f"{word}  {' '.join(phones)}\n".encode('utf-8')
+                with open(self.path, 'ab') as f:
+                    f.write(line)
+                    f.flush()
+                    # appends land at the end, wherever other processes left it
+                    self._offsets[word] = f.tell() - len(line)
+            self._remember(word, phones)
+
+    def __len__(self):
+        return len(self._offsets) if self.path is not None else len(self._memo)
+
+    def metrics(self):
+        return {
+            'capacity': self.capacity,
+            'entries': len(self),
+            'resident': len(self._memo),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -1,21 +1,33 @@
-import pickle
 import os
 import re
-from g2p_en import G2p
 
 from . import symbols
 
-from .english_utils.abbreviations import expand_abbreviations
-from .english_utils.time_norm import expand_time_english
-from .english_utils.number_norm import normalize_numbers
+from .english_utils.abbreviations import abbreviation_rule_en
+from .english_utils.time_norm import time_rule_en
+from .english_utils.number_norm import number_rules
 from .japanese import distribute_phone
 
-from transformers import AutoTokenizer
+from .loader import LazyLoader, from_pretrained_tokenizer
+from .cmu_lexicon import LearnedLexicon, load_lexicon
+from .normalizer import Normalizer
 
 current_file_path = os.path.dirname(__file__)
 CMU_DICT_PATH = os.path.join(current_file_path, "cmudict.rep")
-CACHE_PATH = os.path.join(current_file_path, "cmudict_cache.pickle")
-_g2p = G2p()
+# compact memory-mapped form of cmudict.rep, rebuilt whenever cmudict.rep changes.
+# It is built at runtime, so it goes to a cache directory rather than into the
+# package, which may be installed read-only
+LEXICON_DIR = os.environ.get("MELO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "melo"))
+LEXICON_PATH = os.path.join(LEXICON_DIR, "cmudict.lex")
+
+
+def _load_g2p():
+    from g2p_en import G2p
+    return G2p()
+
+
+# g2p_en, the CMU dict and the tokenizer are only loaded once english is used
+_g2p = LazyLoader(_load_g2p)
 
 arpa = {
     "AH0",
@@ -139,25 +151,6 @@ def read_dict():
     return g2p_dict
 
 
-def cache_dict(g2p_dict, file_path):
-    with open(file_path, "wb") as pickle_file:
-        pickle.dump(g2p_dict, pickle_file)
-
-
-def get_dict():
-    if os.path.exists(CACHE_PATH):
-        with open(CACHE_PATH, "rb") as pickle_file:
-            g2p_dict = pickle.load(pickle_file)
-    else:
-        g2p_dict = read_dict()
-        cache_dict(g2p_dict, CACHE_PATH)
-
-    return g2p_dict
-
-
-eng_dict = get_dict()
-
-
 def refine_ph(phn):
     tone = 0
     if re.search(r"\d$", phn):
@@ -178,28 +171,62 @@ def refine_syllables(syllables):
     return phonemes, tones
 
 
+def get_dict():
+    return load_lexicon(CMU_DICT_PATH, LEXICON_PATH, refine_ph)
+
+
+cmu_dict = LazyLoader(get_dict)
+
+# pronunciations g2p_en predicted for words the CMU dict does not list
+learned_lexicon = LearnedLexicon()
+
+
+def set_learned_lexicon(path=None, capacity=4096):
+    """Keeps predicted pronunciations in `path`, to be reused by later runs."""
+    global learned_lexicon
+    learned_lexicon = LearnedLexicon(capacity=capacity, path=path)
+
+
+def oov_g2p(word):
+    """ARPAbet phones of a word missing from the CMU dict, predicted once per word."""
+    lexicon = learned_lexicon
+    phones = lexicon.get(word.upper())
+    if phones is None:
+        phones = [p for p in _g2p()(word) if p != " "]
+        lexicon.put(word.upper(), phones)
+    return phones
+
+
+# the passes of the former chain, in its order: times, then the number rules,
+# which cascade into each other, then all abbreviations in one rule
+normalizer = Normalizer(
+    str.lower,
+    [time_rule_en],
+    *([rule] for rule in number_rules),
+    [abbreviation_rule_en],
+)
+
+
 def text_normalize(text):
-    text = text.lower()
-    text = expand_time_english(text)
-    text = normalize_numbers(text)
-    text = expand_abbreviations(text)
-    return text
+    return normalizer(text)
 
 model_id = 'bert-base-uncased'
-tokenizer = AutoTokenizer.from_pretrained(model_id)
+tokenizer = from_pretrained_tokenizer(model_id)
 def g2p_old(text):
-    tokenized = tokenizer.tokenize(text)
+    eng_dict = cmu_dict()
+    tokenized = tokenizer().tokenize(text)
     # import pdb; pdb.set_trace()
     phones = []
     tones = []
     words = re.split(r"([,;.\-\?\!\s+])", text)
     for w in words:
-        if w.upper() in eng_dict:
-            phns, tns = refine_syllables(eng_dict[w.upper()])
+        pron = eng_dict.lookup(w.upper())
+        if pron is not None:
+            phns, tns = pron
             phones += phns
             tones += tns
         else:
-            phone_list = list(filter(lambda p: p != " ", _g2p(w)))
+            phone_list = oov_g2p(w)
             for ph in phone_list:
                 if ph in arpa:
                     ph, tn = refine_ph(ph)
@@ -215,8 +242,9 @@ def g2p_old(text):
     return phones, tones, word2ph
 
 def g2p(text, pad_start_end=True, tokenized=None):
+    eng_dict = cmu_dict()
     if tokenized is None:
-        tokenized = tokenizer.tokenize(text)
+        tokenized = tokenizer().tokenize(text)
     # import pdb; pdb.set_trace()
     phs = []
     ph_groups = []
@@ -233,13 +261,14 @@ def g2p(text, pad_start_end=True, tokenized=None):
         w = "".join(group)
         phone_len = 0
         word_len = len(group)
-        if w.upper() in eng_dict:
-            phns, tns = refine_syllables(eng_dict[w.upper()])
+        pron = eng_dict.lookup(w.upper())
+        if pron is not None:
+            phns, tns = pron
             phones += phns
             tones += tns
             phone_len += len(phns)
         else:
-            phone_list = list(filter(lambda p: p != " ", _g2p(w)))
+            phone_list = oov_g2p(w)
             for ph in phone_list:
                 if ph in arpa:
                     ph, tn = refine_ph(ph)
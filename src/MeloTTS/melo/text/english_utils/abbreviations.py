@@ -1,9 +1,7 @@
 import re
 
-# List of (regular expression, replacement) pairs for abbreviations in english:
-abbreviations_en = [
-    (re.compile("\\b%s\\." % x[0], re.IGNORECASE), x[1])
-    for x in [
+_expansions_en = dict(
+    [
         ("mrs", "misess"),
         ("mr", "mister"),
         ("dr", "doctor"),
@@ -23,13 +21,24 @@ abbreviations_en = [
         ("col", "colonel"),
         ("ft", "fort"),
     ]
+)
+
+# List of (regular expression, replacement) pairs for abbreviations in english:
+abbreviations_en = [
+    (re.compile("\\b%s\\." % x[0], re.IGNORECASE), x[1])
+    for x in _expansions_en.items()
 ]
 
+# all of abbreviations_en as one (pattern, replacement) rule
+abbreviation_rule_en = (
+    re.compile("\\b(%s)\\." % "|".join(_expansions_en), re.IGNORECASE),
+    lambda m: _expansions_en[m.group(1).lower()],
+)
+
+
 def expand_abbreviations(text, lang="en"):
     if lang == "en":
-        _abbreviations = abbreviations_en
+        regex, replacement = abbreviation_rule_en
     else:
         raise NotImplementedError()
-    for regex, replacement in _abbreviations:
-        text = re.sub(regex, replacement, text)
-    return text
\ No newline at end of file
+    return regex.sub(replacement, text)
\ No newline at end of file
@@ -88,10 +88,17 @@ def _expand_number(m):
     return _inflect.number_to_words(num, andword="")
 
 
+# each rule expands digits left by the previous one, so they stay separate passes
+number_rules = [
+    (_comma_number_re, _remove_commas),
+    (_currency_re, _expand_currency),
+    (_decimal_number_re, _expand_decimal_point),
+    (_ordinal_re, _expand_ordinal),
+    (_number_re, _expand_number),
+]
+
+
 def normalize_numbers(text):
-    text = re.sub(_comma_number_re, _remove_commas, text)
-    text = re.sub(_currency_re, _expand_currency, text)
-    text = re.sub(_decimal_number_re, _expand_decimal_point, text)
-    text = re.sub(_ordinal_re, _expand_ordinal, text)
-    text = re.sub(_number_re, _expand_number, text)
+    for regex, replacement in number_rules:
+        text = regex.sub(replacement, text)
     return text
\ No newline at end of file
@@ -43,5 +43,8 @@ def _expand_time_english(match: "re.Match") -> str:
     return " ".join(time)
 
 
+time_rule_en = (_time_re, _expand_time_english)
+
+
 def expand_time_english(text: str) -> str:
-    return re.sub(_time_re, _expand_time_english, text)
\ No newline at end of file
+    return _time_re.sub(_expand_time_english, text)
\ No newline at end of file
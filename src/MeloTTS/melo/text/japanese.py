@@ -3,15 +3,11 @@
 import re
 import unicodedata
 
-from transformers import AutoTokenizer
+from .loader import LazyLoader, from_pretrained_tokenizer
 
 from . import symbols
 punctuation = ["!", "?", "…", ",", ".", "'", "-"]
 
-try:
-    import MeCab
-except ImportError as e:
-    raise ImportError("Japanese requires mecab-python3 and unidic-lite.") from e
 from num2words import num2words
 
 _CONVRULES = [
@@ -364,11 +360,22 @@ def hira2kata(text: str) -> str:
 
 _SYMBOL_TOKENS = set(list("・、。？！"))
 _NO_YOMI_TOKENS = set(list("「」『』―（）［］[]"))
-_TAGGER = MeCab.Tagger()
+
+
+def _load_tagger():
+    try:
+        import MeCab
+    except ImportError as e:
+        raise ImportError("Japanese requires mecab-python3 and unidic-lite.") from e
+    return MeCab.Tagger()
+
+
+# MeCab, kakasi and the tokenizer are only loaded once japanese is used
+_TAGGER = LazyLoader(_load_tagger)
 
 
 def text2kata(text: str) -> str:
-    parsed = _TAGGER.parse(text)
+    parsed = _TAGGER().parse(text)
     res = []
     for line in parsed.split("\n"):
         if line == "EOS":
@@ -536,21 +543,26 @@ def replace_punctuation(text):
 
     return replaced_text
 
-from pykakasi import kakasi
-# Initialize kakasi object
-kakasi = kakasi()
-# Set options for converting Chinese characters to Katakana
-kakasi.setMode("J", "K")  # Chinese to Katakana
-kakasi.setMode("H", "K")  # Hiragana to Katakana
-# Convert Chinese characters to Katakana
-conv = kakasi.getConverter()
+
+def _load_converter():
+    from pykakasi import kakasi
+    # Initialize kakasi object
+    kakasi = kakasi()
+    # Set options for converting Chinese characters to Katakana
+    kakasi.setMode("J", "K")  # Chinese to Katakana
+    kakasi.setMode("H", "K")  # Hiragana to Katakana
+    # Convert Chinese characters to Katakana
+    return kakasi.getConverter()
+
+
+conv = LazyLoader(_load_converter)
 
 def text_normalize(text):
     res = unicodedata.normalize("NFKC", text)
     res = japanese_convert_numbers_to_words(res)
     res = "".join([i for i in res if is_japanese_character(i)])
     res = replace_punctuation(res)
-    res = conv.do(res)
+    res = conv().do(res)
     return res
 
 
@@ -567,10 +579,10 @@ def distribute_phone(n_phone, n_word):
 # tokenizer = AutoTokenizer.from_pretrained('cl-tohoku/bert-base-japanese-v3')
 
 model_id = 'tohoku-nlp/bert-base-japanese-v3'
-tokenizer = AutoTokenizer.from_pretrained(model_id)
+tokenizer = from_pretrained_tokenizer(model_id)
 def g2p(norm_text):
 
-    tokenized = tokenizer.tokenize(norm_text)
+    tokenized = tokenizer().tokenize(norm_text)
     phs = []
     ph_groups = []
     for t in tokenized:
@@ -1,14 +1,20 @@
 import torch
 from transformers import AutoTokenizer, AutoModelForMaskedLM
 import sys
+import threading
+
+from .bert_utils import batched_hidden_states, phone_level_features
 
 
 models = {}
 tokenizers = {}
+_model_lock = threading.Lock()
 def get_bert_feature(text, word2ph, device=None, model_id='tohoku-nlp/bert-base-japanese-v3'):
-    global model
-    global tokenizer
+    return get_bert_features([text], [word2ph], device=device, model_id=model_id)[0]
+
 
+def get_bert_features(texts, word2phs, device=None, model_id='tohoku-nlp/bert-base-japanese-v3'):
+    """get_bert_feature for several texts with a single forward pass."""
     if (
         sys.platform == "darwin"
         and torch.backends.mps.is_available()
@@ -17,33 +23,19 @@ def get_bert_feature(text, word2ph, device=None, model_id='tohoku-nlp/bert-base-
         device = "mps"
     if not device:
         device = "cuda"
-    if model_id not in models:
-        model = AutoModelForMaskedLM.from_pretrained(model_id).to(
-            device
-        )
-        models[model_id] = model
-        tokenizer = AutoTokenizer.from_pretrained(model_id)
-        tokenizers[model_id] = tokenizer
-    else:
-        model = models[model_id]
-        tokenizer = tokenizers[model_id]
-
-
-    with torch.no_grad():
-        inputs = tokenizer(text, return_tensors="pt")
-        tokenized = tokenizer.tokenize(text)
-        for i in inputs:
-            inputs[i] = inputs[i].to(device)
-        res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
-
-    assert inputs["input_ids"].shape[-1] == len(word2ph), f"{inputs['input_ids'].shape[-1]}/{len(word2ph)}"
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
-
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
-
-    return phone_level_feature.T
+    with _model_lock:
+        if model_id not in models:
+            models[model_id] = AutoModelForMaskedLM.from_pretrained(model_id).to(
+                device
+            )
+            tokenizers[model_id] = AutoTokenizer.from_pretrained(model_id)
+    # locals, korean shares this module with another model_id
+    model = models[model_id]
+    tokenizer = tokenizers[model_id]
+
+    features = []
+    for res, word2ph in zip(batched_hidden_states(model, tokenizer, texts, device), word2phs):
+        assert res.shape[0] == len(word2ph), f"{res.shape[0]}/{len(word2ph)}"
+        features.append(phone_level_features(res, word2ph))
+
+    return features
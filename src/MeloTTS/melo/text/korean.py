@@ -3,7 +3,7 @@
 import re
 import unicodedata
 
-from transformers import AutoTokenizer
+from .loader import LazyLoader, from_pretrained_tokenizer
 
 from . import punctuation, symbols
 
@@ -43,7 +43,15 @@ def normalize_english(text):
     return text
 
 
-g2p_kr = None
+
+
+def _load_g2p():
+    from g2pkk import G2p
+
+    return G2p()
+
+
+g2p_kr = LazyLoader(_load_g2p)
 
 
 def korean_text_to_phonemes(text, character: str = "hangeul") -> str:
@@ -57,22 +65,16 @@ def korean_text_to_phonemes(text, character: str = "hangeul") -> str:
         output = '하늘' (Unicode :\u1112\u1161\u1102\u1173\u11af), (ᄒ + ᅡ + ᄂ + ᅳ + ᆯ)
 
     """
-    global g2p_kr  # pylint: disable=global-statement
-    if g2p_kr is None:
-        from g2pkk import G2p
-
-        g2p_kr = G2p()
-
     if character == "english":
         from anyascii import anyascii
 
         text = normalize(text)
-        text = g2p_kr(text)
+        text = g2p_kr()(text)
         text = anyascii(text)
         return text
 
     text = normalize(text)
-    text = g2p_kr(text)
+    text = g2p_kr()(text)
     text = list(hangul_to_jamo(text))  # '하늘' --> ['ᄒ', 'ᅡ', 'ᄂ', 'ᅳ', 'ᆯ']
     return "".join(text)
 
@@ -98,11 +100,11 @@ def distribute_phone(n_phone, n_word):
 # tokenizer = AutoTokenizer.from_pretrained('cl-tohoku/bert-base-japanese-v3')
 
 model_id = "kykim/bert-kor-base"
-tokenizer = AutoTokenizer.from_pretrained(model_id)
+tokenizer = from_pretrained_tokenizer(model_id)
 
 
 def g2p(norm_text):
-    tokenized = tokenizer.tokenize(norm_text)
+    tokenized = tokenizer().tokenize(norm_text)
     phs = []
     ph_groups = []
     for t in tokenized:
@@ -154,6 +156,14 @@ def get_bert_feature(text, word2ph, device="cuda"):
     )
 
 
+def get_bert_features(texts, word2phs, device="cuda"):
+    from . import japanese_bert
+
+    return japanese_bert.get_bert_features(
+        texts, word2phs, device=device, model_id=model_id
+    )
+
+
 if __name__ == "__main__":
     # tokenizer = AutoTokenizer.from_pretrained("./bert/bert-base-japanese-v3")
     from text.symbols import symbols
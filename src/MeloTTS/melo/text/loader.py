@@ -0,0 +1,36 @@
+import threading
+
+
+class LazyLoader:
+    """Builds a frontend resource on first use, such as a tokenizer or a g2p model.
+
+    Calling the loader returns the resource, building it with `factory()` the
+    first time. Concurrent first calls wait for a single build instead of each
+    running the factory.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self.factory()
+                    self._loaded = True
+        return self._value
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+
+def from_pretrained_tokenizer(model_id):
+    """A LazyLoader for the tokenizer of a BERT checkpoint."""
+    def load():
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_id)
+    return LazyLoader(load)
@@ -0,0 +1,126 @@
+import re
+import functools
+
+# flags a rule may carry into the combined pattern as a scoped inline flag
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+
+class _Rules:
+    """(pattern, replacement) rules compiled into one alternation.
+
+    Patterns may not refer to their groups by number or name, since those
+    change in the combined pattern.
+    """
+
+    def __init__(self, rules):
+        self._rules = []
+        alternatives = []
+        for i, (pattern, replacement) in enumerate(rules):
+            pattern = re.compile(pattern)
+            flags = ''.join(c for flag, c in _SCOPED_FLAGS if pattern.flags & flag)
+            # a newline ends a trailing comment of a verbose pattern
+            end = '\n' if pattern.flags & re.VERBOSE else ''
+            alternatives.append(f'(?P<_{i}>(?{flags}:{pattern.pattern}{end}))')
+            if not callable(replacement) and '\\' not in replacement:
+                replacement = _constant(replacement)
+            self._rules.append((pattern, replacement))
+        self.pattern = re.compile('|'.join(alternatives))
+
+    def _replace(self, m):
+        pattern, replacement = self._rules[int(m.lastgroup[1:])]
+        if pattern.groups:
+            # group numbers are the rule's own, not the combined pattern's
+            m = pattern.match(m.string, m.start())
+        if callable(replacement):
+            return replacement(m)
+        return m.expand(replacement)
+
+    def __call__(self, text):
+        return self.pattern.sub(self._replace, text)
+
+
+def _constant(replacement):
+    return lambda m: replacement
+
+
+def _char_map(mapping):
+    table = {}
+    for chars, replacement in mapping.items():
+        for c in chars:
+            table[ord(c)] = replacement
+    replaces = [(chr(c), replacement or '') for c, replacement in table.items()]
+    # str.translate is only fast on ascii text, a str.replace per character
+    # does better elsewhere as long as no replacement holds a mapped character
+    chainable = not any(ord(c) in table for _, replacement in replaces for c in replacement)
+
+    def translate(text):
+        if text.isascii() or not chainable:
+            return text.translate(table)
+        for c, replacement in replaces:
+            text = text.replace(c, replacement)
+        return text
+    return translate
+
+
+def collapse_whitespace(text):
+    r"""re.sub(r'\s+', ' ', text), with str.split doing the work."""
+    words = text.split()
+    if not words:
+        return ' ' if text else text
+    collapsed = ' '.join(words)
+    if text[0].isspace():
+        collapsed = ' ' + collapsed
+    if text[-1].isspace():
+        collapsed += ' '
+    return collapsed
+
+
+def append_after(chars, suffix):
+    """A function doing re.sub(f'[{chars}]', r'\\g<0>' + suffix, text) with str.replace."""
+    assert sum(c in suffix for c in chars) <= 1, 'the suffix may hold at most one of the chars'
+    # the char in the suffix goes first, so the copies the others add are not expanded again
+    chars = sorted(chars, key=lambda c: c not in suffix)
+
+    def append(text):
+        for c in chars:
+            text = text.replace(c, c + suffix)
+        return text
+    return append
+
+
+class Normalizer:
+    """A text normalization pipeline compiled once and applied in a few passes.
+
+    Each stage is one pass over the text:
+
+    - a dict maps characters to a character, or to None to delete them, in
+      one `str.translate`. A key may list several characters. Longer
+      replacements work too but put `str.translate` on a far slower path.
+    - a list of (pattern, replacement) rules is compiled into one alternation
+      applied by a single `re.sub`. Replacements are `re.sub` templates or
+      functions of the match. All rules of a stage match the stage's input,
+      not each other's output, and at any position the first matching rule
+      wins, so rules that rewrite each other's output go in separate stages.
+      A stage of one rule is a plain `re.sub`. The combined pattern calls
+      back into python for every match, so it suits rules that match rarely;
+      a frequent one is better as its own stage or a function like
+      `append_after`.
+    - any other callable, e.g. `str.lower`, is called on the text.
+    """
+
+    def __init__(self, *stages):
+        self.stages = []
+        for stage in stages:
+            if isinstance(stage, dict):
+                stage = _char_map(stage)
+            elif not callable(stage) and len(stage) == 1:
+                pattern, replacement = stage[0]
+                stage = functools.partial(re.compile(pattern).sub, replacement)
+            elif not callable(stage):
+                stage = _Rules(stage)
+            self.stages.append(stage)
+
+    def __call__(self, text):
+        for stage in self.stages:
+            text = stage(text)
+        return text
@@ -5,7 +5,7 @@ import re
 from . import symbols
 from .es_phonemizer import cleaner as es_cleaner
 from .es_phonemizer import es_to_ipa
-from transformers import AutoTokenizer
+from .loader import from_pretrained_tokenizer
 
 
 def distribute_phone(n_phone, n_word):
@@ -63,11 +63,11 @@ def refine_syllables(syllables):
 
 # model_id = 'bert-base-uncased'
 model_id = 'dccuchile/bert-base-spanish-wwm-uncased'
-tokenizer = AutoTokenizer.from_pretrained(model_id)
+tokenizer = from_pretrained_tokenizer(model_id)
 
 def g2p(text, pad_start_end=True, tokenized=None):
     if tokenized is None:
-        tokenized = tokenizer.tokenize(text)
+        tokenized = tokenizer().tokenize(text)
     # import pdb; pdb.set_trace()
     phs = []
     ph_groups = []
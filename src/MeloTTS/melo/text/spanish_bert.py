@@ -1,12 +1,22 @@
 import torch
-from transformers import AutoTokenizer, AutoModelForMaskedLM
+from transformers import AutoModelForMaskedLM
 import sys
+import threading
+
+from .bert_utils import batched_hidden_states, phone_level_features
+from .loader import from_pretrained_tokenizer
 
 model_id = 'dccuchile/bert-base-spanish-wwm-uncased'
-tokenizer = AutoTokenizer.from_pretrained(model_id)
+tokenizer = from_pretrained_tokenizer(model_id)
 model = None
+_model_lock = threading.Lock()
 
 def get_bert_feature(text, word2ph, device=None):
+    return get_bert_features([text], [word2ph], device)[0]
+
+
+def get_bert_features(texts, word2phs, device=None):
+    """get_bert_feature for several texts with a single forward pass."""
     global model
     if (
         sys.platform == "darwin"
@@ -16,24 +26,14 @@ def get_bert_feature(text, word2ph, device=None):
         device = "mps"
     if not device:
         device = "cuda"
-    if model is None:
-        model = AutoModelForMaskedLM.from_pretrained(model_id).to(
-            device
-        )
-    with torch.no_grad():
-        inputs = tokenizer(text, return_tensors="pt")
-        for i in inputs:
-            inputs[i] = inputs[i].to(device)
-        res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
-        
-    assert inputs["input_ids"].shape[-1] == len(word2ph)
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
-
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
+    with _model_lock:
+        if model is None:
+            model = AutoModelForMaskedLM.from_pretrained(model_id).to(
+                device
+            )
+    features = []
+    for res, word2ph in zip(batched_hidden_states(model, tokenizer(), texts, device), word2phs):
+        assert res.shape[0] == len(word2ph)
+        features.append(phone_level_features(res, word2ph))
 
-    return phone_level_feature.T
+    return features
@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from functools import lru_cache
 from typing import List
 from typing import Tuple
 
@@ -19,6 +20,11 @@ from pypinyin import lazy_pinyin
 from pypinyin import Style
 
 
+@lru_cache(maxsize=65536)
+def _finals_tone3(word: str) -> Tuple[str, ...]:
+    return tuple(lazy_pinyin(word, neutral_tone_with_five=True, style=Style.FINALS_TONE3))
+
+
 class ToneSandhi:
     def __init__(self):
         self.must_neural_tone_words = {
@@ -670,10 +676,7 @@ class ToneSandhi:
         self, seg: List[Tuple[str, str]]
     ) -> List[Tuple[str, str]]:
         new_seg = []
-        sub_finals_list = [
-            lazy_pinyin(word, neutral_tone_with_five=True, style=Style.FINALS_TONE3)
-            for (word, pos) in seg
-        ]
+        sub_finals_list = [_finals_tone3(word) for (word, pos) in seg]
         assert len(sub_finals_list) == len(seg)
         merge_last = [False] * len(seg)
         for i, (word, pos) in enumerate(seg):
@@ -705,10 +708,7 @@ class ToneSandhi:
         self, seg: List[Tuple[str, str]]
     ) -> List[Tuple[str, str]]:
         new_seg = []
-        sub_finals_list = [
-            lazy_pinyin(word, neutral_tone_with_five=True, style=Style.FINALS_TONE3)
-            for (word, pos) in seg
-        ]
+        sub_finals_list = [_finals_tone3(word) for (word, pos) in seg]
         assert len(sub_finals_list) == len(seg)
         merge_last = [False] * len(seg)
         for i, (word, pos) in enumerate(seg):
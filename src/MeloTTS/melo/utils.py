@@ -9,17 +9,64 @@ from scipy.io.wavfile import read
 import torch
 import torchaudio
 import librosa
-from MeloTTS.melo.text import cleaned_text_to_sequence, get_bert
-from MeloTTS.melo.text.cleaner import clean_text
+from MeloTTS.melo.text import cleaned_text_to_sequence, get_berts
+from MeloTTS.melo.text.cleaner import clean_text, normalize_text, g2p
 from MeloTTS.melo import commons
+from MeloTTS.melo.feature_cache import model_id_for
 
 MATPLOTLIB_FLAG = False
 
 logger = logging.getLogger(__name__)
 
 
-def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None):
-    norm_text, phone, tone, word2ph = clean_text(text, language_str)
+def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None, cache=None):
+    return get_texts_for_tts_infer([text], language_str, hps, device, symbol_to_id, cache=cache)[0]
+
+
+def get_texts_for_tts_infer(texts, language_str, hps, device, symbol_to_id=None, batch_size=16, cache=None):
+    """get_text_for_tts_infer for several texts, running BERT on up to `batch_size` of them at once.
+
+    With a FeatureCache, texts seen before skip cleaning, g2p and BERT entirely.
+    """
+    entries = [None] * len(texts)
+    keys = [None] * len(texts)
+    if cache is not None:
+        # keyed by the normalized text, so e.g. "Dr. Smith" and "doctor smith" share an entry
+        texts = [normalize_text(text, language_str) for text in texts]
+        model_id = model_id_for(hps, language_str)
+        for i, text in enumerate(texts):
+            keys[i] = cache.key(language_str, text, model_id)
+            entries[i] = cache.get(keys[i])
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    sequences = {
+        i: _get_text_sequences(texts[i], language_str, hps, symbol_to_id, normalized=cache is not None)
+        for i in missing
+    }
+
+    berts = {}
+    if not getattr(hps.data, "disable_bert", False):
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            berts.update(zip(batch, get_berts(
+                [sequences[i][0] for i in batch],
+                [sequences[i][4] for i in batch],
+                language_str,
+                device,
+            )))
+    for i in missing:
+        _, phone, tone, language, _ = sequences[i]
+        entries[i] = (berts.get(i), phone, tone, language)
+        if cache is not None:
+            cache.put(keys[i], entries[i])
+    return [_get_text_features(*entry, language_str) for entry in entries]
+
+
+def _get_text_sequences(text, language_str, hps, symbol_to_id=None, normalized=False):
+    if normalized:
+        norm_text = text
+        phone, tone, word2ph = g2p(text, language_str)
+    else:
+        norm_text, phone, tone, word2ph = clean_text(text, language_str)
     phone, tone, language = cleaned_text_to_sequence(
         phone, tone, language_str, symbol_to_id
     )
@@ -31,13 +78,14 @@ def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None):
         for i in range(len(word2ph)):
             word2ph[i] = word2ph[i] * 2
         word2ph[0] += 1
+    return norm_text, phone, tone, language, word2ph
+
 
-    if getattr(hps.data, "disable_bert", False):
+def _get_text_features(bert, phone, tone, language, language_str):
+    if bert is None:
         bert = torch.zeros(1024, len(phone))
         ja_bert = torch.zeros(768, len(phone))
     else:
-        bert = get_bert(norm_text, word2ph, language_str, device)
-        del word2ph
         assert bert.shape[-1] == len(phone), phone
 
         if language_str == "ZH":
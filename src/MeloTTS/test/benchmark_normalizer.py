@@ -0,0 +1,64 @@
+import re
+import sys
+import timeit
+
+from MeloTTS.melo import split_utils
+from MeloTTS.melo.text.english import text_normalize
+from MeloTTS.melo.text.english_utils.abbreviations import abbreviations_en
+from MeloTTS.melo.text.english_utils.number_norm import number_rules
+from MeloTTS.melo.text.english_utils.time_norm import expand_time_english
+
+# Compares the compiled normalizers against the chains of re.sub calls they
+# replaced, on documents made by repeating the test resources:
+#   python benchmark_normalizer.py [repeats]
+
+
+def split_sentences_latin_chained(text):
+    text = re.sub('[。！？；]', '.', text)
+    text = re.sub('[，]', ',', text)
+    text = re.sub('[“”]', '"', text)
+    text = re.sub('[‘’]', "'", text)
+    text = re.sub(r"[\<\>\(\)\[\]\"\«\»]+", "", text)
+    text = re.sub(r'\n\n+', '\n', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[""]', '"', text)
+    text = re.sub(r'([,.?!])', r'\1 ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text
+
+
+def split_sentences_zh_chained(text):
+    text = re.sub('[。！？；]', '.', text)
+    text = re.sub('[，]', ',', text)
+    text = re.sub('[\n\t ]+', ' ', text)
+    text = re.sub('([,.!?;])', r'\1 $#!', text)
+    return text
+
+
+def text_normalize_chained(text):
+    text = text.lower()
+    text = expand_time_english(text)
+    for regex, replacement in number_rules:
+        text = re.sub(regex, replacement, text)
+    for regex, replacement in abbreviations_en:
+        text = re.sub(regex, replacement, text)
+    return text
+
+
+def bench(name, chained, compiled, text, number=5):
+    assert chained(text) == compiled(text), name
+    before = min(timeit.repeat(lambda: chained(text), number=number, repeat=3)) / number
+    after = min(timeit.repeat(lambda: compiled(text), number=number, repeat=3)) / number
+    print(f"{name:<24}{len(text):>10} chars {before * 1000:>9.2f} ms -> {after * 1000:>8.2f} ms  {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    # sentences whose output depends on the order of the passes
+    en_order = "At 3:45 Mr. Smith left. Dr. Jones paid $3.50 on the 21st at 10:30 pm, with Capt. Hook.\n"
+    en = (open("basetts_test_resources/en_egs_text.txt", "r").read() + en_order) * repeats
+    zh = open("basetts_test_resources/zh_mix_en_egs_text.txt", "r").read() * repeats
+
+    bench("split_sentences_latin", split_sentences_latin_chained, split_utils.latin_normalizer, en)
+    bench("split_sentences_zh", split_sentences_zh_chained, split_utils.zh_normalizer, zh)
+    bench("english.text_normalize", text_normalize_chained, text_normalize, en)
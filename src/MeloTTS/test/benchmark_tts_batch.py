@@ -0,0 +1,59 @@
+import sys
+import time
+
+import torch
+
+from MeloTTS.melo.api import TTS
+from MeloTTS.melo.feature_cache import FeatureCache
+
+# Throughput of TTS.tts_batch against one tts_batch call per text, and of
+# long-form tts_to_file at several batch sizes:
+#   python benchmark_tts_batch.py EN [device]
+
+language = sys.argv[1] if len(sys.argv) > 1 else "EN"
+device = sys.argv[2] if len(sys.argv) > 2 else "auto"
+model = TTS(language=language, device=device)
+speaker_id = list(model.hps.data.spk2id.values())[0]
+sr = model.hps.data.sampling_rate
+
+resources = {
+    "EN": "en_egs_text.txt",
+    "ZH": "zh_mix_en_egs_text.txt",
+    "ES": "es_egs_text.txt",
+    "FR": "fr_egs_text.txt",
+    "JP": "jp_egs_text.txt",
+    "KR": "kr_egs_text.txt",
+}
+lines = [t.strip() for t in open(f"basetts_test_resources/{resources[language]}", "r").readlines() if t.strip()]
+texts = [lines[i % len(lines)] for i in range(32)]
+
+
+def timed(fn):
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    audios = fn()
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return audios, time.perf_counter() - start
+
+
+# warm up, and fill a feature cache to keep the text frontend out of the timings
+model.feature_cache = FeatureCache(capacity=1024)
+model.tts_batch(texts, speaker_id)
+print(f"{'batch':>5} {'sequential':>12} {'batched':>12} {'speedup':>8}  (seconds of audio per second)")
+for batch_size in (1, 2, 4, 8, 16, 32):
+    batch = texts[:batch_size]
+    audios, sequential = timed(lambda: [a for t in batch for a in model.tts_batch([t], speaker_id)])
+    sequential_rate = sum(len(a) for a in audios) / sr / sequential
+    audios, batched = timed(lambda: model.tts_batch(batch, speaker_id))
+    batched_rate = sum(len(a) for a in audios) / sr / batched
+    print(f"{batch_size:>5} {sequential_rate:>12.2f} {batched_rate:>12.2f} {batched_rate / sequential_rate:>7.2f}x")
+
+# long-form synthesis of the whole resource file, sentence by sentence and length-bucketed
+document = " ".join(lines)
+model.tts_to_file(document, speaker_id, quiet=True)
+print(f"{'batch':>5} {'tts_to_file':>12}  (seconds of audio per second)")
+for batch_size in (1, 4, 8, 16, 32):
+    audio, seconds = timed(lambda: model.tts_to_file(document, speaker_id, quiet=True, batch_size=batch_size))
+    print(f"{batch_size:>5} {len(audio) / sr / seconds:>12.2f}")
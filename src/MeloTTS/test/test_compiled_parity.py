@@ -0,0 +1,85 @@
+import os
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from MeloTTS.melo import utils
+from MeloTTS.melo.api import TTS
+
+# Checks that the compiled encoder, duration predictors, flow and decoder
+# match the eager ones on sentences of different lengths, and times them:
+#   MELO_TEST_LANGUAGE=EN pytest -s test_compiled_parity.py
+
+resources = {
+    "EN": "en_egs_text.txt",
+    "ZH": "zh_mix_en_egs_text.txt",
+    "ES": "es_egs_text.txt",
+    "FR": "fr_egs_text.txt",
+    "JP": "jp_egs_text.txt",
+    "KR": "kr_egs_text.txt",
+}
+language = os.environ.get("MELO_TEST_LANGUAGE", "EN")
+
+
+@pytest.fixture(scope="module")
+def model():
+    try:
+        model = TTS(language=language, device="auto")
+    except OSError as e:
+        pytest.skip(f"no {language} checkpoint: {e}")
+    return model.optimize_for_inference()
+
+
+@pytest.fixture(scope="module")
+def text_inputs(model):
+    path = os.path.join(os.path.dirname(__file__), "basetts_test_resources", resources[language])
+    texts = [t.strip() for t in open(path, "r").readlines() if t.strip()]
+    return utils.get_texts_for_tts_infer(texts, model.language, model.hps, model.device, model.symbol_to_id)
+
+
+def module_outputs(model, inputs):
+    m = model.model
+    speaker_id = list(model.hps.data.spk2id.values())[0]
+    bert, ja_bert, phones, tones, lang_ids = (t.unsqueeze(0).to(model.device) for t in inputs)
+    x_lengths = torch.LongTensor([phones.size(1)]).to(model.device)
+    g = m.emb_g(torch.LongTensor([speaker_id]).to(model.device)).unsqueeze(-1)
+    with torch.no_grad():
+        x, m_p, logs_p, x_mask = m.enc_p(phones, x_lengths, tones, lang_ids, bert, ja_bert, g=None if m.use_vc else g)
+        torch.manual_seed(0)
+        logw_sdp = m.sdp(x, x_mask, g=g, reverse=True, noise_scale=0.8)
+        logw_dp = m.dp(x, x_mask, g=g)
+        # a fixed number of frames per phone, the durations of the two runs
+        # may round to different lengths
+        frames = 4 * phones.size(1)
+        torch.manual_seed(0)
+        z_p = torch.randn(1, m_p.size(1), frames).to(m_p)
+        z = m.flow(z_p, torch.ones_like(z_p[:, :1]), g=g, reverse=True)
+        o = m.dec(z, g=g)
+    return {"enc_p": m_p, "sdp": logw_sdp, "dp": logw_dp, "flow": z, "dec": o}
+
+
+def timed(model, text_inputs):
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    outputs = [module_outputs(model, inputs) for inputs in text_inputs]
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return outputs, time.perf_counter() - start
+
+
+def test_compiled_matches_eager(model, text_inputs, tmp_path):
+    module_outputs(model, text_inputs[0])
+    eager, eager_seconds = timed(model, text_inputs)
+    model.compile_for_inference(cache_dir=str(tmp_path))
+    _, compile_seconds = timed(model, text_inputs)
+    compiled, compiled_seconds = timed(model, text_inputs)
+
+    for i, (expected, actual) in enumerate(zip(eager, compiled)):
+        for name in expected:
+            torch.testing.assert_close(actual[name], expected[name], rtol=1e-3, atol=1e-4, msg=lambda m: f"sentence {i}, {name}: {m}")
+    lengths = [t[2].size(0) for t in text_inputs]
+    print(f"{len(text_inputs)} sentences match, lengths {min(lengths)} to {max(lengths)} phones")
+    print(f"eager {eager_seconds:.2f}s, first compiled pass {compile_seconds:.2f}s, compiled {compiled_seconds:.2f}s")
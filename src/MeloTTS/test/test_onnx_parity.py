@@ -0,0 +1,66 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+
+from MeloTTS.melo.api import TTS
+
+# Exports a model to ONNX, checks that seeded ONNX Runtime syntheses match
+# the eager ones on cpu, and times both:
+#   MELO_TEST_LANGUAGE=EN ONNX_THREADS=4 pytest -s test_onnx_parity.py
+
+resources = {
+    "EN": "en_egs_text.txt",
+    "ZH": "zh_mix_en_egs_text.txt",
+    "ES": "es_egs_text.txt",
+    "FR": "fr_egs_text.txt",
+    "JP": "jp_egs_text.txt",
+    "KR": "kr_egs_text.txt",
+}
+language = os.environ.get("MELO_TEST_LANGUAGE", "EN")
+num_threads = int(os.environ.get("ONNX_THREADS", 0)) or None
+
+
+@pytest.fixture(scope="module")
+def model():
+    try:
+        model = TTS(language=language, device="cpu")
+    except OSError as e:
+        pytest.skip(f"no {language} checkpoint: {e}")
+    return model.optimize_for_inference()
+
+
+@pytest.fixture(scope="module")
+def texts():
+    path = os.path.join(os.path.dirname(__file__), "basetts_test_resources", resources[language])
+    return [t.strip() for t in open(path, "r").readlines() if t.strip()]
+
+
+def timed_batch(model, texts):
+    speaker_id = list(model.hps.data.spk2id.values())[0]
+    audios = []
+    start = time.perf_counter()
+    for i, t in enumerate(texts):
+        # a seed per sentence, and the noise free duration predictor alone, so
+        # that both runs give every sentence the same durations and noise
+        torch.manual_seed(i)
+        audios += model.tts_batch([t], speaker_id, sdp_ratio=0)
+    return audios, time.perf_counter() - start
+
+
+def test_onnx_matches_eager(model, texts, tmp_path):
+    timed_batch(model, texts)
+    eager, eager_seconds = timed_batch(model, texts)
+    model.export_onnx(str(tmp_path))
+    model.load_onnx(str(tmp_path), num_threads=num_threads)
+    timed_batch(model, texts)
+    onnx, onnx_seconds = timed_batch(model, texts)
+
+    assert [len(a) for a in onnx] == [len(a) for a in eager]
+    for i, (actual, expected) in enumerate(zip(onnx, eager)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-3, atol=1e-3, err_msg=f"sentence {i}")
+    print(f"{len(texts)} sentences, eager {eager_seconds:.2f}s, onnxruntime {onnx_seconds:.2f}s")
@@ -9,9 +9,14 @@ import librosa
 from openvoice.text import text_to_sequence
 from openvoice.mel_processing import spectrogram_torch
 from openvoice.models import SynthesizerTrn
+from openvoice.compile_utils import compile_inference_modules
+from openvoice.onnx_utils import export_onnx, OnnxVoiceConverter
 
 
 class OpenVoiceBaseClass(object):
+    # submodules of self.model that inference never runs
+    inference_unused = ()
+
     def __init__(self, 
                 config_path, 
                 device='cuda:0'):
@@ -34,14 +39,47 @@ class OpenVoiceBaseClass(object):
 
     def load_ckpt(self, ckpt_path):
         checkpoint_dict = torch.load(ckpt_path, map_location=torch.device(self.device))
+        if checkpoint_dict.get('inference_only'):
+            # written by save_inference_ckpt, the weights are already folded
+            self.optimize_for_inference()
         a, b = self.model.load_state_dict(checkpoint_dict['model'], strict=False)
 
+    def optimize_for_inference(self):
+        """Folds the weight norms into plain weights and drops inference_unused.
+
+        Weight norm recomputes every weight from weight_g and weight_v on each
+        forward pass. Call after load_ckpt, a regular checkpoint no longer
+        fits the folded model.
+        """
+        self.model.remove_weight_norm()
+        for name in self.inference_unused:
+            setattr(self.model, name, None)
+        # the weights are stored differently now, audio cache keys follow them
+        self.model.__dict__.pop('_checkpoint_hash', None)
+        return self
+
+    def save_inference_ckpt(self, ckpt_path):
+        """Saves the optimized weights alone, which load_ckpt reads back into a fresh model."""
+        self.optimize_for_inference()
+        torch.save({'model': self.model.state_dict(), 'inference_only': True}, ckpt_path)
+
+    def compile_for_inference(self, cache_dir=None, mode=None):
+        """Runs the model's submodules compiled, see compile_inference_modules.
+
+        The first calls are slow while they compile. `mode` is a
+        torch.compile mode, e.g. 'max-autotune'.
+        """
+        compile_inference_modules(self.model, cache_dir=cache_dir, mode=mode)
+        return self
+
 
 class BaseSpeakerTTS(OpenVoiceBaseClass):
     language_marks = {
         "english": "EN",
         "chinese": "ZH",
     }
+    # the posterior encoder is only trained, text goes through enc_p
+    inference_unused = ('enc_q',)
 
     @staticmethod
     def get_text(text, hps, is_symbol):
@@ -92,6 +130,29 @@ class BaseSpeakerTTS(OpenVoiceBaseClass):
         else:
             soundfile.write(output_path, audio, self.hps.data.sampling_rate)
 
+    def tts_iter(self, text, speaker, language='English', speed=1.0, chunk_size=32, context=None):
+        """Like tts, but yields audio as soon as each decoder window of a sentence is ready."""
+        mark = self.language_marks.get(language.lower(), None)
+        assert mark is not None, f"language {language} is not supported"
+
+        texts = self.split_sentences_into_pieces(text, mark)
+        silence = np.zeros(int((self.hps.data.sampling_rate * 0.05) / speed), dtype=np.float32)
+
+        for t in texts:
+            t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
+            t = f'[{mark}]{t}[{mark}]'
+            stn_tst = self.get_text(t, self.hps, False)
+            device = self.device
+            speaker_id = self.hps.speakers[speaker]
+            with torch.no_grad():
+                x_tst = stn_tst.unsqueeze(0).to(device)
+                x_tst_lengths = torch.LongTensor([stn_tst.size(0)]).to(device)
+                sid = torch.LongTensor([speaker_id]).to(device)
+                for o in self.model.infer_stream(x_tst, x_tst_lengths, sid=sid, noise_scale=0.667, noise_scale_w=0.6,
+                                                 length_scale=1.0 / speed, chunk_size=chunk_size, context=context):
+                    yield o[0, 0].data.cpu().float().numpy()
+            yield silence
+
 
 class ToneColorConverter(OpenVoiceBaseClass):
     def __init__(self, *args, **kwargs):
@@ -152,6 +213,23 @@ class ToneColorConverter(OpenVoiceBaseClass):
                 return audio
             else:
                 soundfile.write(output_path, audio, hps.data.sampling_rate)
+
+    def convert_stream(self, src_se, tgt_se, tau=0.3, chunk_frames=32, context_frames=None, lookahead_frames=None,
+                       crossfade_frames=4, generator=None):
+        return ToneColorConversionStream(self, src_se, tgt_se, tau=tau, chunk_frames=chunk_frames,
+                                         context_frames=context_frames, lookahead_frames=lookahead_frames,
+                                         crossfade_frames=crossfade_frames, generator=generator)
+
+    def export_onnx(self, output_dir, opset_version=17):
+        """Writes the optimized voice_conversion as the ONNX graph that load_onnx runs."""
+        self.optimize_for_inference()
+        export_onnx(self.model, output_dir, opset_version=opset_version)
+
+    def load_onnx(self, onnx_dir, sess_options=None, providers=None, num_threads=None):
+        """Runs voice_conversion with ONNX Runtime from then on, for convert and convert_stream alike."""
+        self.model = OnnxVoiceConverter(onnx_dir, self.model.ref_enc, self.model.conversion_context_frames(),
+                                        sess_options=sess_options, providers=providers, num_threads=num_threads)
+        return self
     
     def add_watermark(self, audio, message):
         if self.watermark_model is None:
@@ -193,4 +271,117 @@ class ToneColorConverter(OpenVoiceBaseClass):
         bits = np.stack(bits).reshape(-1, 8)
         message = utils.bits_to_string(bits)
         return message
-    
+
+
+class ToneColorConversionStream(object):
+    """Converts audio pushed in pieces, e.g. from tts_iter or a microphone.
+
+    Audio is converted `chunk_frames` spectrogram frames (hops) at a time. Each
+    window is run with up to `context_frames` of already emitted frames before it
+    and `lookahead_frames` after it, which are then cut from the output, so a
+    frame is emitted once `lookahead_frames` more frames of input have arrived.
+    Both default to the model's receptive field, conversion_context_frames, so
+    apart from the noise every frame converts as in a whole-clip conversion;
+    smaller values trade seams for latency. Each window draws its
+    own posterior noise, so its first `crossfade_frames` are blended with the
+    previous window's output for them. Memory stays bounded by the window and
+    its context. The converted audio is not watermarked. With a `generator` the
+    windows draw their noise from it, so the same input fed the same way
+    converts to the same output.
+    """
+    def __init__(self, converter, src_se, tgt_se, tau=0.3, chunk_frames=32, context_frames=None, lookahead_frames=None,
+                 crossfade_frames=4, generator=None):
+        hps = converter.hps
+        self.converter = converter
+        self.src_se = src_se
+        self.tgt_se = tgt_se
+        self.tau = tau
+        receptive_field = converter.model.conversion_context_frames()
+        self.chunk_frames = chunk_frames
+        self.context_frames = receptive_field if context_frames is None else context_frames
+        self.lookahead_frames = receptive_field if lookahead_frames is None else lookahead_frames
+        self.crossfade_frames = min(crossfade_frames, self.lookahead_frames)
+        # the previous window's output for the first frames of the next one
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.generator = generator
+        self.hop = hps.data.hop_length
+        self.n_fft = hps.data.filter_length
+        self.pad = (self.n_fft - self.hop) // 2
+        # samples of the padded signal starting at frame self.offset
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.offset = 0
+        self.emitted = 0
+        self.started = False
+        self.finished = False
+
+    def _available_frames(self):
+        if len(self.buffer) < self.n_fft:
+            return self.offset
+        return self.offset + (len(self.buffer) - self.n_fft) // self.hop + 1
+
+    def _convert(self, end, available):
+        hps = self.converter.hps
+        lo = max(self.emitted - self.context_frames, self.offset)
+        hi = min(end + self.lookahead_frames, available)
+        y = self.buffer[(lo - self.offset) * self.hop: (hi - 1 - self.offset) * self.hop + self.n_fft]
+        with torch.no_grad():
+            y = torch.FloatTensor(y).to(self.converter.device).unsqueeze(0)
+            spec = spectrogram_torch(y, hps.data.filter_length, hps.data.sampling_rate, hps.data.hop_length,
+                                     hps.data.win_length, center=False, pad=False)
+            spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.converter.device)
+            audio = self.converter.model.voice_conversion(spec, spec_lengths, sid_src=self.src_se,
+                                                          sid_tgt=self.tgt_se, tau=self.tau,
+                                                          generator=self.generator)[0][0, 0]
+            audio = audio.data.cpu().float().numpy()
+        fade = min(self.crossfade_frames, hi - end)
+        tail = audio[(end - lo) * self.hop: (end + fade - lo) * self.hop]
+        audio = audio[(self.emitted - lo) * self.hop: (end - lo) * self.hop]
+        n = min(len(self.tail), len(audio))
+        if n > 0:
+            ramp = (np.arange(n, dtype=np.float32) + 0.5) / n
+            audio[:n] = self.tail[:n] * (1 - ramp) + audio[:n] * ramp
+        self.tail = tail
+        self.emitted = end
+        # drop the samples no later window can reach
+        keep = max(self.emitted - self.context_frames, self.offset)
+        self.buffer = self.buffer[(keep - self.offset) * self.hop:]
+        self.offset = keep
+        return audio
+
+    def _drain(self, final):
+        available = self._available_frames()
+        ready = available if final else available - self.lookahead_frames
+        out = []
+        while ready - self.emitted >= (1 if final else self.chunk_frames):
+            out.append(self._convert(min(self.emitted + self.chunk_frames, ready), available))
+        if len(out) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(out)
+
+    def feed(self, audio):
+        """Adds samples at the converter's sampling rate, returns the audio that became ready."""
+        assert not self.finished, "stream is already finished"
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        if not self.started:
+            # reflect pad the start the same way spectrogram_torch does, once there is enough audio
+            audio = np.concatenate([self.buffer, audio])
+            if len(audio) <= self.pad:
+                self.buffer = audio
+                return np.zeros(0, dtype=np.float32)
+            audio = np.concatenate([audio[self.pad:0:-1], audio])
+            self.buffer = np.zeros(0, dtype=np.float32)
+            self.started = True
+        self.buffer = np.concatenate([self.buffer, audio])
+        return self._drain(final=False)
+
+    def finish(self):
+        """Converts everything left, padding the end like spectrogram_torch."""
+        assert not self.finished, "stream is already finished"
+        self.finished = True
+        if not self.started:
+            if len(self.buffer) <= self.pad:
+                return np.zeros(0, dtype=np.float32)
+            self.buffer = np.concatenate([self.buffer[self.pad:0:-1], self.buffer])
+            self.started = True
+        self.buffer = np.concatenate([self.buffer, self.buffer[-2:-self.pad - 2:-1]])
+        return self._drain(final=True)
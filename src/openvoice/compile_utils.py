@@ -0,0 +1,38 @@
+import os
+
+import torch
+
+# the SynthesizerTrn submodules that inference runs. The code between them,
+# length regulation and the masks of the predicted durations, has data
+# dependent shapes and stays eager
+INFERENCE_MODULES = ('enc_p', 'enc_q', 'sdp', 'dp', 'flow', 'dec')
+
+
+def compile_inference_modules(model, cache_dir=None, mode=None):
+    """Compiles the inference submodules of a SynthesizerTrn with torch.compile, in place.
+
+    Each submodule's forward is replaced by a compiled one with dynamic
+    shapes, so sentences of any length share a graph. Compilation happens on
+    the first call. Python the compiler cannot capture falls back to eager.
+    With a `cache_dir` the compiled kernels are also stored there, and a
+    restarted process loads them instead of compiling again. The directory
+    is process wide and the first one given wins, as does a
+    TORCHINDUCTOR_CACHE_DIR already set. Modules that are None, like an
+    enc_q dropped by optimize_for_inference, are skipped. `del
+    module.forward` restores the eager module.
+    """
+    import torch._inductor.config as inductor_config
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', os.path.abspath(cache_dir))
+        inductor_config.fx_graph_cache = True
+    # inductor draws its own random numbers otherwise, a seeded compiled
+    # synthesis has to sample the same noise as an eager one
+    inductor_config.fallback_random = True
+    for name in INFERENCE_MODULES:
+        module = getattr(model, name, None)
+        if module is None or 'forward' in module.__dict__:
+            continue
+        module.forward = torch.compile(module.forward, dynamic=True, mode=mode)
+    return model
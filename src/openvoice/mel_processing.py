@@ -37,7 +37,7 @@ mel_basis = {}
 hann_window = {}
 
 
-def spectrogram_torch(y, n_fft, sampling_rate, hop_size, win_size, center=False):
+def spectrogram_torch(y, n_fft, sampling_rate, hop_size, win_size, center=False, pad=True):
     if torch.min(y) < -1.1:
         print("min value is ", torch.min(y))
     if torch.max(y) > 1.1:
@@ -51,12 +51,14 @@ def spectrogram_torch(y, n_fft, sampling_rate, hop_size, win_size, center=False)
             dtype=y.dtype, device=y.device
         )
 
-    y = torch.nn.functional.pad(
-        y.unsqueeze(1),
-        (int((n_fft - hop_size) / 2), int((n_fft - hop_size) / 2)),
-        mode="reflect",
-    )
-    y = y.squeeze(1)
+    # pad=False is for slices of a longer signal that already carry the samples around them
+    if pad:
+        y = torch.nn.functional.pad(
+            y.unsqueeze(1),
+            (int((n_fft - hop_size) / 2), int((n_fft - hop_size) / 2)),
+            mode="reflect",
+        )
+        y = y.squeeze(1)
 
     spec = torch.stft(
         y,
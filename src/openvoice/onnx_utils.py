@@ -0,0 +1,90 @@
+import os
+import hashlib
+
+import torch
+import torch.nn as nn
+
+
+class _VoiceConversion(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, y, y_lengths, g_src, g_tgt, noise, tau):
+        o, y_mask, _ = self.model.voice_conversion(y, y_lengths, g_src, g_tgt, tau=tau, noise=noise)
+        return o, y_mask
+
+
+def export_onnx(model, output_dir, opset_version=17):
+    """Writes SynthesizerTrn.voice_conversion as voice_conversion.onnx to `output_dir`.
+
+    The graph takes a linear spectrogram, its lengths, the source and target
+    tone color embeddings, the noise of the posterior encoder and tau, and
+    returns the audio and y_mask. Batch and length axes are dynamic.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    model.eval()
+    device = next(model.parameters()).device
+    # an example length for tracing, the frames axis is dynamic in the graph
+    frames = 96
+    y = torch.randn(1, model.enc_q.in_channels, frames, device=device)
+    y_lengths = torch.LongTensor([frames]).to(device)
+    g = torch.randn(1, model.enc_q.gin_channels, 1, device=device)
+    noise = torch.randn(1, model.enc_q.out_channels, frames, device=device)
+    tau = torch.tensor(0.3, device=device)
+    spec = {0: 'batch', 2: 'frames'}
+    with torch.no_grad():
+        torch.onnx.export(
+            _VoiceConversion(model), (y, y_lengths, g, g, noise, tau),
+            os.path.join(output_dir, 'voice_conversion.onnx'), opset_version=opset_version,
+            input_names=['y', 'y_lengths', 'g_src', 'g_tgt', 'noise', 'tau'],
+            output_names=['o', 'y_mask'],
+            dynamic_axes={
+                'y': spec, 'y_lengths': {0: 'batch'}, 'g_src': {0: 'batch'}, 'g_tgt': {0: 'batch'},
+                'noise': spec, 'o': {0: 'batch', 2: 'samples'}, 'y_mask': spec,
+            },
+        )
+
+
+class OnnxVoiceConverter(nn.Module):
+    """SynthesizerTrn.voice_conversion run by ONNX Runtime on the graph of export_onnx.
+
+    It takes and returns torch tensors like SynthesizerTrn, so
+    ToneColorConverter.load_onnx swaps it in for the torch model. The
+    reference encoder that extract_se runs stays a torch module, and
+    `context_frames` is the torch model's conversion_context_frames. The noise is
+    drawn with torch as in the posterior encoder, so a seeded conversion
+    matches the eager one on cpu up to float rounding.
+    """
+
+    def __init__(self, onnx_dir, ref_enc, context_frames, sess_options=None, providers=None, num_threads=None):
+        super().__init__()
+        import onnxruntime
+
+        if num_threads is not None:
+            sess_options = sess_options or onnxruntime.SessionOptions()
+            sess_options.intra_op_num_threads = num_threads
+        with open(os.path.join(onnx_dir, 'voice_conversion.onnx'), 'rb') as f:
+            graph = f.read()
+        self.session = onnxruntime.InferenceSession(
+            graph, sess_options=sess_options, providers=providers or ['CPUExecutionProvider'])
+        self.inter_channels = {i.name: i for i in self.session.get_inputs()}['noise'].shape[1]
+        self.ref_enc = ref_enc
+        self.context_frames = context_frames
+        # the weights live in the session, model pools count them from here
+        self.graph_nbytes = len(graph)
+        # what audio_cache.checkpoint_hash returns for the converter
+        self._checkpoint_hash = hashlib.sha256(graph).hexdigest()[:16]
+
+    def conversion_context_frames(self):
+        return self.context_frames
+
+    def voice_conversion(self, y, y_lengths, sid_src, sid_tgt, tau=1.0, generator=None):
+        noise = torch.randn(y.size(0), self.inter_channels, y.size(2), generator=generator)
+        feeds = {
+            'y': y, 'y_lengths': y_lengths, 'g_src': sid_src, 'g_tgt': sid_tgt,
+            'noise': noise, 'tau': torch.tensor(tau, dtype=torch.float32),
+        }
+        o, y_mask = self.session.run(None, {k: v.detach().cpu().numpy() for k, v in feeds.items()})
+        # the latents of SynthesizerTrn.voice_conversion stay inside the graph
+        return torch.from_numpy(o), torch.from_numpy(y_mask), None
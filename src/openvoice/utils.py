@@ -2,6 +2,8 @@ import re
 import json
 import numpy as np
 
+from MeloTTS.melo.text.normalizer import Normalizer, append_after
+
 
 def get_hparams_from_file(config_path):
     with open(config_path, "r", encoding="utf-8") as f:
@@ -75,6 +77,20 @@ def bits_to_string(bits_array):
     return output_string
 
 
+latin_normalizer = Normalizer(
+    {'。！？；': '.', '，': ',', '‘’': "'", '<>()[]"“”«»': None},
+    [(r'[\n\t ]+', ' ')],
+    append_after(',.!?;', ' $#!'),
+)
+zh_normalizer = Normalizer(
+    {'。！？；': '.', '，': ','},
+    # 将文本中的换行符、空格和制表符替换为空格
+    [(r'[\n\t ]+', ' ')],
+    # 在标点符号后添加一个空格
+    append_after(',.!?;', ' $#!'),
+)
+
+
 def split_sentence(text, min_len=10, language_str='[EN]'):
     if language_str in ['EN']:
         sentences = split_sentences_latin(text, min_len=min_len)
@@ -94,13 +110,7 @@ def split_sentences_latin(text, min_len=10):
         :param min_len:
     """
     # deal with dirty sentences
-    text = re.sub('[。！？；]', '.', text)
-    text = re.sub('[，]', ',', text)
-    text = re.sub('[“”]', '"', text)
-    text = re.sub('[‘’]', "'", text)
-    text = re.sub(r"[\<\>\(\)\[\]\"\«\»]+", "", text)
-    text = re.sub('[\n\t ]+', ' ', text)
-    text = re.sub('([,.!?;])', r'\1 $#!', text)
+    text = latin_normalizer(text)
     # split
     sentences = [s.strip() for s in text.split('$#!')]
     if len(sentences[-1]) == 0: del sentences[-1]
@@ -145,12 +155,7 @@ def merge_short_sentences_latin(sens):
     return sens_out
 
 def split_sentences_zh(text, min_len=10):
-    text = re.sub('[。！？；]', '.', text)
-    text = re.sub('[，]', ',', text)
-    # 将文本中的换行符、空格和制表符替换为空格
-    text = re.sub('[\n\t ]+', ' ', text)
-    # 在标点符号后添加一个空格
-    text = re.sub('([,.!?;])', r'\1 $#!', text)
+    text = zh_normalizer(text)
     # 分隔句子并去除前后空格
     # sentences = [s.strip() for s in re.split('(。|！|？|；)', text)]
     sentences = [s.strip() for s in text.split('$#!')]
@@ -1,11 +1,30 @@
-from openvoice_streaming_server.core.libs.model import (
-    StreamingBaseSpeakerTTS,
-    StreamingCloneSpeakerTTS,
-    StreamingMeloSpeakerTTS,
-)
-
-__all__ = [
-    "StreamingBaseSpeakerTTS",
-    "StreamingCloneSpeakerTTS",
-    "StreamingMeloSpeakerTTS",
-]
+import importlib
+
+# name -> submodule it is defined in. Submodules are imported when one of
+# their names is first used, so the torch-free parts of the server, e.g. the
+# scheduler or the audio codec, can be imported without loading torch and
+# the model code
+_modules = {
+    "StreamingBaseSpeakerTTS": "model",
+    "StreamingCloneSpeakerTTS": "model",
+    "StreamingMeloSpeakerTTS": "model",
+    "AudioFrameEncoder": "audio_codec",
+    "IncrementalSentenceSegmenter": "segmenter",
+    "InferenceExecutor": "executor",
+    "LatencyStats": "metrics",
+    "MicroBatchScheduler": "scheduler",
+    "ModelPool": "model_pool",
+    "SpeakerRegistry": "speaker_registry",
+    "StreamingResampler": "resample",
+    "SynthesisPipeline": "pipeline",
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_modules[name]}"), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,89 @@
+import io
+import struct
+from typing import List
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:  # opus output is only offered when libsndfile can encode it
+    soundfile = None
+
+# sequence number, sample rate, codec, flags, padded to 12 bytes so that
+# float32 and int16 payloads stay aligned for clients that view them in place
+FRAME_HEADER = struct.Struct("<IIBB2x")
+FLAG_FINAL = 0x01
+
+CODECS = {"float32": 0, "int16": 1, "mulaw": 2, "opus": 3}
+# sample rates the opus encoder accepts
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def opus_available(sample_rate: int) -> bool:
+    if soundfile is None or sample_rate not in OPUS_SAMPLE_RATES:
+        return False
+    return "OPUS" in soundfile.available_subtypes("OGG")
+
+
+def available_formats(sample_rate: int) -> List[str]:
+    return [f for f in CODECS if f != "opus" or opus_available(sample_rate)]
+
+
+def negotiate_format(requested: str, sample_rate: int) -> str:
+    """The requested format if it can be produced here, int16 otherwise."""
+    if requested in available_formats(sample_rate):
+        return requested
+    return "int16"
+
+
+def mulaw_encode(audio: np.ndarray) -> np.ndarray:
+    """G.711 mu-law, one byte per sample."""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int32)
+    sign = np.where(pcm < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(pcm), 32635) + 0x84
+    exponent = np.clip(np.frexp(magnitude >> 7)[1] - 1, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+class AudioFrameEncoder:
+    """Encodes the audio chunks of one session into binary frames.
+
+    Every frame is a `FRAME_HEADER` followed by the chunk in the negotiated
+    format: little-endian float32 or int16 PCM, G.711 mu-law bytes or, for
+    opus, a complete OGG/Opus stream per chunk. Frames are numbered from 0 in
+    the order they are sent. A frame with `FLAG_FINAL` set, usually with an
+    empty payload, ends an utterance.
+    """
+
+    def __init__(self, output_format: str, sample_rate: int):
+        assert output_format in CODECS, f"unknown output format {output_format}"
+        self.output_format = output_format
+        self.sample_rate = sample_rate
+        self.sequence = 0
+
+    def _payload(self, audio: np.ndarray) -> bytes:
+        if len(audio) == 0:
+            return b""
+        if self.output_format == "float32":
+            return audio.astype("<f4").tobytes()
+        if self.output_format == "int16":
+            pcm = np.clip(audio, -1.0, 1.0) * 32767
+            return pcm.astype("<i2").tobytes()
+        if self.output_format == "mulaw":
+            return mulaw_encode(audio).tobytes()
+        buffer = io.BytesIO()
+        soundfile.write(
+            buffer, audio, self.sample_rate, format="OGG", subtype="OPUS"
+        )
+        return buffer.getvalue()
+
+    def encode(self, audio: np.ndarray, final: bool = False) -> bytes:
+        header = FRAME_HEADER.pack(
+            self.sequence,
+            self.sample_rate,
+            CODECS[self.output_format],
+            FLAG_FINAL if final else 0,
+        )
+        self.sequence += 1
+        return header + self._payload(np.asarray(audio, dtype=np.float32))
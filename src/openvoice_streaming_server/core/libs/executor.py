@@ -0,0 +1,57 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class InferenceExecutor:
+    """Run blocking model calls on a dedicated thread pool.
+
+    At most `max_workers` calls run at once and up to `max_pending` more may
+    wait for a free worker. Further callers are held on the event loop until a
+    slot frees up, so a saturated pool pushes back on the sessions feeding it
+    instead of growing an unbounded backlog. Cancelling the awaiting coroutine
+    (e.g. because its socket went away) drops the call if it has not started.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16):
+        assert max_workers >= 1, "max_workers must be at least 1"
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._cancelled = 0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+        async with self._slots:
+            self._in_flight += 1
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+            try:
+                result = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.cancel()
+                self._cancelled += 1
+                raise
+            finally:
+                self._in_flight -= 1
+            self._completed += 1
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": min(self._in_flight, self.max_workers),
+            "pending": max(self._in_flight - self.max_workers, 0),
+            "completed": self._completed,
+            "cancelled": self._cancelled,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
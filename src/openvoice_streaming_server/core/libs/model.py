@@ -1,3 +1,4 @@
+import functools
 import re
 import torch
 
@@ -15,36 +16,85 @@ class StreamingBaseSpeakerTTS(BaseSpeakerTTS):
         "chinese": "ZH",
     }
 
-    async def generate_audio_chunks(self, text, speaker, language="English", speed=1.0):
+    def get_sentence_inputs(self, text, language="English"):
         mark = self.language_marks.get(language.lower(), None)
         assert mark is not None, f"language {language} is not supported"
 
         texts = self.split_sentences_into_pieces(text, mark)
 
+        inputs = []
         for t in texts:
             t = re.sub(r"([a-z])([A-Z])", r"\1 \2", t)
             t = f"[{mark}]{t}[{mark}]"
-            stn_tst = self.get_text(t, self.hps, False)
-            device = self.device
-            speaker_id = self.hps.speakers[speaker]
-            with torch.no_grad():
-                x_tst = stn_tst.unsqueeze(0).to(device)
-                x_tst_lengths = torch.LongTensor([stn_tst.size(0)]).to(device)
-                sid = torch.LongTensor([speaker_id]).to(device)
-                audio = (
-                    self.model.infer(
-                        x_tst,
-                        x_tst_lengths,
-                        sid=sid,
-                        noise_scale=0.667,
-                        noise_scale_w=0.6,
-                        length_scale=1.0 / speed,
-                    )[0][0, 0]
-                    .data.cpu()
-                    .float()
-                    .numpy()
-                )
-                yield audio
+            inputs.append(self.get_text(t, self.hps, False))
+        return inputs
+
+    def infer_batch(self, sequences, speaker_ids, speed=1.0, generator=None):
+        device = self.device
+        x_lengths = torch.LongTensor([s.size(0) for s in sequences])
+        x = torch.zeros(len(sequences), int(x_lengths.max()), dtype=torch.long)
+        for i, s in enumerate(sequences):
+            x[i, : s.size(0)] = s
+        with torch.no_grad():
+            o, _, y_mask, _ = self.model.infer(
+                x.to(device),
+                x_lengths.to(device),
+                sid=torch.LongTensor(speaker_ids).to(device),
+                noise_scale=0.667,
+                noise_scale_w=0.6,
+                length_scale=1.0 / speed,
+                generator=generator,
+            )
+        # every item is padded to the longest one, trim each back to its own length
+        audio_lengths = (y_mask.sum([1, 2]).long() * self.hps.data.hop_length).tolist()
+        o = o[:, 0].data.cpu().float().numpy()
+        return [o[i, :n] for i, n in enumerate(audio_lengths)]
+
+    def run_scheduled_batch(self, speed, payloads):
+        sequences = [sequence for sequence, _ in payloads]
+        speaker_ids = [speaker_id for _, speaker_id in payloads]
+        return self.infer_batch(sequences, speaker_ids, speed=speed)
+
+    async def synthesize_sentence(
+        self,
+        stn_tst,
+        speaker_id,
+        speed=1.0,
+        scheduler=None,
+        executor=None,
+        generator=None,
+    ):
+        # a seeded sentence runs on its own, in a batch its noise would depend on its neighbours
+        if scheduler is not None and generator is None:
+            # sentences for the same model and speed share one forward pass
+            return await scheduler.submit((self, speed), (stn_tst, speaker_id))
+        if executor is not None:
+            audios = await executor.run(
+                self.infer_batch,
+                [stn_tst],
+                [speaker_id],
+                speed=speed,
+                generator=generator,
+            )
+            return audios[0]
+        return self.infer_batch(
+            [stn_tst], [speaker_id], speed=speed, generator=generator
+        )[0]
+
+    async def generate_audio_chunks(
+        self,
+        text,
+        speaker,
+        language="English",
+        speed=1.0,
+        scheduler=None,
+        executor=None,
+    ):
+        speaker_id = self.hps.speakers[speaker]
+        for stn_tst in self.get_sentence_inputs(text, language):
+            yield await self.synthesize_sentence(
+                stn_tst, speaker_id, speed, scheduler=scheduler, executor=executor
+            )
 
     async def tts_stream(self, text, speaker, language="English", speed=1.0):
         async for audio_chunk in self.generate_audio_chunks(
@@ -59,15 +109,7 @@ class StreamingCloneSpeakerTTS(ToneColorConverter):
         "chinese": "ZH",
     }
 
-    async def generate_audio_chunks(
-        self,
-        audio_data,
-        src_se,
-        tgt_se,
-        output_path=None,
-        tau=0.3,
-        message="default",
-    ):
+    def convert_audio(self, audio_data, src_se, tgt_se, tau=0.3, generator=None):
         hps = self.hps
         # load audio
         # audio, sample_rate = librosa.load(audio_data, sr=hps.data.sampling_rate)
@@ -87,21 +129,87 @@ class StreamingCloneSpeakerTTS(ToneColorConverter):
             spec_lengths = torch.LongTensor([spec.size(-1)]).to(self.device)
             audio = (
                 self.model.voice_conversion(
-                    spec, spec_lengths, sid_src=src_se, sid_tgt=tgt_se, tau=tau
+                    spec,
+                    spec_lengths,
+                    sid_src=src_se,
+                    sid_tgt=tgt_se,
+                    tau=tau,
+                    generator=generator,
                 )[0][0, 0]
                 .data.cpu()
                 .float()
                 .numpy()
             )
+        return audio
+
+    async def generate_audio_chunks(
+        self,
+        audio_data,
+        src_se,
+        tgt_se,
+        output_path=None,
+        tau=0.3,
+        message="default",
+        executor=None,
+        chunk_frames=None,
+        lookahead_frames=None,
+        generator=None,
+    ):
+        if not chunk_frames:
+            if executor is None:
+                audio = self.convert_audio(
+                    audio_data, src_se, tgt_se, tau=tau, generator=generator
+                )
+            else:
+                audio = await executor.run(
+                    self.convert_audio,
+                    audio_data,
+                    src_se,
+                    tgt_se,
+                    tau=tau,
+                    generator=generator,
+                )
             yield audio
+            return
+
+        # convert window by window so the first chunk does not wait for the whole clip
+        stream = self.convert_stream(
+            src_se,
+            tgt_se,
+            tau=tau,
+            chunk_frames=chunk_frames,
+            lookahead_frames=lookahead_frames,
+            generator=generator,
+        )
+        step = chunk_frames * self.hps.data.hop_length
+        steps = [
+            functools.partial(stream.feed, audio_data[i : i + step])
+            for i in range(0, len(audio_data), step)
+        ]
+        for fn in steps + [stream.finish]:
+            audio = fn() if executor is None else await executor.run(fn)
+            if len(audio) > 0:
+                yield audio
 
-    async def tts_stream(self, audio_data, src_se, tgt_se, output_path=None):
+    async def tts_stream(
+        self,
+        audio_data,
+        src_se,
+        tgt_se,
+        output_path=None,
+        executor=None,
+        chunk_frames=None,
+        lookahead_frames=None,
+    ):
         try:
             async for audio_chunk in self.generate_audio_chunks(
                 audio_data=audio_data,
                 src_se=src_se,
                 tgt_se=tgt_se,
                 output_path=output_path,
+                executor=executor,
+                chunk_frames=chunk_frames,
+                lookahead_frames=lookahead_frames,
             ):
                 yield audio_chunk.tobytes()
         except Exception as e:
@@ -109,16 +217,75 @@ class StreamingCloneSpeakerTTS(ToneColorConverter):
 
 
 class StreamingMeloSpeakerTTS(TTS):
-    language_marks = {
-        "english": "EN",
-        "chinese": "ZH",
-    }
+    def get_text_inputs(self, t):
+        # self.language is the checkpoint's own language, e.g. "EN" or "ZH_MIX_EN"
+        if self.language in ["EN", "ZH_MIX_EN"]:
+            t = re.sub(r"([a-z])([A-Z])", r"\1 \2", t)
+        return utils.get_text_for_tts_infer(
+            t,
+            self.language,
+            self.hps,
+            self.device,
+            self.symbol_to_id,
+            cache=self.feature_cache,
+        )
+
+    def get_sentence_inputs(self, text):
+        texts = self.split_sentences_into_pieces(text, self.language, quiet=True)
+        if self.language in ["EN", "ZH_MIX_EN"]:
+            texts = [re.sub(r"([a-z])([A-Z])", r"\1 \2", t) for t in texts]
+        # one BERT forward pass for all sentences of the request
+        return utils.get_texts_for_tts_infer(
+            texts,
+            self.language,
+            self.hps,
+            self.device,
+            self.symbol_to_id,
+            cache=self.feature_cache,
+        )
+
+    def infer_inputs(
+        self,
+        inputs,
+        speaker_id,
+        sdp_ratio=0.2,
+        noise_scale=0.6,
+        noise_scale_w=0.8,
+        speed=1.0,
+        generator=None,
+    ):
+        return self.infer_batch(
+            [inputs],
+            [speaker_id],
+            sdp_ratio,
+            noise_scale,
+            noise_scale_w,
+            speed,
+            generator=generator,
+        )[0]
+
+    def infer_sentence(
+        self,
+        t,
+        speaker_id,
+        sdp_ratio=0.2,
+        noise_scale=0.6,
+        noise_scale_w=0.8,
+        speed=1.0,
+    ):
+        return self.infer_inputs(
+            self.get_text_inputs(t),
+            speaker_id,
+            sdp_ratio,
+            noise_scale,
+            noise_scale_w,
+            speed,
+        )
 
     async def generate_audio_chunks(
         self,
         text,
         speaker_id,
-        language="English",
         sdp_ratio=0.2,
         noise_scale=0.6,
         noise_scale_w=0.8,
@@ -126,11 +293,9 @@ class StreamingMeloSpeakerTTS(TTS):
         pbar=None,
         position=None,
         quiet=False,
+        executor=None,
     ):
-        mark = self.language_marks.get(language.lower(), None)
-        assert mark is not None, f"language {language} is not supported"
-
-        texts = self.split_sentences_into_pieces(text, mark)
+        texts = self.split_sentences_into_pieces(text, self.language, quiet)
 
         if pbar:
             tx = pbar(texts)
@@ -142,42 +307,20 @@ class StreamingMeloSpeakerTTS(TTS):
             else:
                 tx = tqdm(texts)
         for t in tx:
-            if language in ["EN", "ZH_MIX_EN"]:
-                t = re.sub(r"([a-z])([A-Z])", r"\1 \2", t)
-            device = self.device
-            bert, ja_bert, phones, tones, lang_ids = utils.get_text_for_tts_infer(
-                t, language, self.hps, device, self.symbol_to_id
-            )
-            with torch.no_grad():
-                x_tst = phones.to(device).unsqueeze(0)
-                tones = tones.to(device).unsqueeze(0)
-                lang_ids = lang_ids.to(device).unsqueeze(0)
-                bert = bert.to(device).unsqueeze(0)
-                ja_bert = ja_bert.to(device).unsqueeze(0)
-                x_tst_lengths = torch.LongTensor([phones.size(0)]).to(device)
-                del phones
-                speakers = torch.LongTensor([speaker_id]).to(device)
-                audio = (
-                    self.model.infer(
-                        x_tst,
-                        x_tst_lengths,
-                        speakers,
-                        tones,
-                        lang_ids,
-                        bert,
-                        ja_bert,
-                        sdp_ratio=sdp_ratio,
-                        noise_scale=noise_scale,
-                        noise_scale_w=noise_scale_w,
-                        length_scale=1.0 / speed,
-                    )[0][0, 0]
-                    .data.cpu()
-                    .float()
-                    .numpy()
+            if executor is None:
+                audio = self.infer_sentence(
+                    t, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed
+                )
+            else:
+                audio = await executor.run(
+                    self.infer_sentence,
+                    t,
+                    speaker_id,
+                    sdp_ratio,
+                    noise_scale,
+                    noise_scale_w,
+                    speed,
                 )
-                del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers
-                #
-            # audio_list.append(audio)
             yield audio
 
     async def tts_stream(
@@ -193,20 +336,20 @@ class StreamingMeloSpeakerTTS(TTS):
         format=None,
         position=None,
         quiet=False,
+        executor=None,
     ):
         try:
             async for audio_chunk in self.generate_audio_chunks(
                 text=text,
                 speaker_id=speaker_id,
-                output_path=output_path,
                 sdp_ratio=sdp_ratio,
                 noise_scale=noise_scale,
                 noise_scale_w=noise_scale_w,
                 speed=speed,
                 pbar=pbar,
-                format=format,
                 position=position,
                 quiet=quiet,
+                executor=executor,
             ):
                 yield audio_chunk.tobytes()
         except Exception as e:
@@ -0,0 +1,126 @@
+import gc
+import itertools
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def model_nbytes(model) -> int:
+    """Bytes held by a model's parameters and buffers, and by its ONNX graphs."""
+    import torch
+
+    module = model if isinstance(model, torch.nn.Module) else model.model
+    tensors = itertools.chain(module.parameters(), module.buffers())
+    graphs = sum(getattr(m, "graph_nbytes", 0) for m in module.modules())
+    return sum(t.numel() * t.element_size() for t in tensors) + graphs
+
+
+class ModelPool:
+    """Models keyed by (engine, language), loaded on first use.
+
+    `loaders[engine](language)` builds a model. Once the resident models take
+    more than `memory_budget_mb`, the least recently used ones are dropped,
+    except those listed in `pinned` and the one just requested, so a single
+    model larger than the budget still loads. `sizeof` measures a model, by
+    default the bytes of its parameters and buffers; shared resources such as the BERT models
+    of the MeloTTS frontends are not counted. Callers that still hold an
+    evicted model keep it alive until they are done with it.
+    """
+
+    def __init__(
+        self,
+        loaders: Dict[str, Callable[[str], Any]],
+        memory_budget_mb: float,
+        pinned: Iterable[Tuple[str, str]] = (),
+        sizeof: Callable[[Any], int] = model_nbytes,
+    ):
+        self.loaders = loaders
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.pinned = set(pinned)
+        self.sizeof = sizeof
+        self._models = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+
+    def _lookup(self, key):
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+            self._hits += 1
+        return model
+
+    def get(self, engine: str, language: str):
+        """Return the model, loading it first if needed. Blocks while loading."""
+        if engine not in self.loaders:
+            raise KeyError(f"unknown engine {engine}")
+        key = (engine, language)
+        with self._lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            loading = self._loading.setdefault(key, threading.Lock())
+        # concurrent requests for the same model wait for a single load
+        with loading:
+            with self._lock:
+                model = self._lookup(key)
+                if model is not None:
+                    return model
+            logger.info(f"Loading {engine} model for {language}")
+            model = self.loaders[engine](language)
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = self.sizeof(model)
+                self._loading.pop(key, None)
+                self._loads += 1
+                evicted = self._evict(keep=key)
+        if evicted:
+            del evicted
+            gc.collect()
+            # torch is imported by then if the models use it
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return model
+
+    def _evict(self, keep):
+        evicted = []
+        for key in list(self._models):
+            if self.resident_bytes <= self.memory_budget:
+                break
+            if key == keep or key in self.pinned:
+                continue
+            logger.info(f"Evicting {key[0]} model for {key[1]}")
+            evicted.append(self._models.pop(key))
+            del self._sizes[key]
+            self._evictions += 1
+        return evicted
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def resident(self):
+        with self._lock:
+            return list(self._models)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_budget_mb": self.memory_budget / (1024 * 1024),
+                "resident_mb": self.resident_bytes / (1024 * 1024),
+                "resident": [
+                    {"engine": engine, "language": language, "mb": size / (1024 * 1024)}
+                    for (engine, language), size in self._sizes.items()
+                ],
+                "hits": self._hits,
+                "loads": self._loads,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable
+
+_END = object()
+
+
+class SynthesisPipeline:
+    """Three concurrent stages joined by bounded queues.
+
+    `frontend(request)` turns a request into sentence items, `synthesize(item)`
+    runs the base model on one item and `deliver(item, audio)` converts and
+    sends the result. Each stage works on its own sentence, so while sentence
+    N is being delivered sentence N+1 is already synthesizing and the gap
+    between chunks is bounded by the slowest stage rather than their sum. The
+    queues hold at most `queue_size` items, which stops a fast stage from
+    running arbitrarily far ahead of a slow one.
+    """
+
+    def __init__(
+        self,
+        frontend: Callable[[Any], Awaitable[Iterable[Any]]],
+        synthesize: Callable[[Any], Awaitable[Any]],
+        deliver: Callable[[Any, Any], Awaitable[None]],
+        queue_size: int = 2,
+    ):
+        self.frontend = frontend
+        self.synthesize = synthesize
+        self.deliver = deliver
+        self.queue_size = queue_size
+
+    async def run(self, requests: asyncio.Queue):
+        """Process requests until a `None` request is read, then drain."""
+        sentences = asyncio.Queue(maxsize=self.queue_size)
+        audio = asyncio.Queue(maxsize=self.queue_size)
+        stages = [
+            asyncio.create_task(self._frontend_stage(requests, sentences)),
+            asyncio.create_task(self._synthesis_stage(sentences, audio)),
+            asyncio.create_task(self._delivery_stage(audio)),
+        ]
+        try:
+            # a failing stage must not leave the others blocked on its queue
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for stage in done:
+                stage.result()
+        finally:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def _frontend_stage(self, requests: asyncio.Queue, sentences: asyncio.Queue):
+        while True:
+            request = await requests.get()
+            if request is None:
+                await sentences.put(_END)
+                return
+            for item in await self.frontend(request):
+                await sentences.put(item)
+
+    async def _synthesis_stage(self, sentences: asyncio.Queue, audio: asyncio.Queue):
+        while True:
+            item = await sentences.get()
+            if item is _END:
+                await audio.put(_END)
+                return
+            await audio.put((item, await self.synthesize(item)))
+
+    async def _delivery_stage(self, audio: asyncio.Queue):
+        while True:
+            entry = await audio.get()
+            if entry is _END:
+                return
+            item, samples = entry
+            await self.deliver(item, samples)
@@ -0,0 +1,97 @@
+import functools
+import math
+
+import numpy as np
+
+# the longest filter built, 22050 -> 48000 Hz needs about 11k taps
+MAX_KERNEL_TAPS = 1 << 16
+
+
+@functools.lru_cache(maxsize=16)
+def polyphase_kernel(src_rate: int, dst_rate: int, zero_crossings: int = 16):
+    """Kaiser windowed sinc low-pass for `src_rate` -> `dst_rate`, split into phases.
+
+    Returns `(phases, up, down, delay)`. Row `p` of `phases` holds the taps
+    applied to the most recent input samples, newest first, for output
+    samples that fall on phase `p` of the `up` times upsampled signal, and
+    `delay` is the filter's centre in upsampled samples.
+    """
+    g = math.gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    # cutoff just below the lower of the two nyquist rates, in cycles per upsampled sample
+    cutoff = 0.5 * 0.945 / max(up, down)
+    half = int(math.ceil(zero_crossings / (2 * cutoff)))
+    if 2 * half + 1 > MAX_KERNEL_TAPS:
+        raise ValueError(f"resampling {src_rate} -> {dst_rate} Hz needs too long a filter")
+    taps = np.arange(-half, half + 1)
+    h = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.kaiser(len(taps), 8.6) * up
+    n_taps = -(-len(h) // up)
+    h = np.pad(h, (0, n_taps * up - len(h)))
+    phases = np.ascontiguousarray(h.reshape(n_taps, up).T, dtype=np.float32)
+    phases.setflags(write=False)
+    return phases, up, down, half
+
+
+class StreamingResampler:
+    """Resample a stream of float32 chunks with a cached polyphase filter.
+
+    The last input samples are kept between calls, so splitting a signal
+    into chunks gives the same output as resampling it in one go. The filter
+    delay is compensated: output sample `n` lines up with input time
+    `n / dst_rate`. `flush` returns the tail and resets the stream.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        assert src_rate > 0 and dst_rate > 0, "sample rates must be positive"
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.phases, self.up, self.down, self.delay = polyphase_kernel(
+            src_rate, dst_rate
+        )
+        self.reset()
+
+    def reset(self):
+        n_taps = self.phases.shape[1]
+        # input history, the first sample in it is input index `self.start`
+        self.history = np.zeros(n_taps - 1, dtype=np.float32)
+        self.start = -(n_taps - 1)
+        self.received = 0
+        self.produced = 0
+
+    def _run(self, n_out: int) -> np.ndarray:
+        n_taps = self.phases.shape[1]
+        m = (self.produced + np.arange(n_out)) * self.down + self.delay
+        newest = m // self.up - self.start
+        window = newest[:, None] - np.arange(n_taps)[None, :]
+        out = np.einsum("ij,ij->i", self.phases[m % self.up], self.history[window])
+        self.produced += n_out
+        # keep only what the next output sample can still reach
+        next_newest = (self.produced * self.down + self.delay) // self.up
+        drop = min(max(next_newest - (n_taps - 1) - self.start, 0), len(self.history))
+        self.history = self.history[drop:]
+        self.start += drop
+        return out.astype(np.float32)
+
+    def _ready(self, received: int) -> int:
+        # outputs whose newest input sample has arrived
+        last = (received * self.up - 1 - self.delay) // self.down
+        return max(last + 1 - self.produced, 0)
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        if self.src_rate == self.dst_rate:
+            return np.asarray(audio, dtype=np.float32)
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        self.history = np.concatenate([self.history, audio])
+        self.received += len(audio)
+        return self._run(self._ready(self.received))
+
+    def flush(self) -> np.ndarray:
+        if self.src_rate == self.dst_rate:
+            return np.zeros(0, dtype=np.float32)
+        total = -(-self.received * self.up // self.down)
+        n_taps = self.phases.shape[1]
+        pad = self.delay // self.up + n_taps
+        self.history = np.concatenate([self.history, np.zeros(pad, dtype=np.float32)])
+        out = self._run(max(total - self.produced, 0))
+        self.reset()
+        return out
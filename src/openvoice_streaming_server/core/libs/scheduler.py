@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Job:
+    key: Hashable
+    payload: Any
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatchScheduler:
+    """Collect jobs from every open session and run them as one batch.
+
+    The first queued job opens a window of `max_wait_ms`; every job with the
+    same key that arrives inside that window (up to `max_batch_size`) is handed
+    to `run_batch(key, payloads)` together. `run_batch` must return one result
+    per payload, in order, and each result is routed back to its submitter.
+    Jobs with a different key are kept for the next window.
+
+    With an `executor`, batches run on its worker threads and no new window is
+    opened while every worker is busy, so jobs keep accumulating into the next
+    batch instead of queueing up as many small ones.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, Sequence[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        executor=None,
+    ):
+        assert max_batch_size >= 1, "max_batch_size must be at least 1"
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._deferred = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._workers: Optional[asyncio.Semaphore] = None
+        self._dispatches = set()
+
+        self._batches = 0
+        self._jobs = 0
+        self._largest_batch = 0
+        self._max_observed_wait_ms = 0.0
+        self._total_wait_ms = 0.0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+                workers = self.executor.max_workers if self.executor is not None else 1
+                self._workers = asyncio.Semaphore(workers)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop collecting jobs, finish the running batches and fail the queued jobs."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            self._deferred.append(self._queue.get_nowait())
+        while self._deferred:
+            job = self._deferred.popleft()
+            if not job.future.done():
+                job.future.set_exception(RuntimeError("MicroBatchScheduler was stopped"))
+
+    async def submit(self, key: Hashable, payload: Any) -> Any:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Job(key, payload, future, time.perf_counter()))
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._deferred)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self.queue_depth,
+            "batches": self._batches,
+            "jobs": self._jobs,
+            "largest_batch": self._largest_batch,
+            "mean_batch_size": self._jobs / self._batches if self._batches else 0.0,
+            "max_observed_wait_ms": self._max_observed_wait_ms,
+            "mean_wait_ms": self._total_wait_ms / self._jobs if self._jobs else 0.0,
+        }
+
+    async def _next_job(self) -> _Job:
+        if self._deferred:
+            return self._deferred.popleft()
+        return await self._queue.get()
+
+    def _take_deferred(self, key: Hashable, batch: List[_Job]):
+        remaining = deque()
+        while self._deferred:
+            job = self._deferred.popleft()
+            if job.key == key and len(batch) < self.max_batch_size:
+                batch.append(job)
+            else:
+                remaining.append(job)
+        self._deferred = remaining
+
+    async def _collect(self) -> List[_Job]:
+        loop = asyncio.get_running_loop()
+        first = await self._next_job()
+        batch = [first]
+        self._take_deferred(first.key, batch)
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+        try:
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if job.key == first.key:
+                    batch.append(job)
+                else:
+                    self._deferred.append(job)
+        except asyncio.CancelledError:
+            # stopped inside the window, the collected jobs go back in line
+            self._deferred.extendleft(reversed(batch))
+            raise
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._workers.acquire()
+            dispatched = False
+            try:
+                batch = await self._collect()
+                # submitters that were cancelled while queued (e.g. closed sockets)
+                batch = [job for job in batch if not job.future.done()]
+                if batch:
+                    task = asyncio.create_task(self._dispatch(batch))
+                    self._dispatches.add(task)
+                    task.add_done_callback(self._dispatches.discard)
+                    dispatched = True
+            finally:
+                # a dispatched batch releases the worker when it is done
+                if not dispatched:
+                    self._workers.release()
+
+    async def _dispatch(self, batch: List[_Job]):
+        try:
+            await self._run_batch(batch)
+        finally:
+            self._workers.release()
+
+    async def _run_batch(self, batch: List[_Job]):
+        now = time.perf_counter()
+        for job in batch:
+            wait_ms = (now - job.enqueued_at) * 1000.0
+            self._total_wait_ms += wait_ms
+            self._max_observed_wait_ms = max(self._max_observed_wait_ms, wait_ms)
+        self._batches += 1
+        self._jobs += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+
+        try:
+            key, payloads = batch[0].key, [job.payload for job in batch]
+            if self.executor is None:
+                results = self.run_batch(key, payloads)
+            else:
+                results = await self.executor.run(self.run_batch, key, payloads)
+            assert len(results) == len(batch), "run_batch must return one result per job"
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} jobs failed: {e}")
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            return
+
+        for job, result in zip(batch, results):
+            if not job.future.done():
+                job.future.set_result(result)
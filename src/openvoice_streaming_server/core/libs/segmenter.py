@@ -0,0 +1,63 @@
+import re
+from typing import List
+
+from MeloTTS.melo.split_utils import split_sentence
+
+# a terminator only counts once the next character has arrived, so "3." in
+# "3.5" or a token cut mid-abbreviation is not taken as the end of a sentence
+_SENTENCE_END = re.compile(r"[.!?;]+[\"')\]]*\s|[。！？；]+")
+_CLAUSE_END = re.compile(r"[,:]\s|[，：、]")
+
+
+class IncrementalSentenceSegmenter:
+    """Turn a stream of text deltas into speakable pieces.
+
+    `push` buffers each delta and returns whatever became speakable: every
+    complete sentence, plus a trailing clause once it is `min_clause_words`
+    long (characters for non-latin languages, as in `split_sentences_zh`).
+    A buffer that grows past `max_chars` with no boundary at all is cut at
+    its last space. `flush` returns everything that is left. Released text
+    is split with `split_sentence`, the same splitter used for full texts.
+    """
+
+    latin_languages = ["EN", "FR", "ES", "SP"]
+
+    def __init__(self, language_str="EN", min_clause_words=4, max_chars=200):
+        self.language_str = language_str
+        self.min_clause_words = min_clause_words
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def _length(self, text):
+        if self.language_str in self.latin_languages:
+            return len(text.split())
+        return len(text.strip())
+
+    def _boundary(self):
+        end = 0
+        for m in _SENTENCE_END.finditer(self.buffer):
+            end = m.end()
+        for m in _CLAUSE_END.finditer(self.buffer, end):
+            if self._length(self.buffer[end : m.end()]) >= self.min_clause_words:
+                end = m.end()
+        if len(self.buffer) - end > self.max_chars:
+            space = self.buffer.rfind(" ", end)
+            end = space + 1 if space > end else len(self.buffer)
+        return end
+
+    def _split(self, text) -> List[str]:
+        if not text.strip():
+            return []
+        return [s for s in split_sentence(text, language_str=self.language_str) if s.strip()]
+
+    def push(self, delta: str) -> List[str]:
+        self.buffer += delta
+        end = self._boundary()
+        if end == 0:
+            return []
+        ready, self.buffer = self.buffer[:end], self.buffer[end:]
+        return self._split(ready)
+
+    def flush(self) -> List[str]:
+        ready, self.buffer = self.buffer, ""
+        return self._split(ready)
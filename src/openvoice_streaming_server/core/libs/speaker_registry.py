@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import torch
+
+# speaker ids are speaker_id_for hashes, nothing else may reach a file path
+_SPEAKER_ID = re.compile(r"[0-9a-f]{16}")
+AUDIO_SUFFIXES = (".wav", ".mp3", ".flac", ".ogg", ".m4a")
+
+
+class SpeakerRegistry:
+    """Tone-color embeddings keyed by the content hash of their reference clip.
+
+    Registering a clip runs `se_extractor.get_se` once and stores the result
+    as `<cache_dir>/<speaker_id>.pth`; registering the same bytes again is a
+    disk lookup. The `capacity` most recently used embeddings stay on the
+    converter's device so requests can pick a speaker with no extraction or
+    loading cost. Speakers may also be given a name, kept in `index.json`.
+    torch and the extractor are imported on first use, so ids and names
+    resolve without them.
+    """
+
+    def __init__(self, clone_model, cache_dir: str, capacity: int = 32):
+        assert capacity >= 1, "capacity must be at least 1"
+        self.clone_model = clone_model
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        self._embeddings = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._names = self._load_index()
+
+    @staticmethod
+    def speaker_id_for(audio: bytes) -> str:
+        return hashlib.sha256(audio).hexdigest()[:16]
+
+    def _se_path(self, speaker_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{speaker_id}.pth")
+
+    def _load_index(self) -> Dict[str, str]:
+        if not os.path.isfile(self._index_path):
+            return {}
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self):
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._names, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def register(
+        self, audio: bytes, name: Optional[str] = None, suffix: str = ".wav", vad=True
+    ) -> str:
+        suffix = suffix.lower()
+        if suffix not in AUDIO_SUFFIXES:
+            raise ValueError(f"unsupported clip suffix {suffix}")
+        import torch
+        from openvoice import se_extractor
+
+        speaker_id = self.speaker_id_for(audio)
+        se_path = self._se_path(speaker_id)
+        if not os.path.isfile(se_path):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                clip_path = os.path.join(tmp_dir, f"{speaker_id}{suffix}")
+                with open(clip_path, "wb") as f:
+                    f.write(audio)
+                se, _ = se_extractor.get_se(
+                    clip_path, self.clone_model, target_dir=tmp_dir, vad=vad
+                )
+            tmp_path = f"{se_path}.tmp"
+            torch.save(se.cpu(), tmp_path)
+            os.replace(tmp_path, se_path)
+            self._put(speaker_id, se.to(self.clone_model.device))
+
+        if name is not None:
+            with self._lock:
+                self._names[name] = speaker_id
+                self._save_index()
+        return speaker_id
+
+    def register_file(self, path: str, name: Optional[str] = None, vad=True) -> str:
+        with open(path, "rb") as f:
+            audio = f.read()
+        return self.register(audio, name=name, suffix=os.path.splitext(path)[1], vad=vad)
+
+    def resolve(self, speaker: str) -> str:
+        """The speaker id of a registered name or id, KeyError for anything else."""
+        speaker_id = self._names.get(speaker)
+        if speaker_id is None:
+            if not isinstance(speaker, str) or not _SPEAKER_ID.fullmatch(speaker):
+                raise KeyError(f"speaker {speaker} is not registered")
+            speaker_id = speaker
+        if not os.path.isfile(self._se_path(speaker_id)):
+            raise KeyError(f"speaker {speaker} is not registered")
+        return speaker_id
+
+    def get(self, speaker: str) -> "torch.Tensor":
+        speaker_id = self.resolve(speaker)
+        with self._lock:
+            se = self._embeddings.get(speaker_id)
+            if se is not None:
+                self._embeddings.move_to_end(speaker_id)
+                self._hits += 1
+                return se
+            self._misses += 1
+        import torch
+
+        se = torch.load(self._se_path(speaker_id), map_location=self.clone_model.device)
+        self._put(speaker_id, se)
+        return se
+
+    def _put(self, speaker_id: str, se: "torch.Tensor"):
+        with self._lock:
+            self._embeddings[speaker_id] = se
+            self._embeddings.move_to_end(speaker_id)
+            while len(self._embeddings) > self.capacity:
+                self._embeddings.popitem(last=False)
+
+    def speakers(self) -> List[Dict[str, Any]]:
+        names = {}
+        for name, speaker_id in self._names.items():
+            names.setdefault(speaker_id, []).append(name)
+        return [
+            {"speaker_id": speaker_id, "names": names.get(speaker_id, [])}
+            for speaker_id in sorted(
+                f[: -len(".pth")] for f in os.listdir(self.cache_dir) if f.endswith(".pth")
+            )
+        ]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "resident": len(self._embeddings),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
@@ -1,3 +1,16 @@
-from openvoice_streaming_server.core.schemas.synthesize_schema import SynthesisRequest, SynthesisResponse
+from openvoice_streaming_server.core.schemas.speaker_schema import SpeakerInfo, SpeakerRegistration
+from openvoice_streaming_server.core.schemas.synthesize_schema import (
+    OutputFormat,
+    SynthesisError,
+    SynthesisRequest,
+    SynthesisResponse,
+)
 
-__all__ = ["SynthesisRequest", "SynthesisResponse"]
+__all__ = [
+    "OutputFormat",
+    "SpeakerInfo",
+    "SpeakerRegistration",
+    "SynthesisError",
+    "SynthesisRequest",
+    "SynthesisResponse",
+]
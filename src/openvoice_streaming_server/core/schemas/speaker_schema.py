@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List, Optional, Text
+
+
+class SpeakerRegistration(BaseModel):
+    speaker_id: Text
+    name: Optional[Text] = None
+
+
+class SpeakerInfo(BaseModel):
+    speaker_id: Text
+    names: List[Text] = []
@@ -1,13 +1,42 @@
 from pydantic import BaseModel
-from typing import Optional, Text
+from typing import Literal, Optional, Text
 
 
 class SynthesisRequest(BaseModel):
-    text: Text
+    # "text" synthesizes `text` as a whole, "delta" appends `text` to the
+    # utterance being streamed, "flush" finishes that utterance and "end"
+    # also closes the session once everything queued has been sent
+    event: Literal['text', 'delta', 'flush', 'end'] = 'text'
+    text: Text = ''
     speaker: Optional[Text] = 'default'
     language: Optional[Text] = 'english'
     speed: Optional[float] = 1.0
+    target_speaker: Optional[Text] = 'default'
+    # defaults to openvoice for english and chinese and to melo otherwise
+    engine: Optional[Literal['openvoice', 'melo']] = None
+    # binary frame format, only read from the first request of a session;
+    # without it the session gets raw float32 samples with no header
+    output_format: Optional[Literal['float32', 'int16', 'mulaw', 'opus']] = None
+    # e.g. 8000 or 16000 for telephony, also only read from the first request
+    output_sample_rate: Optional[Literal[8000, 16000, 22050, 24000, 44100, 48000]] = None
+    # makes the synthesis reproducible; seeded "text" requests are also cached,
+    # so repeating one replays the stored audio instead of running the models
+    seed: Optional[int] = None
 
 
 class SynthesisResponse(BaseModel):
     audio_chunk: bytes
+
+
+class OutputFormat(BaseModel):
+    event: Literal['format'] = 'format'
+    output_format: Text
+    sample_rate: int
+    header_size: int
+
+
+class SynthesisError(BaseModel):
+    # sent for a request that cannot be synthesized, e.g. an unknown
+    # target_speaker or language; the session stays open for the next one
+    event: Literal['error'] = 'error'
+    message: Text
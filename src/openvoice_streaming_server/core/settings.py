@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,5 +9,70 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     LOG_LEVEL: str = "info"
 
+    # micro-batching of sentence jobs across all open sessions
+    BATCH_MAX_SIZE: int = 8
+    BATCH_MAX_WAIT_MS: float = 10.0
+
+    # thread pool that runs model inference off the event loop
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_PENDING: int = 16
+
+    # sentences buffered between the frontend, base TTS and conversion stages
+    PIPELINE_QUEUE_SIZE: int = 2
+
+    # server-side segmentation of streamed text deltas
+    SEGMENTER_MIN_CLAUSE_WORDS: int = 4
+    SEGMENTER_MAX_CHARS: int = 200
+
+    # tone-color embeddings of registered target speakers
+    SPEAKER_CACHE_DIR: str = "../resources/speakers"
+    SPEAKER_CACHE_SIZE: int = 32
+    SOURCE_SPEAKER_PATH: str = "../resources/Source.mp3"
+    DEFAULT_TARGET_SPEAKER_PATH: str = "../resources/Abdulla.mp3"
+
+    # base TTS models, loaded on first use and evicted past the budget
+    MODEL_MEMORY_BUDGET_MB: float = 2048
+    OPENVOICE_CHECKPOINT_DIR: str = "../resources/checkpoints/base_speakers"
+    CONVERTER_CHECKPOINT_DIR: str = "../resources/checkpoints/converter"
+    MELO_SES_DIR: str = "../resources/checkpoints_v2/base_speakers/ses"
+    # fold weight norms and drop training-only modules of every loaded model
+    OPTIMIZE_FOR_INFERENCE: bool = True
+    # run the models through torch.compile, a directory keeps the compiled
+    # kernels so that restarts skip most of the compilation
+    COMPILE_MODELS: bool = False
+    COMPILE_CACHE_DIR: Optional[str] = None
+    # graphs written by export_onnx, run by ONNX Runtime instead of torch:
+    # converter/ for the tone color converter, melo/<language>/ per melo model.
+    # ONNX_THREADS sets the intra-op threads of every session, 0 for the default
+    ONNX_DIR: Optional[str] = None
+    ONNX_THREADS: int = 0
+
+    # phonemes and BERT features of repeated sentences, shared by all melo models;
+    # a directory adds an on-disk tier that worker processes can share, bounded
+    # by FEATURE_CACHE_DISK_MB
+    FEATURE_CACHE_SIZE: int = 256
+    FEATURE_CACHE_DIR: Optional[str] = None
+    FEATURE_CACHE_DISK_MB: float = 1024
+    # pronunciations predicted for english words missing from the CMU dict,
+    # appended here and read back by every worker, so a word is predicted once
+    LEARNED_LEXICON_PATH: Optional[str] = None
+    # processes that the sentences of long chinese texts are spread over, 0 for none
+    ZH_FRONTEND_WORKERS: int = 0
+
+    # converted audio of seeded requests, replayed without running the models;
+    # a directory adds an on-disk tier bounded by AUDIO_CACHE_DISK_MB
+    AUDIO_CACHE_MEMORY_MB: float = 64
+    AUDIO_CACHE_DIR: Optional[str] = None
+    AUDIO_CACHE_DISK_MB: float = 1024
+
+    # windowed tone-color conversion, in spectrogram frames (0 converts whole sentences,
+    # which the server always has). The lookahead defaults to the converter's
+    # receptive field; less lowers latency but leaves seams between windows
+    CONVERSION_CHUNK_FRAMES: int = 0
+    CONVERSION_LOOKAHEAD_FRAMES: Optional[int] = None
+
     class Config:
         env_file = ".env"
+
+
+settings = Settings()
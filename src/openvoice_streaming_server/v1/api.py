@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
-from openvoice_streaming_server.v1.endpoints import synthesize
+from openvoice_streaming_server.v1.endpoints import speakers, synthesize
 
 router = APIRouter()
 router.include_router(synthesize.router)
+router.include_router(speakers.router)
 api_router = APIRouter()
 api_router.include_router(router, prefix="/api")
@@ -0,0 +1,33 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+
+from openvoice_streaming_server.core.schemas import SpeakerInfo, SpeakerRegistration
+from openvoice_streaming_server.v1.endpoints.synthesize import executor, speaker_registry
+
+router = APIRouter()
+
+
+@router.post("/speakers", response_model=SpeakerRegistration)
+async def register_speaker(
+    request: Request, name: Optional[str] = None, suffix: str = ".wav"
+):
+    """Register the reference clip sent as the raw request body."""
+    audio = await request.body()
+    if not audio:
+        raise HTTPException(status_code=400, detail="empty reference clip")
+    try:
+        speaker_id = await executor.run(
+            speaker_registry.register, audio, name=name, suffix=suffix
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (AssertionError, NotImplementedError) as e:
+        # se_extractor rejects clips that are too short or have no speech
+        raise HTTPException(status_code=422, detail=f"could not extract speaker: {e}")
+    return SpeakerRegistration(speaker_id=speaker_id, name=name)
+
+
+@router.get("/speakers", response_model=List[SpeakerInfo])
+async def list_speakers():
+    return speaker_registry.speakers()
@@ -1,16 +1,41 @@
+import asyncio
+import functools
 import logging
+import os
+import time
+import numpy as np
 import torch
+from dataclasses import dataclass
+from typing import Any, List, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from starlette.websockets import WebSocketState
-from MeloTTS.melo.api import TTS
+from MeloTTS.melo.audio_cache import AudioCache, checkpoint_hash
+from MeloTTS.melo.feature_cache import FeatureCache
+from MeloTTS.melo.text import english
+from MeloTTS.melo.text.cleaner import warmup
 
 from openvoice_streaming_server.core.libs import (
+    AudioFrameEncoder,
+    IncrementalSentenceSegmenter,
+    InferenceExecutor,
+    LatencyStats,
+    MicroBatchScheduler,
+    ModelPool,
+    SpeakerRegistry,
+    StreamingResampler,
     StreamingBaseSpeakerTTS,
     StreamingCloneSpeakerTTS,
     StreamingMeloSpeakerTTS,
+    SynthesisPipeline,
 )
-from openvoice_streaming_server.core.schemas import SynthesisRequest, SynthesisResponse
-from openvoice import se_extractor
+from openvoice_streaming_server.core.libs.audio_codec import FRAME_HEADER, negotiate_format
+from openvoice_streaming_server.core.schemas import (
+    OutputFormat,
+    SynthesisError,
+    SynthesisRequest,
+    SynthesisResponse,
+)
+from openvoice_streaming_server.core.settings import settings
 
 router = APIRouter()
 
@@ -31,28 +56,107 @@ async def send_audio_stream(websocket: WebSocket, audio_stream):
         pass
 
 
+@dataclass
+class Utterance:
+    mode: str
+    started_at: float
+    first_audio_at: Optional[float] = None
+
+
+@dataclass
+class Recording:
+    """Converted audio of a seeded request, collected for the audio cache."""
+
+    key: str
+    chunks: List[Any]
+
+
+@dataclass
+class Sentence:
+    request: SynthesisRequest
+    model: Any
+    speaker_id: int
+    # None for the empty sentence that only carries an utterance's final flag
+    inputs: Any
+    source_se: Any
+    target_se: Any
+    utterance: Utterance
+    final: bool
+    # converted audio replayed from the audio cache, skips both models
+    cached: Any = None
+    recording: Optional[Recording] = None
+
+
+@dataclass
+class Session:
+    websocket: WebSocket
+    encoder: Optional[AudioFrameEncoder] = None
+    resampler: Optional[StreamingResampler] = None
+    negotiated: bool = False
+
+    async def send_audio(self, audio, final=False):
+        if self.resampler is not None:
+            audio = self.resampler.process(audio)
+            if final:
+                # the filter tail belongs to this utterance, the next starts from silence
+                audio = np.concatenate([audio, self.resampler.flush()])
+        if self.encoder is None:
+            # legacy clients get raw float32 samples and no end-of-utterance frame
+            if len(audio) > 0:
+                await self.websocket.send_bytes(audio.astype(np.float32).tobytes())
+            return
+        await self.websocket.send_bytes(self.encoder.encode(audio, final=final))
+
+
+# request language -> checkpoint language, per engine
+LANGUAGES = {
+    "openvoice": {"english": "EN", "chinese": "ZH"},
+    "melo": {
+        "english": "EN_V2",
+        "spanish": "ES",
+        "french": "FR",
+        "chinese": "ZH",
+        "japanese": "JP",
+        "korean": "KR",
+    },
+}
+
+
 class WebSocketHandler:
-    def __init__(self, tts_model, clone_model, melo_model, device):
-        self.model = tts_model
+    def __init__(
+        self,
+        models,
+        clone_model,
+        device,
+        speaker_registry,
+        scheduler=None,
+        executor=None,
+        audio_cache=None,
+    ):
+        self.models = models
         self.clone_model = clone_model
+        self.speaker_registry = speaker_registry
+        self.scheduler = scheduler
+        self.executor = executor
+        self.audio_cache = audio_cache
         self.connections = set()
+        # time from the first text of an utterance to its first audio chunk
+        self.time_to_first_audio = {"full": LatencyStats(), "incremental": LatencyStats()}
         # self.source_se = torch.load(
         #     "../resources/checkpoints/base_speakers/EN/en_default_se.pth"
         # ).to(self.model.device)
-        source_speaker = "../resources/Source.mp3"
-        refrence_speaker = "../resources/Abdulla.mp3"
-        self.source_se, audio_name = se_extractor.get_se(
-            source_speaker, self.clone_model, vad=True
-        )
-        self.target_se, audio_name = se_extractor.get_se(
-            refrence_speaker, self.clone_model, vad=True
-        )
-        self.melo_model = melo_model
-        self.melo_source_se = torch.load(
-            "../resources/checkpoints_v2/base_speakers/ses/en-india.pth",
-            map_location=device,
+        # set by register_default_speakers when the server starts
+        self.source_se = None
+        # tone-color embeddings of the other base speakers, by file name
+        self.base_ses = {}
+
+    def register_default_speakers(self):
+        """Registers the source and default speakers, extracting them on the first start only."""
+        self.speaker_registry.register_file(settings.SOURCE_SPEAKER_PATH, name="source")
+        self.speaker_registry.register_file(
+            settings.DEFAULT_TARGET_SPEAKER_PATH, name="default"
         )
-        # self.speaker_ids = self.model.hps.data.spk2id
+        self.source_se = self.speaker_registry.get("source")
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -61,44 +165,354 @@ class WebSocketHandler:
     async def disconnect(self, websocket: WebSocket):
         if websocket.client_state != WebSocketState.DISCONNECTED:
             await websocket.close()
-            self.connections.remove(websocket)
+        self.connections.discard(websocket)
+
+    @staticmethod
+    def model_key(request: SynthesisRequest):
+        language = (request.language or "").lower()
+        engine = request.engine
+        if engine is None:
+            engine = "openvoice" if language in LANGUAGES["openvoice"] else "melo"
+        if language not in LANGUAGES[engine]:
+            raise ValueError(f"language {request.language} is not supported by {engine}")
+        return engine, LANGUAGES[engine][language]
+
+    def request_error(self, request: SynthesisRequest) -> Optional[str]:
+        """Why `request` cannot be synthesized, None when it can."""
+        try:
+            self.model_key(request)
+            self.speaker_registry.resolve(request.target_speaker)
+        except (KeyError, ValueError) as e:
+            return e.args[0]
+        return None
+
+    @staticmethod
+    async def send_error(websocket: WebSocket, message: str):
+        if websocket.client_state != WebSocketState.CONNECTED:
+            return
+        try:
+            await websocket.send_text(SynthesisError(message=message).json())
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    def base_se(self, path):
+        se = self.base_ses.get(path)
+        if se is None:
+            se = torch.load(path, map_location=self.clone_model.device)
+            self.base_ses[path] = se
+        return se
+
+    def base_speaker(self, engine, language, model, speaker):
+        """Speaker id in the base model and the tone color it is converted from."""
+        if engine == "openvoice":
+            speaker_id = model.hps.speakers[speaker]
+            if language == "EN":
+                return speaker_id, self.source_se
+            checkpoint_dir = os.path.join(settings.OPENVOICE_CHECKPOINT_DIR, language)
+            return speaker_id, self.base_se(
+                os.path.join(checkpoint_dir, f"{language.lower()}_default_se.pth")
+            )
+        spk2id = model.hps.data.spk2id
+        if speaker not in spk2id:
+            speaker = next(iter(spk2id))
+        se_name = speaker.lower().replace("_", "-")
+        return spk2id[speaker], self.base_se(
+            os.path.join(settings.MELO_SES_DIR, f"{se_name}.pth")
+        )
+
+    def audio_cache_key(self, request: SynthesisRequest, engine, language, model):
+        """Every input that shapes the converted audio of a seeded request."""
+        return self.audio_cache.key(
+            engine=engine,
+            language=language,
+            checkpoint=checkpoint_hash(model.model),
+            speaker=request.speaker,
+            speed=request.speed,
+            seed=request.seed,
+            text=request.text,
+            target_speaker=self.speaker_registry.resolve(request.target_speaker),
+            converter=checkpoint_hash(self.clone_model.model),
+            chunk_frames=settings.CONVERSION_CHUNK_FRAMES,
+            lookahead_frames=settings.CONVERSION_LOOKAHEAD_FRAMES,
+        )
+
+    async def prepare_sentences(self, job):
+        request, utterance, final = job
+        loop = asyncio.get_running_loop()
+        # a speaker that is not resident is loaded from disk
+        target_se = await loop.run_in_executor(
+            None, self.speaker_registry.get, request.target_speaker
+        )
+        engine, language = self.model_key(request)
+        # the first request for a language waits here while its model loads
+        model = await loop.run_in_executor(None, self.models.get, engine, language)
+        speaker_id, source_se = self.base_speaker(
+            engine, language, model, request.speaker
+        )
+        recording = None
+        # only whole requests are cached, clauses of a delta stream depend on its timing
+        if (
+            self.audio_cache is not None
+            and request.seed is not None
+            and utterance.mode == "full"
+            and request.text.strip()
+        ):
+            # hashes the checkpoints the first time a model is seen
+            key = await loop.run_in_executor(
+                None, self.audio_cache_key, request, engine, language, model
+            )
+            cached = self.audio_cache.get(key)
+            if cached is not None:
+                return [
+                    Sentence(
+                        request,
+                        model,
+                        speaker_id,
+                        None,
+                        source_se,
+                        target_se,
+                        utterance,
+                        final,
+                        cached=cached,
+                    )
+                ]
+            recording = Recording(key, [])
+        sentences = []
+        if request.text.strip():
+            if engine == "openvoice":
+                sentences = await loop.run_in_executor(
+                    None, model.get_sentence_inputs, request.text, request.language
+                )
+            else:
+                sentences = await loop.run_in_executor(
+                    None, model.get_sentence_inputs, request.text
+                )
+        if final and not sentences:
+            # nothing left to say, but the client still gets its final frame
+            sentences = [None]
+        return [
+            Sentence(
+                request,
+                model,
+                speaker_id,
+                inputs,
+                source_se,
+                target_se,
+                utterance,
+                final and i == len(sentences) - 1,
+                recording=recording,
+            )
+            for i, inputs in enumerate(sentences)
+        ]
+
+    @staticmethod
+    def generator(request: SynthesisRequest):
+        if request.seed is None:
+            return None
+        # every sentence starts from the seed, so a sentence sounds the same wherever it occurs
+        return torch.Generator().manual_seed(request.seed)
+
+    async def synthesize_sentence(self, sentence: Sentence):
+        if sentence.cached is not None:
+            return sentence.cached
+        if sentence.inputs is None:
+            return np.zeros(0, dtype=np.float32)
+        model = sentence.model
+        generator = self.generator(sentence.request)
+        if not isinstance(model, StreamingMeloSpeakerTTS):
+            return await model.synthesize_sentence(
+                sentence.inputs,
+                sentence.speaker_id,
+                sentence.request.speed,
+                scheduler=self.scheduler,
+                executor=self.executor,
+                generator=generator,
+            )
+        infer = functools.partial(
+            model.infer_inputs,
+            sentence.inputs,
+            sentence.speaker_id,
+            speed=sentence.request.speed,
+            generator=generator,
+        )
+        audio = infer() if self.executor is None else await self.executor.run(infer)
+        # melo models run at 44.1kHz, the converter at 22.05kHz
+        sample_rate = self.clone_model.hps.data.sampling_rate
+        if model.hps.data.sampling_rate != sample_rate:
+            resampler = StreamingResampler(model.hps.data.sampling_rate, sample_rate)
+            audio = np.concatenate([resampler.process(audio), resampler.flush()])
+        return audio
+
+    async def converted_chunks(self, sentence: Sentence, audio_chunk):
+        if sentence.cached is not None:
+            # replayed in the same chunk sizes the converter would have produced
+            step = (
+                settings.CONVERSION_CHUNK_FRAMES * self.clone_model.hps.data.hop_length
+                or max(len(audio_chunk), 1)
+            )
+            for i in range(0, len(audio_chunk), step):
+                yield np.asarray(audio_chunk[i : i + step], dtype=np.float32)
+            return
+        async for cloned_chunk in self.clone_model.generate_audio_chunks(
+            audio_chunk,
+            sentence.source_se,
+            sentence.target_se,
+            executor=self.executor,
+            chunk_frames=settings.CONVERSION_CHUNK_FRAMES,
+            lookahead_frames=settings.CONVERSION_LOOKAHEAD_FRAMES,
+            generator=self.generator(sentence.request),
+        ):
+            if sentence.recording is not None:
+                sentence.recording.chunks.append(cloned_chunk)
+            yield cloned_chunk
+
+    async def deliver_audio(self, session: Session, sentence: Sentence, audio_chunk):
+        utterance = sentence.utterance
+        if len(audio_chunk) > 0:
+            async for cloned_chunk in self.converted_chunks(sentence, audio_chunk):
+                await session.send_audio(cloned_chunk)
+                if utterance.first_audio_at is None:
+                    utterance.first_audio_at = time.perf_counter()
+                    self.time_to_first_audio[utterance.mode].record(
+                        (utterance.first_audio_at - utterance.started_at) * 1000.0
+                    )
+        recording = sentence.recording
+        if sentence.final and recording is not None and recording.chunks:
+            self.audio_cache.put(recording.key, np.concatenate(recording.chunks))
+        if sentence.final:
+            await session.send_audio(np.zeros(0, dtype=np.float32), final=True)
+
+    async def negotiate(self, session: Session, request: SynthesisRequest):
+        session.negotiated = True
+        sample_rate = self.clone_model.hps.data.sampling_rate
+        if request.output_sample_rate not in (None, sample_rate):
+            session.resampler = StreamingResampler(
+                sample_rate, request.output_sample_rate
+            )
+            sample_rate = request.output_sample_rate
+        if request.output_format is None:
+            return
+        session.encoder = AudioFrameEncoder(
+            negotiate_format(request.output_format, sample_rate), sample_rate
+        )
+        await session.websocket.send_text(
+            OutputFormat(
+                output_format=session.encoder.output_format,
+                sample_rate=sample_rate,
+                header_size=FRAME_HEADER.size,
+            ).json()
+        )
+
+    def new_segmenter(self, request: SynthesisRequest):
+        _, language = self.model_key(request)
+        return IncrementalSentenceSegmenter(
+            language.split("_")[0],
+            min_clause_words=settings.SEGMENTER_MIN_CLAUSE_WORDS,
+            max_chars=settings.SEGMENTER_MAX_CHARS,
+        )
 
     async def handle_websocket(self, websocket: WebSocket):
         await self.connect(websocket)
+        # synthesis runs next to the receive loop so that a disconnect is
+        # noticed right away and the session's queued inference is cancelled
+        requests = asyncio.Queue()
+        session = Session(websocket)
+        pipeline = SynthesisPipeline(
+            self.prepare_sentences,
+            self.synthesize_sentence,
+            functools.partial(self.deliver_audio, session),
+            queue_size=settings.PIPELINE_QUEUE_SIZE,
+        )
+        worker = asyncio.create_task(pipeline.run(requests))
+        receive = None
+        # state of the utterance being streamed as text deltas
+        utterance = None
+        segmenter = None
         try:
             # source_se = "checkpoints/base_speakers/EN/en_default_se.pth"
             while True:
-                data = await websocket.receive_text()
-                request = SynthesisRequest.parse_raw(data)
-                if request.text == "":
-                    await self.disconnect(websocket)
+                receive = asyncio.create_task(websocket.receive_text())
+                done, _ = await asyncio.wait(
+                    {receive, worker}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if worker in done:
+                    receive.cancel()
+                    worker.result()
+                    return
+                try:
+                    request = SynthesisRequest.parse_raw(receive.result())
+                except ValueError as e:
+                    # pydantic's ValidationError, e.g. an unsupported output_sample_rate
+                    await self.send_error(websocket, f"invalid request: {e}")
+                    continue
+                if not session.negotiated:
+                    await self.negotiate(session, request)
+                # checked here, a request that fails in the pipeline ends the session
+                error = self.request_error(request)
+                if error is not None:
+                    logger.info(f"Rejected request: {error}")
+                    await self.send_error(websocket, error)
+                    if request.event != "end":
+                        continue
+                    await requests.put(None)
+                    await worker
+                    return
+                if request.event == "delta":
+                    if utterance is None:
+                        utterance = Utterance("incremental", time.perf_counter())
+                        segmenter = self.new_segmenter(request)
+                    for clause in segmenter.push(request.text):
+                        logger.info(f"Speakable clause: {clause}")
+                        await requests.put(
+                            (request.copy(update={"text": clause}), utterance, False)
+                        )
+                    continue
+                if request.event in ("flush", "end"):
+                    if segmenter is None and request.text:
+                        utterance = Utterance("incremental", time.perf_counter())
+                        segmenter = self.new_segmenter(request)
+                    if segmenter is not None:
+                        # text sent with the flush is the utterance's last delta;
+                        # the last clause, or an empty one, closes the utterance
+                        clauses = segmenter.push(request.text) + segmenter.flush()
+                        clauses = clauses or [""]
+                        for i, clause in enumerate(clauses):
+                            logger.info(f"Speakable clause: {clause}")
+                            await requests.put(
+                                (
+                                    request.copy(update={"text": clause}),
+                                    utterance,
+                                    i == len(clauses) - 1,
+                                )
+                            )
+                    utterance = segmenter = None
+                    if request.event == "flush":
+                        continue
+                if request.event == "end" or request.text == "":
+                    await requests.put(None)
+                    await worker
                     return
-                text = request.text
-                speaker = request.speaker
-                language = request.language
-                speed = request.speed
                 logger.info(
-                    f"Received text: {text}, speaker: {speaker}, language: {language}, speed: {speed}"
+                    f"Received text: {request.text}, speaker: {request.speaker}, language: {request.language}, speed: {request.speed}, target_speaker: {request.target_speaker}"
+                )
+                await requests.put(
+                    (request, Utterance("full", time.perf_counter()), True)
                 )
-
-                # audio_stream = self.model.tts_stream(text, speaker, language, speed)
-                async for audio_chunk in self.model.generate_audio_chunks(
-                    text, speaker, language, speed
-                ):
-                    cloned_audio_stream = self.clone_model.tts_stream(
-                        audio_chunk, self.source_se, self.target_se
-                    )
-                    await send_audio_stream(websocket, cloned_audio_stream)
-
-                # await send_audio_stream(websocket, audio_stream)
         except WebSocketDisconnect:
-            await self.disconnect(websocket)
+            pass
         except Exception as e:
             logger.error(f"Error during text synthesis: {e}")
+            await self.send_error(websocket, f"synthesis failed: {e}")
+        finally:
+            if receive is not None:
+                receive.cancel()
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
             await self.disconnect(websocket)
 
     async def melo_handle_websocket(self, websocket: WebSocket):
         await self.connect(websocket)
+        loop = asyncio.get_running_loop()
         try:
             while True:
                 data = await websocket.receive_text()
@@ -114,9 +528,13 @@ class WebSocketHandler:
                     f"Received text: {text}, speaker: {speaker}, language: {language}, speed: {speed}"
                 )
 
-                audio_stream = self.melo_model.tts_stream(
+                melo_model = await loop.run_in_executor(
+                    None, self.models.get, "melo", "EN_V2"
+                )
+                audio_stream = melo_model.tts_stream(
                     text=text,
                     speaker_id=2,  # "spk2id": { "EN-US": 0, "EN-BR": 1,"EN-INDIA": 2, "EN-AU": 4}
+                    executor=self.executor,
                 )
                 await send_audio_stream(websocket, audio_stream)
 
@@ -136,22 +554,136 @@ class WebSocketHandler:
             await self.disconnect(websocket)
 
 
-en_checkpoint_base = "../resources/checkpoints/base_speakers/EN"
-converter_checkpoint = "../resources/checkpoints/converter"
 device = "cuda:0" if torch.cuda.is_available() else "cpu"
 
 # Load models and resources
 clone_model = StreamingCloneSpeakerTTS(
-    f"{converter_checkpoint}/config.json", device=device
+    f"{settings.CONVERTER_CHECKPOINT_DIR}/config.json", device=device
+)
+clone_model.load_ckpt(f"{settings.CONVERTER_CHECKPOINT_DIR}/checkpoint.pth")
+if settings.OPTIMIZE_FOR_INFERENCE:
+    clone_model.optimize_for_inference()
+if settings.ONNX_DIR is not None:
+    clone_model.load_onnx(
+        os.path.join(settings.ONNX_DIR, "converter"),
+        num_threads=settings.ONNX_THREADS or None,
+    )
+elif settings.COMPILE_MODELS:
+    clone_model.compile_for_inference(cache_dir=settings.COMPILE_CACHE_DIR)
+
+
+def load_openvoice(language):
+    checkpoint_dir = os.path.join(settings.OPENVOICE_CHECKPOINT_DIR, language)
+    model = StreamingBaseSpeakerTTS(f"{checkpoint_dir}/config.json", device=device)
+    model.load_ckpt(f"{checkpoint_dir}/checkpoint.pth")
+    if settings.OPTIMIZE_FOR_INFERENCE:
+        model.optimize_for_inference()
+    if settings.COMPILE_MODELS:
+        model.compile_for_inference(cache_dir=settings.COMPILE_CACHE_DIR)
+    return model
+
+
+feature_cache = FeatureCache(
+    capacity=settings.FEATURE_CACHE_SIZE,
+    cache_dir=settings.FEATURE_CACHE_DIR,
+    disk_mb=settings.FEATURE_CACHE_DISK_MB,
 )
-model = StreamingBaseSpeakerTTS(f"{en_checkpoint_base}/config.json", device=device)
-melo_model = StreamingMeloSpeakerTTS(language="EN_V2", device=device)
-model.load_ckpt(f"{en_checkpoint_base}/checkpoint.pth")
-clone_model.load_ckpt(f"{converter_checkpoint}/checkpoint.pth")
+if settings.LEARNED_LEXICON_PATH is not None:
+    english.set_learned_lexicon(settings.LEARNED_LEXICON_PATH)
+if settings.ZH_FRONTEND_WORKERS > 0:
+    # imported only here so that servers without chinese do not load jieba
+    from MeloTTS.melo.text import chinese
 
-handler = WebSocketHandler(model, clone_model, melo_model, device)
+    chinese.set_num_workers(settings.ZH_FRONTEND_WORKERS)
+
+
+def load_melo(language):
+    model = StreamingMeloSpeakerTTS(language=language, device=device)
+    if settings.OPTIMIZE_FOR_INFERENCE:
+        model.optimize_for_inference()
+    if settings.ONNX_DIR is not None:
+        model.load_onnx(
+            os.path.join(settings.ONNX_DIR, "melo", language),
+            num_threads=settings.ONNX_THREADS or None,
+        )
+    elif settings.COMPILE_MODELS:
+        model.compile_for_inference(cache_dir=settings.COMPILE_CACHE_DIR)
+    model.feature_cache = feature_cache
+    # the frontend and its BERT load with the model, not on its first sentence
+    warmup([model.language], device=device)
+    return model
+
+
+# the english base model stays resident, everything else is loaded on demand
+models = ModelPool(
+    {"openvoice": load_openvoice, "melo": load_melo},
+    settings.MODEL_MEMORY_BUDGET_MB,
+    pinned=[("openvoice", "EN")],
+)
+models.get("openvoice", "EN")
+
+
+def run_scheduled_batch(key, payloads):
+    model, speed = key
+    return model.run_scheduled_batch(speed, payloads)
+
+
+executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_pending=settings.INFERENCE_MAX_PENDING,
+)
+scheduler = MicroBatchScheduler(
+    run_scheduled_batch,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+    executor=executor,
+)
+
+audio_cache = AudioCache(
+    memory_mb=settings.AUDIO_CACHE_MEMORY_MB,
+    cache_dir=settings.AUDIO_CACHE_DIR,
+    disk_mb=settings.AUDIO_CACHE_DISK_MB,
+)
+
+speaker_registry = SpeakerRegistry(
+    clone_model, settings.SPEAKER_CACHE_DIR, capacity=settings.SPEAKER_CACHE_SIZE
+)
+
+handler = WebSocketHandler(
+    models,
+    clone_model,
+    device,
+    speaker_registry,
+    scheduler=scheduler,
+    executor=executor,
+    audio_cache=audio_cache,
+)
+
+
+@router.on_event("startup")
+async def register_default_speakers():
+    # the first start extracts the embeddings, off the event loop and not on import
+    await asyncio.get_running_loop().run_in_executor(
+        None, handler.register_default_speakers
+    )
 
 
 @router.websocket("/synthesize")
 async def synthesize(websocket: WebSocket):
     await handler.handle_websocket(websocket)
+
+
+@router.get("/synthesize/metrics")
+async def synthesize_metrics():
+    return {
+        "scheduler": scheduler.metrics(),
+        "executor": executor.metrics(),
+        "models": models.metrics(),
+        "features": feature_cache.metrics(),
+        "audio": audio_cache.metrics(),
+        "learned_lexicon": english.learned_lexicon.metrics(),
+        "speakers": speaker_registry.metrics(),
+        "time_to_first_audio": {
+            mode: stats.metrics() for mode, stats in handler.time_to_first_audio.items()
+        },
+    }
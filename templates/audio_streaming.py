@@ -1,18 +1,28 @@
 import asyncio
 import json
+import struct
 import numpy as np
 import sounddevice as sd
 import websockets
 
 from chain import chain  # Assuming chain module is correctly imported
 
+# sequence number, sample rate, codec, flags (bit 0 marks the end of an utterance)
+FRAME_HEADER = struct.Struct("<IIBB2x")
+
 
 async def stream(audio_stream):
-    """Receive audio data and process it."""
-    if audio_stream:
-        audio_data = np.frombuffer(audio_stream, dtype=np.float32)
-        sd.play(audio_data, samplerate=22050)
+    """Receive an int16 audio frame and play it."""
+    if isinstance(audio_stream, str):
+        print("Output format:", json.loads(audio_stream))
+        return
+    seq, sample_rate, codec, flags = FRAME_HEADER.unpack_from(audio_stream)
+    audio_data = np.frombuffer(audio_stream, dtype="<i2", offset=FRAME_HEADER.size)
+    if len(audio_data):
+        sd.play(audio_data, samplerate=sample_rate)
         sd.wait()
+    if flags & 1:
+        print(f"Utterance finished at frame {seq}")
 
 
 async def synthesize_text(text):
@@ -36,7 +46,8 @@ async def synthesize_text(text):
             "text": text,
             "speaker": "default",
             "language": "english",
-            "speed": 1.0
+            "speed": 1.0,
+            "output_format": "int16"
         }))
 
         await listen_task
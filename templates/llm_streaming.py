@@ -7,19 +7,6 @@ import websockets
 from chain import chain  # Assuming chain module is correctly imported
 
 
-async def text_chunker(chunks):
-    """Combine text into sentences and yield the buffer."""
-    buffer = ""
-    if chunks:
-        async for text in chunks:
-            buffer += text.strip() + " "
-            if text.endswith((".", "!", "?")):
-                yield buffer
-                buffer = ""
-    if buffer:
-        yield buffer.strip()
-
-
 async def stream(audio_stream):
     """Receive audio data and process it."""
     if audio_stream:
@@ -45,13 +32,17 @@ async def synthesize_text(text_iter):
 
         listen_task = asyncio.create_task(listen())
 
-        async for text in text_chunker(text_iter):
+        # the server segments the deltas into sentences, so tokens are sent
+        # as soon as they arrive instead of being buffered until a full stop
+        async for text in text_iter:
             await websocket.send(json.dumps({
+                "event": "delta",
                 "text": text,
                 "speaker": "default",
                 "language": "english",
                 "speed": 1.0
             }))
+        await websocket.send(json.dumps({"event": "end"}))
 
         await listen_task
 
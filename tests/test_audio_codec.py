@@ -0,0 +1,51 @@
+import numpy as np
+
+from openvoice_streaming_server.core.libs.audio_codec import (
+    CODECS,
+    FLAG_FINAL,
+    FRAME_HEADER,
+    AudioFrameEncoder,
+    mulaw_encode,
+    negotiate_format,
+)
+
+
+def test_mulaw_maps_silence_and_full_scale_to_the_g711_codes():
+    codes = mulaw_encode(np.array([0.0, 1.0, -1.0, 2.0], dtype=np.float32))
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [0xFF, 0x80, 0x00, 0x80]
+
+
+def test_mulaw_is_monotonic_in_the_sample_value():
+    audio = np.linspace(0.0, 1.0, 200, dtype=np.float32)
+    # positive codes count down from 0xFF to 0x80 as the level rises
+    assert np.all(np.diff(mulaw_encode(audio).astype(int)) <= 0)
+
+
+def test_frames_are_numbered_from_zero_and_carry_the_pcm_payload():
+    encoder = AudioFrameEncoder("int16", 24000)
+    audio = np.array([0.0, 0.5, -1.0], dtype=np.float32)
+    first = encoder.encode(audio)
+    last = encoder.encode(np.zeros(0, dtype=np.float32), final=True)
+
+    assert FRAME_HEADER.unpack_from(first) == (0, 24000, CODECS["int16"], 0)
+    payload = np.frombuffer(first[FRAME_HEADER.size :], dtype="<i2")
+    assert payload.tolist() == [0, 16383, -32767]
+    assert last == FRAME_HEADER.pack(1, 24000, CODECS["int16"], FLAG_FINAL)
+
+
+def test_float32_and_mulaw_payload_sizes():
+    audio = np.linspace(-1.0, 1.0, 10, dtype=np.float32)
+    frame = AudioFrameEncoder("float32", 16000).encode(audio)
+    np.testing.assert_array_equal(
+        np.frombuffer(frame[FRAME_HEADER.size :], dtype="<f4"), audio
+    )
+    frame = AudioFrameEncoder("mulaw", 8000).encode(audio)
+    assert len(frame) == FRAME_HEADER.size + len(audio)
+
+
+def test_unknown_or_unavailable_formats_fall_back_to_int16():
+    assert negotiate_format("mulaw", 8000) == "mulaw"
+    assert negotiate_format("mp3", 8000) == "int16"
+    # opus cannot encode at 44.1 kHz, whether or not libsndfile is present
+    assert negotiate_format("opus", 44100) == "int16"
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+from openvoice_streaming_server.core.libs.executor import InferenceExecutor
+
+
+def test_run_returns_the_result_of_the_call():
+    async def main():
+        executor = InferenceExecutor(max_workers=1)
+        result = await executor.run(lambda a, b=0: a + b, 1, b=2)
+        executor.shutdown()
+        return result, executor.metrics()
+
+    result, metrics = asyncio.run(main())
+    assert result == 3
+    assert metrics["completed"] == 1
+
+
+def test_callers_beyond_workers_and_pending_wait_on_the_loop():
+    release = threading.Event()
+    started = []
+
+    def blocking(i):
+        started.append(i)
+        release.wait(5)
+        return i
+
+    async def main():
+        executor = InferenceExecutor(max_workers=1, max_pending=1)
+        calls = [asyncio.ensure_future(executor.run(blocking, i)) for i in range(4)]
+        await asyncio.sleep(0.1)
+        # one call runs, one waits in the pool, the others wait for a slot
+        metrics = executor.metrics()
+        release.set()
+        results = await asyncio.gather(*calls)
+        executor.shutdown()
+        return metrics, results
+
+    metrics, results = asyncio.run(main())
+    assert metrics["running"] == 1
+    assert metrics["pending"] == 1
+    assert results == [0, 1, 2, 3]
+    assert started == [0, 1, 2, 3]
+
+
+def test_a_cancelled_call_that_has_not_started_is_dropped():
+    release = threading.Event()
+    started = []
+
+    def blocking(i):
+        started.append(i)
+        release.wait(5)
+        return i
+
+    async def main():
+        executor = InferenceExecutor(max_workers=1, max_pending=4)
+        running = asyncio.ensure_future(executor.run(blocking, 0))
+        queued = asyncio.ensure_future(executor.run(blocking, 1))
+        await asyncio.sleep(0.1)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        release.set()
+        await running
+        executor.shutdown()
+        return executor.metrics()
+
+    metrics = asyncio.run(main())
+    assert started == [0]
+    assert metrics["cancelled"] == 1
+    assert metrics["completed"] == 1
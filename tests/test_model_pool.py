@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from openvoice_streaming_server.core.libs.model_pool import ModelPool
+
+MB = 1024 * 1024
+
+
+class FakeModel:
+    def __init__(self, engine, language, nbytes):
+        self.engine = engine
+        self.language = language
+        self.nbytes = nbytes
+
+
+def make_pool(sizes, budget_mb, pinned=(), loads=None):
+    """A pool whose models take `sizes[language]` MB."""
+
+    def loader(engine):
+        def load(language):
+            if loads is not None:
+                loads.append((engine, language))
+            return FakeModel(engine, language, sizes[language] * MB)
+
+        return load
+
+    return ModelPool(
+        {"melo": loader("melo"), "openvoice": loader("openvoice")},
+        memory_budget_mb=budget_mb,
+        pinned=pinned,
+        sizeof=lambda model: model.nbytes,
+    )
+
+
+def test_the_least_recently_used_model_is_evicted_over_budget():
+    pool = make_pool({"EN": 4, "ZH": 4, "JP": 4}, budget_mb=10)
+    pool.get("melo", "EN")
+    pool.get("melo", "ZH")
+    pool.get("melo", "EN")
+    pool.get("melo", "JP")
+    assert pool.resident() == [("melo", "EN"), ("melo", "JP")]
+    metrics = pool.metrics()
+    assert metrics["evictions"] == 1
+    assert metrics["resident_mb"] == 8
+
+
+def test_pinned_models_are_never_evicted():
+    pool = make_pool({"EN": 4, "ZH": 4, "JP": 4}, budget_mb=10, pinned=[("melo", "EN")])
+    for language in ("EN", "ZH", "JP"):
+        pool.get("melo", language)
+    assert pool.resident() == [("melo", "EN"), ("melo", "JP")]
+
+
+def test_a_model_larger_than_the_budget_still_loads():
+    pool = make_pool({"EN": 4, "ZH": 20}, budget_mb=10)
+    pool.get("melo", "EN")
+    model = pool.get("melo", "ZH")
+    assert model.language == "ZH"
+    assert pool.resident() == [("melo", "ZH")]
+
+
+def test_hits_do_not_reload_and_unknown_engines_are_rejected():
+    loads = []
+    pool = make_pool({"EN": 1}, budget_mb=10, loads=loads)
+    assert pool.get("melo", "EN") is pool.get("melo", "EN")
+    pool.get("openvoice", "EN")
+    assert loads == [("melo", "EN"), ("openvoice", "EN")]
+    assert pool.metrics()["hits"] == 1
+    with pytest.raises(KeyError):
+        pool.get("bark", "EN")
+
+
+def test_concurrent_requests_share_one_load():
+    loads = []
+
+    def load(language):
+        loads.append(language)
+        time.sleep(0.05)
+        return FakeModel("melo", language, MB)
+
+    pool = ModelPool({"melo": load}, memory_budget_mb=10, sizeof=lambda model: model.nbytes)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(pool.get("melo", "EN")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["EN"]
+    assert len({id(model) for model in results}) == 1
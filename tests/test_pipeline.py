@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from openvoice_streaming_server.core.libs.pipeline import SynthesisPipeline
+
+
+def run_pipeline(requests, frontend, synthesize, deliver, queue_size=2):
+    async def main():
+        queue = asyncio.Queue()
+        for request in requests:
+            queue.put_nowait(request)
+        await SynthesisPipeline(frontend, synthesize, deliver, queue_size=queue_size).run(queue)
+
+    asyncio.run(main())
+
+
+def test_sentences_are_delivered_in_order_until_the_end_request():
+    delivered = []
+
+    async def frontend(request):
+        return request.split()
+
+    async def synthesize(item):
+        return item.upper()
+
+    async def deliver(item, audio):
+        delivered.append((item, audio))
+
+    run_pipeline(["a b", "c", None, "never"], frontend, synthesize, deliver)
+    assert delivered == [("a", "A"), ("b", "B"), ("c", "C")]
+
+
+def test_the_next_sentence_synthesizes_while_one_is_delivered():
+    events = []
+
+    async def frontend(request):
+        return [1, 2]
+
+    async def synthesize(item):
+        events.append(("synthesize", item))
+        return item
+
+    async def deliver(item, audio):
+        events.append(("deliver start", item))
+        await asyncio.sleep(0.05)
+        events.append(("deliver end", item))
+
+    run_pipeline(["x", None], frontend, synthesize, deliver)
+    assert events.index(("synthesize", 2)) < events.index(("deliver end", 1))
+
+
+def test_a_failing_stage_stops_the_pipeline():
+    delivered = []
+
+    async def frontend(request):
+        return [request]
+
+    async def synthesize(item):
+        if item == "bad":
+            raise ValueError("synthesis failed")
+        return item
+
+    async def deliver(item, audio):
+        delivered.append(item)
+
+    # no None request: the error, not the end of the input, stops the run
+    with pytest.raises(ValueError):
+        run_pipeline(["ok", "bad", "after"], frontend, synthesize, deliver)
+    assert "after" not in delivered
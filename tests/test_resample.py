@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from openvoice_streaming_server.core.libs.resample import StreamingResampler, polyphase_kernel
+
+
+def resample(resampler, audio, chunk_sizes):
+    chunks, start = [], 0
+    for size in chunk_sizes:
+        chunks.append(resampler.process(audio[start : start + size]))
+        start += size
+    chunks.append(resampler.process(audio[start:]))
+    chunks.append(resampler.flush())
+    return np.concatenate(chunks)
+
+
+@pytest.mark.parametrize("src_rate, dst_rate", [(44100, 24000), (22050, 48000), (24000, 16000)])
+def test_chunked_output_equals_whole_signal_output(src_rate, dst_rate):
+    audio = np.random.default_rng(0).uniform(-1, 1, 5000).astype(np.float32)
+    resampler = StreamingResampler(src_rate, dst_rate)
+    whole = resample(resampler, audio, [])
+    # flush resets the stream, so the same resampler can be reused
+    chunked = resample(resampler, audio, [1, 7, 300, 0, 1024, 33])
+    assert len(whole) == -(-len(audio) * dst_rate // src_rate)
+    np.testing.assert_allclose(chunked, whole, rtol=1e-5, atol=1e-6)
+
+
+def test_a_tone_keeps_its_frequency_and_phase():
+    src_rate, dst_rate = 44100, 24000
+    t = np.arange(src_rate // 10) / src_rate
+    audio = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    resampler = StreamingResampler(src_rate, dst_rate)
+    out = np.concatenate([resampler.process(audio), resampler.flush()])
+    expected = np.sin(2 * np.pi * 440 * np.arange(len(out)) / dst_rate)
+    # away from the edges, where the filter sees the zero padding
+    np.testing.assert_allclose(out[200:-200], expected[200:-200], atol=1e-2)
+
+
+def test_equal_rates_pass_the_audio_through():
+    audio = np.arange(10, dtype=np.float32)
+    resampler = StreamingResampler(16000, 16000)
+    np.testing.assert_array_equal(resampler.process(audio), audio)
+    assert len(resampler.flush()) == 0
+
+
+def test_rates_without_a_small_ratio_are_rejected():
+    with pytest.raises(ValueError):
+        polyphase_kernel(44100, 44099)
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from openvoice_streaming_server.core.libs.executor import InferenceExecutor
+from openvoice_streaming_server.core.libs.scheduler import MicroBatchScheduler
+
+
+class RecordingBatch:
+    """A run_batch that doubles its payloads and remembers every batch it ran."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, key, payloads):
+        self.batches.append((key, list(payloads)))
+        return [p * 2 for p in payloads]
+
+
+def test_jobs_of_one_window_run_as_one_batch():
+    run_batch = RecordingBatch()
+
+    async def main():
+        scheduler = MicroBatchScheduler(run_batch, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(scheduler.submit("a", i) for i in range(5)))
+        await scheduler.stop()
+        return results, scheduler.metrics()
+
+    results, metrics = asyncio.run(main())
+    assert results == [0, 2, 4, 6, 8]
+    assert run_batch.batches == [("a", [0, 1, 2, 3, 4])]
+    assert metrics["batches"] == 1
+    assert metrics["largest_batch"] == 5
+
+
+def test_batches_hold_one_key_and_at_most_max_batch_size_jobs():
+    run_batch = RecordingBatch()
+
+    async def main():
+        scheduler = MicroBatchScheduler(run_batch, max_batch_size=2, max_wait_ms=20)
+        jobs = [("a", 1), ("b", 2), ("a", 3), ("a", 4), ("b", 5)]
+        results = await asyncio.gather(*(scheduler.submit(k, p) for k, p in jobs))
+        await scheduler.stop()
+        return results
+
+    assert asyncio.run(main()) == [2, 4, 6, 8, 10]
+    for key, payloads in run_batch.batches:
+        assert 1 <= len(payloads) <= 2
+    assert sorted(p for key, payloads in run_batch.batches if key == "a" for p in payloads) == [1, 3, 4]
+    assert sorted(p for key, payloads in run_batch.batches if key == "b" for p in payloads) == [2, 5]
+
+
+def test_a_failing_batch_fails_each_of_its_jobs():
+    def run_batch(key, payloads):
+        raise ValueError("bad batch")
+
+    async def main():
+        scheduler = MicroBatchScheduler(run_batch, max_wait_ms=10)
+        results = await asyncio.gather(
+            scheduler.submit("a", 1), scheduler.submit("a", 2), return_exceptions=True
+        )
+        await scheduler.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [ValueError, ValueError]
+
+
+def test_batches_run_on_the_executor():
+    run_batch = RecordingBatch()
+
+    async def main():
+        executor = InferenceExecutor(max_workers=2, max_pending=4)
+        scheduler = MicroBatchScheduler(run_batch, max_wait_ms=10, executor=executor)
+        results = await asyncio.gather(*(scheduler.submit("a", i) for i in range(3)))
+        await scheduler.stop()
+        executor.shutdown()
+        return results, executor.metrics()
+
+    results, metrics = asyncio.run(main())
+    assert results == [0, 2, 4]
+    assert metrics["completed"] == len(run_batch.batches)
+
+
+def test_stop_fails_queued_jobs_and_keeps_the_worker_slots():
+    run_batch = RecordingBatch()
+
+    async def main():
+        scheduler = MicroBatchScheduler(run_batch, max_wait_ms=1000)
+        # stopped while the collector waits inside the window of this job
+        pending = asyncio.ensure_future(scheduler.submit("a", 1))
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        with pytest.raises(RuntimeError):
+            await pending
+        for _ in range(3):
+            scheduler.start()
+            await asyncio.sleep(0.01)
+            await scheduler.stop()
+        scheduler.max_wait_ms = 10
+        result = await asyncio.wait_for(scheduler.submit("a", 21), 1)
+        await scheduler.stop()
+        return result
+
+    assert asyncio.run(main()) == 42
+    assert run_batch.batches == [("a", [21])]
@@ -0,0 +1,38 @@
+from openvoice_streaming_server.core.libs.segmenter import IncrementalSentenceSegmenter
+
+
+def test_complete_sentences_are_released_as_they_arrive():
+    segmenter = IncrementalSentenceSegmenter("EN")
+    assert segmenter.push("Hello there. How") == ["Hello there."]
+    assert segmenter.push(" are you") == []
+    assert segmenter.flush() == ["How are you"]
+    assert segmenter.flush() == []
+
+
+def test_a_terminator_needs_the_next_character_first():
+    segmenter = IncrementalSentenceSegmenter("EN")
+    # "3." could still become "3.5"
+    assert segmenter.push("It costs 3.") == []
+    released = segmenter.push("5 dollars. Ok")
+    assert len(released) == 1 and released[0].endswith("dollars.")
+    assert segmenter.flush() == ["Ok"]
+
+
+def test_a_long_enough_clause_is_released_before_its_sentence_ends():
+    segmenter = IncrementalSentenceSegmenter("EN", min_clause_words=4)
+    assert segmenter.push("Well, then") == []
+    assert segmenter.push(" how are you doing today, my") == ["Well, then how are you doing today,"]
+    assert segmenter.flush() == ["my"]
+
+
+def test_a_buffer_without_boundaries_is_cut_at_a_space():
+    segmenter = IncrementalSentenceSegmenter("EN", max_chars=20)
+    assert segmenter.push("aaaaa " + "b" * 30) == ["aaaaa"]
+    assert segmenter.flush() == ["b" * 30]
+
+
+def test_chinese_clauses_are_measured_in_characters():
+    segmenter = IncrementalSentenceSegmenter("ZH", min_clause_words=4)
+    assert segmenter.push("你好。今天") == ["你好."]
+    assert segmenter.push("天气很好，我们") == ["今天天气很好,"]
+    assert segmenter.flush() == ["我们"]
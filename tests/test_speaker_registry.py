@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from openvoice_streaming_server.core.libs.speaker_registry import SpeakerRegistry
+
+SPEAKER_ID = SpeakerRegistry.speaker_id_for(b"reference clip")
+
+
+@pytest.fixture
+def registry(tmp_path):
+    # a speaker registered earlier: its embedding file and a name for it
+    (tmp_path / f"{SPEAKER_ID}.pth").write_bytes(b"")
+    (tmp_path / "index.json").write_text(json.dumps({"source": SPEAKER_ID}))
+    return SpeakerRegistry(clone_model=None, cache_dir=str(tmp_path))
+
+
+def test_registered_ids_and_names_resolve_to_the_id(registry):
+    assert registry.resolve(SPEAKER_ID) == SPEAKER_ID
+    assert registry.resolve("source") == SPEAKER_ID
+    assert registry.speakers() == [{"speaker_id": SPEAKER_ID, "names": ["source"]}]
+
+
+@pytest.mark.parametrize(
+    "speaker",
+    [
+        "../" + SPEAKER_ID,
+        SPEAKER_ID + ".pth",
+        SPEAKER_ID.upper(),
+        "index",
+        None,
+        "0123456789abcdef",
+    ],
+)
+def test_anything_but_a_registered_id_or_name_is_rejected(registry, speaker):
+    with pytest.raises(KeyError):
+        registry.resolve(speaker)
+
+
+def test_an_unsupported_clip_suffix_is_rejected_before_extraction(registry):
+    with pytest.raises(ValueError):
+        registry.register(b"clip", suffix="/../../x.pth")
+    with pytest.raises(ValueError):
+        registry.register(b"clip", suffix=".exe")